@@ -1,68 +1,443 @@
+import hashlib
 import json
+import logging
 import os
-from flask import Flask, request, jsonify, send_from_directory
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
 
+import catalogos
+from artefatos import capturar_artefatos, diretorio_artefatos, servir_artefato
+from banco_resultados import CLASSES_REGISTRADAS, BancoResultados
+import escalonador
+import exportacao
+import limites
+import memoria
+from esquemas import ErroValidacao, validar
+from coalescencia import ExecucaoCompartilhada, chave_canonica
+from resultados import codificar_json, codificar_resposta
 from desafio1 import TransformadorMonofasico1
 from desafio2 import executar_desafio2
 from desafio3 import executar_desafio3
 from desafio4 import executar_desafio4
+from inrush import executar_inrush
+from simulacao_carga import executar_simulacao_carga
+from incerteza import executar_incerteza
+from pipeline import executar_pipeline
+import registro
+import sessoes
+import tabela_respostas
 
 
+# Registros vão para uma fila e são escritos em outra thread (LOG_MODO=producao: JSON compacto)
+registro.configurar()
+logger = logging.getLogger(__name__)
+log_requisicoes = logging.getLogger(registro.LOGGER_REQUISICOES)
+
 app = Flask(__name__)
 CORS(app)  # Permite requisições de outros domínios
 
+# Pool compartilhado usado pelo processamento em lote
+MAX_TRABALHADORES_LOTE = int(os.environ.get('MAX_TRABALHADORES_LOTE', os.cpu_count() or 4))
+executor_lote = ThreadPoolExecutor(max_workers=MAX_TRABALHADORES_LOTE)
+
+# Os itens do lote rodam em paralelo e os desafios gravam nomes fixos: cada entrada distinta
+# renderiza no próprio subdiretório (nome derivado da chave canônica)
+DIRETORIO_ARTEFATOS_LOTE = (os.environ.get('ARTEFATOS_LOTE')
+                            or os.path.join(tempfile.gettempdir(), 'transformador_lote'))
+
+# Requisições idênticas simultâneas compartilham um único cálculo
+TEMPO_LIMITE_CALCULO = float(os.environ.get('TEMPO_LIMITE_CALCULO', 120))
+execucoes = ExecucaoCompartilhada(tempo_limite=TEMPO_LIMITE_CALCULO)
+
+# Admissão dos cálculos em faixas (leve/pesada): os leves não ficam atrás de renderizações pesadas
+fila_calculos = escalonador.Escalonador()
+
+# Resultados dos desafios 1, 3 e 4 guardados em SQLite: só com BANCO_RESULTADOS (caminho do arquivo)
+CAMINHO_BANCO = os.environ.get('BANCO_RESULTADOS', '')
+banco = BancoResultados(CAMINHO_BANCO) if CAMINHO_BANCO else None
+
+@app.before_request
+def iniciar_registro():
+    g.inicio = time.perf_counter()
+
+
+@app.after_request
+def registrar_requisicao(resposta):
+    """Um registro compacto por requisição: rota, classe, status, tamanho e duração"""
+    log_requisicoes.info("%s %s %d", request.method, request.path, resposta.status_code, extra={
+        "evento": "requisicao",
+        "metodo": request.method,
+        "rota": request.path,
+        "classe": g.get('classe'),
+        "status": resposta.status_code,
+        "bytes": resposta.calculate_content_length(),
+        "duracao_ms": round((time.perf_counter() - g.get('inicio', time.perf_counter())) * 1000, 2),
+    })
+    return resposta
+
+
 @app.route('/mensagem', methods=['POST'])
 def mensagem():
-    dados = request.get_json()
-    classe = dados.get('classe')
-    parametros = dados.get('parametros', '')
+    dados = request.get_json(silent=True)
+    if not isinstance(dados, dict):
+        dados = {}
+    classe = g.classe = dados.get('classe')
+
+    # Validação e conversão dos parâmetros antes de qualquer cálculo
+    try:
+        parametros = validar(classe, dados.get('parametros'))
+    except ErroValidacao as e:
+        corpo, tipo = codificar_resposta(e.para_json(), request.headers.get('Accept'))
+        return Response(corpo, status=400, mimetype=tipo)
+
+    try:
+        resposta = calcular(classe, parametros)
+    except limites.LimiteExcedido as e:
+        return jsonify(e.para_json()), 422
+    except (escalonador.FilaCheia, escalonador.EsperaEsgotada) as e:
+        return jsonify({'erro': str(e)}), 503, {'Retry-After': '1'}
+    except TimeoutError as e:  # Inclui limites.CalculoCancelado (prazo esgotado)
+        return jsonify({'erro': str(e)}), 504
+    except ValueError as e:  # Entrada que o cálculo recusa (ex.: combinação inválida no pipeline)
+        return jsonify({'erro': str(e)}), 400
+
+    # Serialização única (JSON compacto ou MessagePack, conforme o Accept)
+    corpo, tipo = codificar_resposta({'resposta': resposta}, request.headers.get('Accept'))
+    return Response(corpo, mimetype=tipo)
+
+
+@app.route('/mensagem/batch', methods=['POST'])
+def mensagem_lote():
+    """
+    Recebe uma lista de requisições {id, classe, parametros} e devolve um NDJSON,
+    uma linha por requisição, emitida assim que o respectivo cálculo termina.
+    """
+    dados = request.get_json(silent=True)
+    if isinstance(dados, dict):
+        dados = dados.get('requisicoes')
+    if not isinstance(dados, list):
+        return jsonify({'erro': "Envie uma lista de requisições ou {'requisicoes': [...]}"}), 400
+
+    correlacao = request.headers.get('X-Correlation-ID')
+
+    # Agrupa entradas idênticas para calcular cada uma apenas uma vez;
+    # itens que não passam no esquema são respondidos sem calcular
+    grupos, invalidos = {}, []
+    for indice, item in enumerate(dados):
+        if not isinstance(item, dict):
+            item = {}
+        id_item = item.get('id', indice)
+        classe = item.get('classe')
+        try:
+            parametros = validar(classe, item.get('parametros'))
+        except ErroValidacao as e:
+            invalidos.append((id_item, e.para_json()))
+            continue
+        chave = chave_canonica(classe, parametros)
+        grupos.setdefault(chave, (classe, parametros, []))[2].append(id_item)
+
+    # Faixas de maior peso (cálculos leves) entram primeiro no pool, para não esperarem
+    # atrás de itens pesados que ocupam as threads aguardando vaga no escalonador
+    ordem = sorted(grupos.items(), key=lambda grupo: -fila_calculos.faixa(grupo[1][0]).peso)
+    futuros = {}
+    for chave, (classe, parametros, ids) in ordem:
+        diretorio = _diretorio_item(chave)
+        futuro = executor_lote.submit(calcular, classe, parametros,
+                                      os.path.join(DIRETORIO_ARTEFATOS_LOTE, diretorio))
+        futuros[futuro] = (ids, diretorio)
+
+    def linha_json(linha, diretorio=None):
+        if correlacao is not None:
+            linha['correlacao'] = correlacao
+        corpo = codificar_json(linha)
+        if diretorio is not None:
+            # Caminhos no servidor viram URLs públicas: a codificação JSON de uma string é a
+            # concatenação da de suas partes, então o prefixo codificado aparece intacto
+            prefixo = codificar_json(os.path.abspath(os.path.join(DIRETORIO_ARTEFATOS_LOTE, diretorio)) + os.sep)
+            corpo = corpo.replace(prefixo[1:-1], f'/lote/{diretorio}/'.encode())
+        return corpo + b'\n'
+
+    def gerar_linhas():
+        for id_item, erro in invalidos:
+            yield linha_json({'id': id_item, **erro})
+        for futuro in as_completed(futuros):
+            try:
+                conteudo = {'resposta': futuro.result()}
+            except Exception as e:
+                # Erros de um item não interrompem o restante do lote
+                conteudo = {'erro': str(e)}
+            ids, diretorio = futuros[futuro]
+            if 'resposta' in conteudo and os.path.isdir(os.path.join(DIRETORIO_ARTEFATOS_LOTE, diretorio)):
+                conteudo['artefatos'] = f'/lote/{diretorio}/'
+            for id_item in ids:
+                yield linha_json({'id': id_item, **conteudo}, diretorio)
+
+    resposta = Response(gerar_linhas(), mimetype='application/x-ndjson')
+    if correlacao is not None:
+        resposta.headers['X-Correlation-ID'] = correlacao
+    return resposta
+
+
+def _diretorio_item(chave):
+    return hashlib.sha256(chave.encode()).hexdigest()[:32]
+
+
+@app.route('/lote/<diretorio>/<nome>')
+def visualizar_artefato_lote(diretorio, nome):
+    """Arquivos renderizados por um item de /mensagem/batch"""
+    if len(diretorio) != 32 or any(c not in '0123456789abcdef' for c in diretorio):
+        return jsonify({'erro': 'Artefato não encontrado'}), 404
+    return servir_artefato(nome, os.path.join(DIRETORIO_ARTEFATOS_LOTE, diretorio))
 
-    resposta = calcular(classe, parametros)
-    return jsonify({'resposta': resposta})
 
+@app.route('/exportar', methods=['POST'])
+def exportar():
+    """Resultados numéricos em formato colunar: Arrow IPC (padrão), Parquet ou NPZ"""
+    dados = request.get_json(silent=True) or {}
+    g.classe = dados.get('classe')
+    formato = dados.get('formato', 'arrow')
+    try:
+        parametros = validar(dados.get('classe'), dados.get('parametros'))
+        limites.verificar(dados.get('classe'), parametros)
+        with fila_calculos.admitir(dados.get('classe')), limites.protegido(dados.get('classe')):
+            corpo, tipo = exportacao.exportar(dados.get('classe'), parametros, formato)
+    except ErroValidacao as e:
+        return jsonify(e.para_json()), 400
+    except limites.LimiteExcedido as e:
+        return jsonify(e.para_json()), 422
+    except (escalonador.FilaCheia, escalonador.EsperaEsgotada) as e:
+        return jsonify({'erro': str(e)}), 503, {'Retry-After': '1'}
+    except TimeoutError as e:
+        return jsonify({'erro': str(e)}), 504
+    except RuntimeError as e:
+        return jsonify({'erro': str(e)}), 501
+    except (ValueError, TypeError) as e:
+        return jsonify({'erro': str(e)}), 400
+    resposta = Response(corpo, mimetype=tipo)
+    resposta.headers['Content-Disposition'] = f"attachment; filename={dados.get('classe')}.{formato}"
+    return resposta
 
-def calcular(classe, parametros):
-    arquivo = 'dados.json'
 
-    with open(arquivo, 'w') as f:
-        json.dump(parametros, f)
+@app.route('/sessao', methods=['POST'])
+def criar_sessao():
+    """Cria uma sessão de projeto do desafio 1; alterações posteriores via PATCH"""
+    dados = request.get_json(silent=True) or {}
+    renderizar = dados.pop('renderizar', True)
+    try:
+        parametros = validar('desafio1', dados.get('parametros', dados))
+        limites.verificar('desafio1', parametros)
+        with fila_calculos.admitir('desafio1'), limites.protegido('desafio1'):
+            sessao = sessoes.criar_sessao(parametros, renderizar)
+    except ErroValidacao as e:
+        return jsonify(e.para_json()), 400
+    except limites.LimiteExcedido as e:
+        return jsonify(e.para_json()), 422
+    except (escalonador.FilaCheia, escalonador.EsperaEsgotada) as e:
+        return jsonify({'erro': str(e)}), 503, {'Retry-After': '1'}
+    except TimeoutError as e:
+        return jsonify({'erro': str(e)}), 504
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    corpo, tipo = codificar_resposta(sessao.para_json(sessao.resumo_criacao), request.headers.get('Accept'))
+    return Response(corpo, status=201, mimetype=tipo)
 
+
+@app.route('/sessao/<id_sessao>', methods=['GET', 'PATCH', 'DELETE'])
+def sessao_projeto(id_sessao):
+    if request.method == 'DELETE':
+        if not sessoes.remover_sessao(id_sessao):
+            return jsonify({'erro': 'Sessão não encontrada'}), 404
+        return Response(status=204)
+
+    try:
+        sessao = sessoes.obter_sessao(id_sessao)
+    except KeyError:
+        return jsonify({'erro': 'Sessão não encontrada'}), 404
+
+    resumo = None
+    if request.method == 'PATCH':
+        campos = request.get_json(silent=True) or {}
+        try:
+            alteracoes = validar('desafio1', campos.get('parametros', campos), parcial=True)
+            limites.verificar('desafio1', alteracoes)
+            with fila_calculos.admitir('desafio1'), limites.protegido('desafio1'):
+                # Sob a trava da sessão entre processos, a partir da versão mais recente do registro
+                sessao, resumo = sessoes.alterar_sessao(id_sessao, alteracoes)
+        except KeyError:
+            return jsonify({'erro': 'Sessão não encontrada'}), 404
+        except ErroValidacao as e:
+            return jsonify(e.para_json()), 400
+        except limites.LimiteExcedido as e:
+            return jsonify(e.para_json()), 422
+        except (escalonador.FilaCheia, escalonador.EsperaEsgotada) as e:
+            return jsonify({'erro': str(e)}), 503, {'Retry-After': '1'}
+        except TimeoutError as e:
+            return jsonify({'erro': str(e)}), 504
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+
+    corpo, tipo = codificar_resposta(sessao.para_json(resumo), request.headers.get('Accept'))
+    return Response(corpo, mimetype=tipo)
+
+
+@app.route('/sessao/<id_sessao>/3d')
+def visualizar_3d_sessao(id_sessao):
+    try:
+        sessao = sessoes.obter_sessao(id_sessao)
+    except KeyError:
+        return jsonify({'erro': 'Sessão não encontrada'}), 404
+    if not sessao.caminho_3d:
+        return jsonify({'erro': 'Sessão sem modelo 3D'}), 404
+    return servir_artefato(sessao.caminho_3d)
+
+
+@app.route('/resultados')
+def consultar_resultados():
+    """
+    Consulta os projetos do desafio 1 já calculados. Filtros na query string:
+    tipo_transformador, Vp, Vs, frequencia, tipo_lamina, lamina, viavel e
+    potencia/peso_ferro/peso_cobre com sufixo _min ou _max; além de limite, ordem e completo.
+    """
+    if banco is None:
+        return jsonify({'erro': 'Banco de resultados desativado'}), 503
+    filtros = request.args.to_dict()
+    limite = filtros.pop('limite', 100)
+    ordem = filtros.pop('ordem', 'potencia')
+    completo = filtros.pop('completo', '').lower() in ('1', 'true', 'sim')
+    inicio = time.perf_counter()
+    try:
+        projetos = banco.consultar_projetos(filtros, limite, ordem, completo)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    corpo, tipo = codificar_resposta({
+        'projetos': projetos,
+        'total': len(projetos),
+        'tempo_ms': round((time.perf_counter() - inicio) * 1000, 3)
+    }, request.headers.get('Accept'))
+    return Response(corpo, mimetype=tipo)
+
+
+@app.route('/resultados/estatisticas')
+def estatisticas_resultados():
+    if banco is None:
+        return jsonify({'erro': 'Banco de resultados desativado'}), 503
+    return jsonify(banco.estatisticas())
+
+
+@app.route('/memoria')
+def perfil_memoria():
+    """Pico e memória retida por etapa (PERFIL_MEMORIA=1) e as linhas que mais retêm memória"""
+    if not memoria.ativo():
+        return jsonify({'erro': 'Perfil de memória desativado (inicie com PERFIL_MEMORIA=1)'}), 503
+    return jsonify(memoria.relatorio(request.args.get('limite', 10, type=int)))
+
+
+@app.route('/escalonador')
+def estatisticas_escalonador():
+    """Ocupação, contadores e percentis da espera na fila de cada faixa do escalonador"""
+    return jsonify(fila_calculos.estatisticas())
+
+
+@app.route('/catalogos')
+def listar_catalogos():
+    return jsonify(catalogos.listar_catalogos())
+
+
+def calcular(classe, parametros, diretorio=None):
+    """
+    diretorio: onde renderizar (itens do lote). Esses resultados apontam para arquivos fora
+    do diretório atual: não passam pelo banco e só coalescem com o mesmo diretório.
+    """
+    # Entradas acima dos limites de recursos da classe são recusadas antes de calcular
+    limites.verificar(classe, parametros)
+    chave = chave_canonica(classe, parametros)
+    # Entrada já calculada (e com os artefatos ainda em disco): responde direto do banco
+    if banco is not None and classe in CLASSES_REGISTRADAS and diretorio is None:
+        guardado = banco.buscar(chave)
+        if guardado is not None:
+            return guardado
+    return execucoes.executar((chave, diretorio), _calcular_e_registrar, classe, parametros, chave, diretorio)
+
+
+def _calcular_e_registrar(classe, parametros, chave, diretorio=None):
+    # Só o cálculo ocupa vaga (e conta o prazo): requisições coalescidas e respostas do banco não
+    with fila_calculos.admitir(classe), diretorio_artefatos(diretorio) if diretorio else nullcontext():
+        with capturar_artefatos() as gerados, memoria.etapa(f"calculo.{classe}"), limites.protegido(classe):
+            resultado = _calcular(classe, parametros)
+    # Apenas resultados completos (falhas dos desafios voltam como None ou {'erro': ...})
+    if banco is not None and classe in CLASSES_REGISTRADAS and diretorio is None and hasattr(resultado, 'para_json'):
+        try:
+            banco.registrar(classe, chave, parametros, resultado, gerados)
+        except sqlite3.Error as e:
+            logger.warning("Resultado não registrado no banco: %s", e, extra={"evento": "banco"})
+    return resultado
+
+
+def _calcular(classe, parametros):
+    # O fluxo completo trabalha apenas em memória
+    if classe == 'pipeline':
+        return executar_pipeline(parametros)
+
+    # Desafio 1: núcleo consultado nas tabelas pré-calculadas, sem arquivo intermediário
     if classe == 'desafio1':
         transformador1 = TransformadorMonofasico1()
-        return transformador1.executar_desafio1(arquivo)
-    elif classe == 'desafio2':
-        return executar_desafio2(arquivo)
-    elif classe == 'desafio3':
-        return executar_desafio3(arquivo)
-    elif classe == 'desafio4':
-        return executar_desafio4(arquivo)
-    else:
-        return "Parametros invalidos!!"
+        if not transformador1.carregar_dados(parametros):
+            return None
+        tabela_respostas.calcular_projeto(transformador1)
+        transformador1.gerar_imagem_3d()
+        return transformador1.gerar_resultado()
+
+    # Cada chamada usa seu próprio arquivo, permitindo cálculos simultâneos
+    descritor, arquivo = tempfile.mkstemp(prefix='dados_', suffix='.json')
+    try:
+        with os.fdopen(descritor, 'w') as f:
+            json.dump(parametros, f)
+
+        if classe == 'desafio2':
+            return executar_desafio2(arquivo)
+        elif classe == 'desafio3':
+            return executar_desafio3(arquivo)
+        elif classe == 'desafio4':
+            return executar_desafio4(arquivo)
+        elif classe == 'inrush':
+            return executar_inrush(arquivo)
+        elif classe == 'simulacao_carga':
+            return executar_simulacao_carga(arquivo)
+        elif classe == 'incerteza':
+            return executar_incerteza(arquivo)
+        else:
+            return "Parametros invalidos!!"
+    finally:
+        os.remove(arquivo)
     
 #desafio1
 @app.route('/transformador_3d')
 def visualizar_3d():
-    return send_from_directory(directory=os.getcwd(), path='transformador_3d_interativo.html')
+    return servir_artefato('transformador_3d_interativo.html')
 
 #desafio2
 @app.route('/grafico_magnetizacao')
 def visualizar_grafico_magnetizacao():
-    return send_from_directory(directory=os.getcwd(), path='grafico_magnetizacao.png')
+    return servir_artefato('grafico_magnetizacao.png')
 
 #desafio3
 @app.route('/relatorio')
 def visualizar_relatorio_ensaios():
-    return send_from_directory(directory=os.getcwd(), path='relatorio_ensaios.html')
+    return servir_artefato('relatorio_ensaios.html')
 
 @app.route('/caracteristica_fasorial')
 def visualizar_caracteristica_fasorial():
-    return send_from_directory(directory=os.getcwd(), path='caracteristica_fasorial.html')
+    return servir_artefato('caracteristica_fasorial.html')
 
 #desafio4
 @app.route('/diagrama_fasorial')
 def visualizar_diagrama_fasorial():
-    return send_from_directory(directory=os.getcwd(), path='diagrama_fasorial.html')
+    return servir_artefato('diagrama_fasorial.html')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,205 @@
+# Artefatos gerados (HTML/PNG): variantes pré-comprimidas, ETag e entrega com requisições condicionais
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from contextlib import contextmanager
+
+from flask import request, send_file, abort
+
+try:
+    import brotli  # Compressão Brotli opcional, usada se estiver instalada
+except ImportError:
+    brotli = None
+
+# Tipos que valem a pena comprimir (PNG já é comprimido)
+TIPOS_COMPRIMIVEIS = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+# Variantes na ordem de preferência do servidor: (Content-Encoding, extensão)
+CODIFICACOES = (("br", ".br"), ("gzip", ".gz"))
+
+# Níveis moderados: quase a mesma razão de compressão dos máximos, em uma fração do tempo
+NIVEL_GZIP = 6
+QUALIDADE_BROTLI = 5
+
+# caminho absoluto → (mtime_ns, tamanho, etag, codificações já gravadas para este conteúdo)
+_registro = {}
+_trava = threading.Lock()
+
+# Serializa a compressão: duas requisições pelo mesmo artefato não comprimem em dobro
+_trava_compressao = threading.Lock()
+
+# Artefatos registrados por cada thread dentro de capturar_artefatos
+_captura = threading.local()
+
+# Diretório de saída da thread atual (diretorio_artefatos); sem ele, o diretório atual
+_destino = threading.local()
+
+
+def _comprimivel(mimetype):
+    return mimetype is not None and mimetype.startswith(TIPOS_COMPRIMIVEIS)
+
+
+def _gravar_atomico(caminho, dados):
+    """Grava em um temporário e renomeia, para que nenhum leitor veja um arquivo pela metade"""
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "wb") as f:
+        f.write(dados)
+    os.replace(temporario, caminho)
+
+
+@contextmanager
+def diretorio_artefatos(diretorio):
+    """Artefatos com nome relativo gerados pela thread atual dentro do bloco vão para diretorio"""
+    anterior = getattr(_destino, "diretorio", None)
+    _destino.diretorio = os.path.abspath(diretorio)
+    try:
+        yield _destino.diretorio
+    finally:
+        _destino.diretorio = anterior
+
+
+def caminho_artefato(nome):
+    """Onde gravar o artefato nome: no diretório da thread, se houver (caminhos absolutos não mudam)"""
+    diretorio = getattr(_destino, "diretorio", None)
+    return os.path.join(diretorio, nome) if diretorio else nome
+
+
+def salvar_artefato(nome, escrever):
+    """
+    Grava um artefato sem expor arquivos pela metade: escrever(temporario) gera o conteúdo
+    em um temporário com a mesma extensão, que depois é renomeado para o destino e registrado.
+    Retorna o caminho gravado.
+    """
+    caminho = caminho_artefato(nome)
+    if os.path.dirname(caminho):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    base, extensao = os.path.splitext(caminho)
+    temporario = f"{base}.{os.getpid()}.{threading.get_ident()}.tmp{extensao}"
+    try:
+        escrever(temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return registrar_artefato(caminho)
+
+
+def registrar_artefato(caminho):
+    """
+    Chamado logo após gerar um artefato: calcula o ETag (hash do conteúdo).
+    As variantes .gz/.br não são geradas aqui, fora do caminho do cálculo: a primeira
+    requisição que aceita a codificação as grava (servir_artefato).
+    Retorna o próprio caminho, para uso direto nos pontos de renderização.
+    """
+    absoluto = os.path.abspath(caminho)
+    estado = os.stat(absoluto)
+    with open(absoluto, "rb") as f:
+        etag = hashlib.sha256(f.read()).hexdigest()[:32]
+
+    with _trava:
+        _registro[absoluto] = (estado.st_mtime_ns, estado.st_size, etag, ())
+    capturados = getattr(_captura, "destino", None)
+    if capturados is not None:
+        capturados[absoluto] = etag
+    return caminho
+
+
+def _comprimir(absoluto, codificacao, extensao):
+    """
+    Grava a variante comprimida do conteúdo atual e a marca como disponível.
+    Retorna False se o arquivo mudou no meio do caminho (a variante não é usada).
+    """
+    with _trava_compressao:
+        info = _registro.get(absoluto)
+        if info is not None and codificacao in info[3]:
+            return True
+        with open(absoluto, "rb") as f:
+            dados = f.read()
+        if info is None or hashlib.sha256(dados).hexdigest()[:32] != info[2]:
+            return False
+        if codificacao == "br":
+            comprimido = brotli.compress(dados, quality=QUALIDADE_BROTLI)
+        else:
+            comprimido = gzip.compress(dados, compresslevel=NIVEL_GZIP, mtime=0)
+        _gravar_atomico(absoluto + extensao, comprimido)
+        with _trava:
+            atual = _registro.get(absoluto)
+            # Só vale se ninguém registrou outro conteúdo enquanto comprimia
+            if atual is None or atual[2] != info[2]:
+                return False
+            _registro[absoluto] = atual[:3] + (atual[3] + (codificacao,),)
+        return True
+
+
+@contextmanager
+def capturar_artefatos():
+    """Coleta {caminho absoluto: ETag} dos artefatos gerados pela thread atual dentro do bloco"""
+    anterior = getattr(_captura, "destino", None)
+    _captura.destino = capturados = {}
+    try:
+        yield capturados
+    finally:
+        _captura.destino = anterior
+
+
+def etag_atual(caminho):
+    """ETag do conteúdo atual do arquivo, ou None se ele não existe mais"""
+    try:
+        (_, _, etag, _), _ = _informacoes(os.path.abspath(caminho))
+    except FileNotFoundError:
+        return None
+    return etag
+
+
+def _informacoes(absoluto):
+    """Dados do artefato; registra de novo se o arquivo mudou (ou foi gerado por outro processo)"""
+    estado = os.stat(absoluto)
+    info = _registro.get(absoluto)
+    if info is None or info[:2] != (estado.st_mtime_ns, estado.st_size):
+        registrar_artefato(absoluto)
+        info = _registro[absoluto]
+    return info, estado
+
+
+def servir_artefato(nome, diretorio=None):
+    """
+    Entrega um artefato escolhendo a variante pelo Accept-Encoding. O Flask/Werkzeug
+    responde 304 para If-None-Match/If-Modified-Since e 206 para Range.
+    """
+    absoluto = os.path.abspath(os.path.join(diretorio or os.getcwd(), nome))
+    if not os.path.isfile(absoluto):
+        abort(404)
+    (_, _, etag, disponiveis), estado = _informacoes(absoluto)
+
+    mimetype = mimetypes.guess_type(absoluto)[0] or "application/octet-stream"
+    codificacao, arquivo = None, absoluto
+    if _comprimivel(mimetype):
+        aceitas = request.accept_encodings
+        for candidata, extensao in CODIFICACOES:
+            if not aceitas[candidata] or (candidata == "br" and brotli is None):
+                continue
+            # Variante ainda não gravada para este conteúdo: comprime agora (uma vez)
+            if candidata in disponiveis or _comprimir(absoluto, candidata, extensao):
+                if os.path.isfile(absoluto + extensao):
+                    codificacao, arquivo = candidata, absoluto + extensao
+                    break
+
+    # Cada representação tem seu próprio ETag forte
+    resposta = send_file(
+        arquivo,
+        mimetype=mimetype,
+        conditional=True,
+        etag=f"{etag}-{codificacao}" if codificacao else etag,
+        last_modified=estado.st_mtime,
+        max_age=0
+    )
+    if codificacao and resposta.status_code != 304:
+        resposta.headers["Content-Encoding"] = codificacao
+    if _comprimivel(mimetype):
+        resposta.vary.add("Accept-Encoding")
+    # O mesmo nome é regravado a cada cálculo: o navegador sempre revalida (barato, via 304)
+    resposta.cache_control.no_cache = True
+    return resposta
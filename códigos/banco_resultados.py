@@ -0,0 +1,212 @@
+# Banco de resultados (SQLite): histórico consultável dos projetos e cache de cálculos já realizados
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from artefatos import etag_atual
+from resultados import codificar_json
+
+# Classes cujos resultados são guardados e reaproveitados
+CLASSES_REGISTRADAS = ("desafio1", "desafio3", "desafio4")
+
+
+
+def _versao_calculo():
+    """Hash dos módulos e das tabelas de dados: muda a cada alteração de código ou de catálogo"""
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    resumo = hashlib.sha256()
+    for caminho in sorted(glob.glob(os.path.join(diretorio, "*.py")) + glob.glob(os.path.join(diretorio, "dados", "*"))):
+        resumo.update(os.path.basename(caminho).encode())
+        with open(caminho, "rb") as f:
+            resumo.update(f.read())
+    return resumo.hexdigest()[:16]
+
+
+# Resultados gravados por outra versão do cálculo não são reaproveitados
+VERSAO_CALCULO = _versao_calculo()
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    nome  TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS calculos (
+    chave       TEXT PRIMARY KEY,
+    classe      TEXT NOT NULL,
+    entrada     TEXT NOT NULL,
+    resultado   TEXT NOT NULL,
+    artefatos   TEXT NOT NULL,
+    renderizado INTEGER NOT NULL,
+    criado_em   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_calculos_classe ON calculos (classe, criado_em);
+
+-- Uma linha por projeto do desafio 1, com as colunas usadas nas consultas.
+-- Enrolamentos múltiplos: Vp/Vs guardam a primeira tensão (a lista completa fica em calculos.entrada)
+CREATE TABLE IF NOT EXISTS projetos (
+    chave              TEXT PRIMARY KEY REFERENCES calculos (chave) ON DELETE CASCADE,
+    tipo_transformador TEXT,
+    Vp                 REAL,
+    Vs                 REAL,
+    potencia           REAL,
+    frequencia         REAL,
+    tipo_lamina        TEXT,
+    lamina             INTEGER,
+    viavel             INTEGER,
+    peso_ferro         REAL,
+    peso_cobre         REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_projetos_tensoes ON projetos (Vp, Vs, frequencia, viavel, peso_cobre);
+CREATE INDEX IF NOT EXISTS idx_projetos_potencia ON projetos (potencia);
+CREATE INDEX IF NOT EXISTS idx_projetos_lamina ON projetos (tipo_lamina, lamina);
+CREATE INDEX IF NOT EXISTS idx_projetos_viavel ON projetos (viavel, peso_cobre);
+CREATE INDEX IF NOT EXISTS idx_projetos_peso_ferro ON projetos (peso_ferro);
+"""
+
+# Filtros aceitos em consultar_projetos: igualdade e intervalos (_min/_max)
+FILTROS_IGUALDADE = {
+    "tipo_transformador": str, "Vp": float, "Vs": float, "frequencia": float,
+    "tipo_lamina": str, "lamina": int, "viavel": int,
+}
+FILTROS_INTERVALO = {"potencia": float, "peso_ferro": float, "peso_cobre": float}
+ORDENACOES = ("potencia", "peso_cobre", "peso_ferro", "Vp", "Vs")
+LIMITE_MAXIMO = 1000
+
+
+def _booleano(valor):
+    if isinstance(valor, str):
+        return int(valor.strip().lower() in ("1", "true", "sim", "s"))
+    return int(bool(valor))
+
+
+class BancoResultados:
+    """
+    Cada thread usa sua própria conexão; o modo WAL permite leituras simultâneas
+    a uma escrita, inclusive entre processos (trabalhadores do modo pré-fork e do lote).
+    """
+
+    def __init__(self, caminho="resultados.db", versao=VERSAO_CALCULO):
+        self.caminho = caminho
+        self.versao = versao
+        self._local = threading.local()
+        self.acertos = 0
+        self.faltas = 0
+        self._conexao().executescript(ESQUEMA)
+        self._descartar_versao_anterior()
+
+    def _descartar_versao_anterior(self):
+        """Banco gravado por outra versão do cálculo: os resultados antigos são apagados"""
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            linha = conexao.execute("SELECT valor FROM meta WHERE nome = 'versao'").fetchone()
+            if linha is None or linha["valor"] != self.versao:
+                conexao.execute("DELETE FROM calculos")  # Os projetos saem em cascata
+                conexao.execute("INSERT OR REPLACE INTO meta VALUES ('versao', ?)", (self.versao,))
+
+    def _conexao(self):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None or getattr(self._local, "pid", None) != os.getpid():
+            # Conexões SQLite não podem atravessar um fork: cada processo abre a sua
+            conexao = sqlite3.connect(self.caminho, timeout=10, isolation_level=None)
+            conexao.row_factory = sqlite3.Row
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.execute("PRAGMA foreign_keys=ON")
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+        return conexao
+
+    def buscar(self, chave, renderizar=True):
+        """
+        Resultado guardado para a chave (já decodificado), ou None. Quando há renderização,
+        só vale se os artefatos do cálculo ainda estão em disco sem terem sido regravados
+        por outro cálculo (mesmo ETag); caso contrário é preciso calcular de novo.
+        """
+        linha = self._conexao().execute(
+            "SELECT resultado, artefatos, renderizado FROM calculos WHERE chave = ?", (chave,)).fetchone()
+        if linha is not None and renderizar:
+            if not linha["renderizado"] or any(
+                    etag_atual(caminho) != etag for caminho, etag in json.loads(linha["artefatos"]).items()):
+                linha = None
+        if linha is None:
+            self.faltas += 1
+            return None
+        self.acertos += 1
+        return json.loads(linha["resultado"])
+
+    def registrar(self, classe, chave, parametros, resultado, artefatos=None, renderizado=True):
+        """Guarda (ou substitui) o resultado de um cálculo; projetos do desafio 1 ganham a linha indexada"""
+        resposta = json.loads(codificar_json(resultado))
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            conexao.execute(
+                "INSERT OR REPLACE INTO calculos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (chave, classe, json.dumps(parametros, ensure_ascii=False), json.dumps(resposta, ensure_ascii=False),
+                 json.dumps(artefatos or {}), int(renderizado), time.time()))
+            if classe == "desafio1":
+                conexao.execute("INSERT OR REPLACE INTO projetos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                (chave, *self._colunas_projeto(resposta)))
+
+    @staticmethod
+    def _colunas_projeto(resposta):
+        entrada, saida = resposta["dados_entrada"], resposta["resultados"]
+        return (
+            entrada["tipo_transformador"],
+            entrada["tensao_primaria"][0],
+            entrada["tensao_secundaria"][0],
+            entrada["potencia"],
+            entrada["frequencia"],
+            entrada["tipo_lamina"],
+            saida["nucleo"]["lamina"],
+            int(bool(saida["viabilidade"]["executavel"])),
+            saida["pesos"]["ferro"],
+            saida["pesos"]["cobre"],
+        )
+
+    def consultar_projetos(self, filtros, limite=100, ordem="potencia", completo=False):
+        """
+        Projetos do desafio 1 que atendem aos filtros, por exemplo
+        {"Vp": 120, "Vs": 12, "frequencia": 60, "viavel": 1, "peso_cobre_max": 2}.
+        Com completo=True cada projeto traz também o resultado completo.
+        """
+        condicoes, valores = [], []
+        for nome, valor in filtros.items():
+            if nome in FILTROS_IGUALDADE:
+                tipo = FILTROS_IGUALDADE[nome]
+                condicoes.append(f"p.{nome} = ?")
+                valores.append(_booleano(valor) if nome == "viavel" else tipo(valor))
+            elif nome.endswith(("_min", "_max")) and nome[:-4] in FILTROS_INTERVALO:
+                condicoes.append(f"p.{nome[:-4]} {'>=' if nome.endswith('_min') else '<='} ?")
+                valores.append(FILTROS_INTERVALO[nome[:-4]](valor))
+            else:
+                raise ValueError(f"Filtro desconhecido: '{nome}'")
+        if ordem.lstrip("-") not in ORDENACOES:
+            raise ValueError(f"Ordenação deve ser uma das: {', '.join(ORDENACOES)} (prefixo '-' para decrescente)")
+
+        sql = "SELECT p.*" + (", c.resultado" if completo else "") + " FROM projetos p"
+        if completo:
+            sql += " JOIN calculos c USING (chave)"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += f" ORDER BY p.{ordem.lstrip('-')}{' DESC' if ordem.startswith('-') else ''} LIMIT ?"
+        valores.append(max(1, min(int(limite), LIMITE_MAXIMO)))
+
+        projetos = []
+        for linha in self._conexao().execute(sql, valores):
+            projeto = dict(linha)
+            projeto["viavel"] = bool(projeto["viavel"])
+            if completo:
+                projeto["resultado"] = json.loads(projeto["resultado"])
+            projetos.append(projeto)
+        return projetos
+
+    def estatisticas(self):
+        contagem = dict(self._conexao().execute("SELECT classe, COUNT(*) FROM calculos GROUP BY classe").fetchall())
+        return {"calculos": contagem, "acertos": self.acertos, "faltas": self.faltas, "versao": self.versao}
@@ -0,0 +1,176 @@
+# Benchmark de memória: pico, memória retida e vazamento por desafio e tamanho de entrada, com orçamentos
+import argparse
+import gc
+import json
+import os
+import re
+import sys
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+import memoria
+from esquemas import validar
+from processar_lote import calcular
+from servidor import rss_mb
+
+TIPO = "Transformador de um primário e um secundário"
+
+# (nome, classe, parâmetros, renderizar): o nome indica o tamanho da entrada
+CASOS = (
+    ("desafio1.calculo", "desafio1",
+     {"tipo_transformador": TIPO, "Vp": [120], "Vs": [12], "Potencia": 300, "tipo_lamina": "Padronizada", "frequencia": 60}, False),
+    ("desafio1.3d.300VA", "desafio1",
+     {"tipo_transformador": TIPO, "Vp": [120], "Vs": [12], "Potencia": 300, "tipo_lamina": "Padronizada", "frequencia": 60}, True),
+    ("desafio1.3d.5kVA", "desafio1",
+     {"tipo_transformador": TIPO, "Vp": [220], "Vs": [110], "Potencia": 5000, "tipo_lamina": "Padronizada", "frequencia": 60}, True),
+    ("desafio2.padrao", "desafio2", {"tempo_max": 0.34, "passo": 1 / 3000}, True),
+    ("desafio2.2s.20kHz", "desafio2", {"tempo_max": 2.0, "passo": 1 / 20000}, True),
+    ("desafio2.10s.50kHz", "desafio2", {"tempo_max": 10.0, "passo": 1 / 50000}, True),
+    ("desafio2.10s.50kHz.sem_grafico", "desafio2", {"tempo_max": 10.0, "passo": 1 / 50000}, False),
+    ("desafio3.relatorio", "desafio3", {}, True),
+    ("desafio4.ponto", "desafio4",
+     {"V2": 240, "I2": 10, "R_eq": 1.0, "X_eq": 1.0, "cos_phi": 0.8, "tipo_fp": "atrasado"}, True),
+    ("desafio4.sequencia.200", "desafio4",
+     {"V2": 240, "I2": list(np.linspace(0, 20, 200)), "R_eq": 1.0, "X_eq": 1.0, "cos_phi": 0.8, "tipo_fp": "atrasado"}, True),
+    ("inrush.padrao", "inrush", {}, False),
+    ("simulacao_carga.1000", "simulacao_carga",
+     {"potencia": list(np.linspace(0, 2000, 1000)), "formas_de_onda": True}, False),
+    ("incerteza.1e5", "incerteza", {"amostras": 100_000, "processos": 1}, False),
+    ("incerteza.1e6", "incerteza", {"amostras": 1_000_000, "processos": 1}, False),
+    ("pipeline.completo", "pipeline",
+     {"projeto": {"tipo_transformador": TIPO, "Vp": [120], "Vs": [12], "Potencia": 300,
+                  "tipo_lamina": "Padronizada", "frequencia": 60}, "renderizar": True}, True),
+)
+
+# Classes que usam uma curva de magnetização ('--material' escolhe a curva)
+CLASSES_COM_CURVA = ("desafio2", "inrush", "simulacao_carga")
+
+# Orçamentos (MB para pico e retido, KB por chamada para vazamento); "*" vale para os demais casos.
+# O padrão mais específico (prefixo mais longo do nome) prevalece.
+ORCAMENTOS_PADRAO = {
+    "*": {"pico_mb": 64, "retido_mb": 8, "vazamento_kb": 64},
+    "desafio2.10s": {"pico_mb": 256},
+    "desafio4.sequencia": {"pico_mb": 128},
+    "incerteza.1e6": {"pico_mb": 256},
+}
+
+
+def orcamento(nome, orcamentos):
+    """Limites do caso: '*' sobreposto pelos prefixos do nome, do mais curto ao mais longo"""
+    limites = dict(orcamentos.get("*", {}))
+    for prefixo in sorted((p for p in orcamentos if p != "*" and nome.startswith(p)), key=len):
+        limites.update(orcamentos[prefixo])
+    return limites
+
+
+def _memoria_atual():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def medir_caso(classe, parametros, renderizar, repeticoes=5):
+    """
+    Uma chamada de aquecimento (importações, caches, tabelas) fora da medição; depois:
+    - pico: maior memória acima do início durante a primeira chamada medida
+    - retido: memória que continua alocada após a chamada (e após a coleta de lixo)
+    - vazamento: crescimento da memória retida por chamada nas repetições seguintes
+      (inclinação da reta ajustada), que deve ser ~0 sem vazamento
+    """
+    calcular(classe, parametros, renderizar)
+
+    inicio = _memoria_atual()
+    rss_inicio = rss_mb()
+    tracemalloc.reset_peak()
+    resultado = calcular(classe, parametros, renderizar)
+    pico = tracemalloc.get_traced_memory()[1] - inicio
+    del resultado
+    apos = [_memoria_atual()]
+    for _ in range(max(repeticoes - 1, 0)):
+        resultado = calcular(classe, parametros, renderizar)
+        del resultado
+        apos.append(_memoria_atual())
+
+    vazamento = float(np.polyfit(np.arange(len(apos)), apos, 1)[0]) if len(apos) > 2 else 0.0
+    return {
+        "pico_mb": round(pico / 2 ** 20, 2),
+        "retido_mb": round((apos[0] - inicio) / 2 ** 20, 3),
+        "vazamento_kb": round(vazamento / 1024, 2),
+        "rss_mb": round(rss_mb() - rss_inicio, 1),
+    }
+
+
+def executar(filtro=None, repeticoes=5, orcamentos=None, material=None, quadros=1):
+    """Mede os casos selecionados; cada um recebe status 'ok', 'excedido' ou 'erro'"""
+    orcamentos = orcamentos or ORCAMENTOS_PADRAO
+    memoria.ativar(quadros)
+    resultados = []
+    for nome, classe, parametros, renderizar in CASOS:
+        if filtro and not re.search(filtro, nome):
+            continue
+        if material and classe in CLASSES_COM_CURVA:
+            parametros = {**parametros, "material": material}
+        linha = {"caso": nome, "classe": classe}
+        try:
+            linha.update(medir_caso(classe, validar(classe, parametros), renderizar, repeticoes))
+        except Exception as e:
+            linha.update(status="erro", erro=f"{type(e).__name__}: {e}")
+            resultados.append(linha)
+            continue
+        limites = orcamento(nome, orcamentos)
+        excedidos = [medida for medida, limite in limites.items() if linha.get(medida, 0) > limite]
+        linha.update(status="excedido" if excedidos else "ok", excedidos=excedidos, orcamento=limites)
+        resultados.append(linha)
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de memória por desafio (tracemalloc)")
+    parser.add_argument("-k", "--casos", help="expressão regular sobre o nome dos casos")
+    parser.add_argument("-r", "--repeticoes", type=int, default=5,
+                        help="chamadas medidas por caso (a partir de 3 detecta vazamentos)")
+    parser.add_argument("--orcamentos", help="JSON {prefixo do caso ou '*': {pico_mb, retido_mb, vazamento_kb}}")
+    parser.add_argument("--material", help="curva usada nos casos de desafio2, inrush e simulacao_carga")
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    parser.add_argument("--listar", action="store_true", help="lista os casos e sai")
+    args = parser.parse_args(argv)
+
+    if args.listar:
+        for nome, classe, _, renderizar in CASOS:
+            print(f"{nome:34} {classe:16} {'com' if renderizar else 'sem'} renderização")
+        return 0
+
+    orcamentos = ORCAMENTOS_PADRAO
+    if args.orcamentos:
+        with open(args.orcamentos) as f:
+            orcamentos = json.load(f)
+
+    # Os arquivos gerados pelas renderizações ficam num diretório temporário
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="benchmark_memoria_") as diretorio:
+        os.chdir(diretorio)
+        try:
+            resultados = executar(args.casos, args.repeticoes, orcamentos, args.material)
+        finally:
+            os.chdir(diretorio_original)
+
+    print(f"{'caso':34} {'pico MB':>9} {'retido MB':>10} {'vaz. KB/ch':>11} {'RSS MB':>8}  status")
+    for linha in resultados:
+        if linha["status"] == "erro":
+            print(f"{linha['caso']:34} {'':>9} {'':>10} {'':>11} {'':>8}  erro: {linha['erro']}")
+            continue
+        status = linha["status"] + (f" ({', '.join(linha['excedidos'])})" if linha["excedidos"] else "")
+        print(f"{linha['caso']:34} {linha['pico_mb']:9.2f} {linha['retido_mb']:10.3f} "
+              f"{linha['vazamento_kb']:11.2f} {linha['rss_mb']:8.1f}  {status}")
+
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+    # Orçamento excedido ou caso com erro reprova a execução
+    return 1 if any(linha["status"] != "ok" for linha in resultados) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
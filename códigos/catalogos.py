@@ -0,0 +1,130 @@
+# Catálogos de referência (fios e lâminas) compartilhados por todas as instâncias
+import json
+import os
+from bisect import bisect_left
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Tuple
+
+# Diretório padrão com os arquivos de catálogo (*.json)
+DIRETORIO_DADOS = Path(__file__).resolve().parent / "dados"
+
+# Diretórios extras (ex.: catálogos de fornecedores), separados por os.pathsep
+VARIAVEL_DIRETORIOS = "TRANSFORMADOR_CATALOGOS"
+
+
+class CatalogoFios:
+    """
+    Tabela imutável de fios ordenada por área, com busca binária.
+
+    Cada entrada é um mapeamento somente leitura com ao menos a chave 'area_mm2'.
+    """
+    __slots__ = ("nome", "descricao", "entradas", "_areas")
+
+    def __init__(self, nome: str, entradas, descricao: str = ""):
+        if not entradas:
+            raise ValueError(f"Catálogo de fios '{nome}' está vazio")
+        ordenadas = sorted(entradas, key=lambda fio: fio["area_mm2"])
+        self.nome = nome
+        self.descricao = descricao
+        self.entradas: Tuple[MappingProxyType, ...] = tuple(MappingProxyType(dict(f)) for f in ordenadas)
+        self._areas: Tuple[float, ...] = tuple(f["area_mm2"] for f in self.entradas)
+
+    def por_secao(self, secao_mm2: float) -> MappingProxyType:
+        """Menor fio com área >= secao_mm2 (ou o maior disponível) em O(log n)"""
+        i = bisect_left(self._areas, secao_mm2)
+        return self.entradas[i] if i < len(self.entradas) else self.entradas[-1]
+
+
+class CatalogoLaminas:
+    """
+    Conjunto imutável de lâminas agrupadas por tipo ('Padronizada', 'Comprida', ...),
+    cada grupo ordenado pela largura da coluna central (a_cm).
+    """
+    __slots__ = ("nome", "descricao", "_grupos", "_larguras")
+
+    def __init__(self, nome: str, grupos: Dict[str, list], descricao: str = ""):
+        if not grupos:
+            raise ValueError(f"Catálogo de lâminas '{nome}' não possui nenhum tipo de lâmina")
+        self.nome = nome
+        self.descricao = descricao
+        self._grupos = {}
+        self._larguras = {}
+        for tipo, laminas in grupos.items():
+            if not laminas:
+                raise ValueError(f"Tipo de lâmina '{tipo}' vazio no catálogo '{nome}'")
+            ordenadas = sorted(laminas, key=lambda lamina: lamina["a_cm"])
+            self._grupos[tipo] = tuple(MappingProxyType(dict(l)) for l in ordenadas)
+            self._larguras[tipo] = tuple(l["a_cm"] for l in self._grupos[tipo])
+        self._grupos = MappingProxyType(self._grupos)
+        self._larguras = MappingProxyType(self._larguras)
+
+    @property
+    def tipos(self) -> Tuple[str, ...]:
+        return tuple(self._grupos)
+
+    def laminas(self, tipo: str) -> Tuple[MappingProxyType, ...]:
+        return self._grupos[tipo]
+
+    def por_largura(self, tipo: str, a_cm: float) -> MappingProxyType:
+        """Menor lâmina do tipo com a_cm >= largura pedida (ou a maior disponível) em O(log n)"""
+        laminas = self._grupos[tipo]
+        i = bisect_left(self._larguras[tipo], a_cm)
+        return laminas[i] if i < len(laminas) else laminas[-1]
+
+
+def _diretorios_catalogo():
+    diretorios = [DIRETORIO_DADOS]
+    extras = os.environ.get(VARIAVEL_DIRETORIOS, "")
+    diretorios += [Path(d) for d in extras.split(os.pathsep) if d]
+    return diretorios
+
+
+def _carregar_catalogos():
+    """Lê uma única vez todos os arquivos de catálogo e monta os registros imutáveis"""
+    fios, laminas = {}, {}
+    for diretorio in _diretorios_catalogo():
+        if not diretorio.is_dir():
+            continue
+        for arquivo in sorted(diretorio.glob("*.json")):
+            with open(arquivo, encoding="utf-8") as f:
+                dados = json.load(f)
+            tipo = dados.get("tipo")
+            nome = dados.get("nome", arquivo.stem)
+            descricao = dados.get("descricao", "")
+            if tipo == "fios":
+                fios[nome] = CatalogoFios(nome, dados["entradas"], descricao)
+            elif tipo == "laminas":
+                grupos = {k: v for k, v in dados.items() if isinstance(v, list)}
+                laminas[nome] = CatalogoLaminas(nome, grupos, descricao)
+    return MappingProxyType(fios), MappingProxyType(laminas)
+
+
+CATALOGOS_FIOS, CATALOGOS_LAMINAS = _carregar_catalogos()
+
+CATALOGO_FIOS_PADRAO = "AWG"
+CATALOGO_LAMINAS_PADRAO = "padrao"
+
+
+def catalogo_fios(nome: str = None) -> CatalogoFios:
+    """Retorna o catálogo de fios pelo nome (sem recarregar arquivos)"""
+    nome = nome or CATALOGO_FIOS_PADRAO
+    if nome not in CATALOGOS_FIOS:
+        raise ValueError(f"Catálogo de fios '{nome}' desconhecido. Disponíveis: {', '.join(CATALOGOS_FIOS)}")
+    return CATALOGOS_FIOS[nome]
+
+
+def catalogo_laminas(nome: str = None) -> CatalogoLaminas:
+    """Retorna o catálogo de lâminas pelo nome (sem recarregar arquivos)"""
+    nome = nome or CATALOGO_LAMINAS_PADRAO
+    if nome not in CATALOGOS_LAMINAS:
+        raise ValueError(f"Catálogo de lâminas '{nome}' desconhecido. Disponíveis: {', '.join(CATALOGOS_LAMINAS)}")
+    return CATALOGOS_LAMINAS[nome]
+
+
+def listar_catalogos() -> Dict[str, Dict[str, str]]:
+    """Nomes e descrições dos catálogos disponíveis"""
+    return {
+        "fios": {nome: c.descricao for nome, c in CATALOGOS_FIOS.items()},
+        "laminas": {nome: c.descricao for nome, c in CATALOGOS_LAMINAS.items()},
+    }
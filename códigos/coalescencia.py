@@ -0,0 +1,63 @@
+# Coalescência de cálculos idênticos simultâneos: um único cálculo em andamento por chave
+import json
+import threading
+import time
+from concurrent import futures
+from concurrent.futures import Future
+
+
+def chave_canonica(classe, parametros) -> str:
+    """Chave independente da ordem dos campos, usada para reconhecer entradas idênticas"""
+    return json.dumps([classe, parametros], sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ExecucaoCompartilhada:
+    """
+    A primeira requisição de uma chave executa o cálculo; as que chegam enquanto ele
+    está em andamento aguardam o mesmo resultado (ou o mesmo erro).
+
+    - Ao terminar, a chave é liberada: requisições posteriores calculam de novo, então
+      uma falha nunca fica guardada para as próximas.
+    - Quem aguarda desiste após tempo_limite (TimeoutError); um cálculo que passou desse
+      tempo deixa de receber novas requisições, que iniciam um cálculo próprio.
+    """
+
+    def __init__(self, tempo_limite=None):
+        self.tempo_limite = tempo_limite
+        self._em_andamento = {}  # chave → (Future, instante de início)
+        self._trava = threading.Lock()
+        self.compartilhadas = 0  # Requisições atendidas por um cálculo de outra requisição
+
+    def executar(self, chave, funcao, *args):
+        agora = time.monotonic()
+        with self._trava:
+            atual = self._em_andamento.get(chave)
+            if atual is not None and (self.tempo_limite is None or agora - atual[1] < self.tempo_limite):
+                futuro, inicio = atual
+                self.compartilhadas += 1
+                lider = False
+            else:
+                futuro, inicio = Future(), agora
+                self._em_andamento[chave] = (futuro, inicio)
+                lider = True
+
+        if not lider:
+            restante = None if self.tempo_limite is None else max(self.tempo_limite - (agora - inicio), 0)
+            try:
+                return futuro.result(timeout=restante)
+            except futures.TimeoutError:  # Igual ao TimeoutError embutido a partir do Python 3.11
+                raise TimeoutError("Tempo limite excedido aguardando um cálculo idêntico em andamento") from None
+
+        try:
+            resultado = funcao(*args)
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado
+        finally:
+            with self._trava:
+                # Só remove a própria entrada (pode ter sido substituída após o tempo limite)
+                if self._em_andamento.get(chave, (None,))[0] is futuro:
+                    del self._em_andamento[chave]
@@ -1,5 +1,6 @@
 import math
 import json
+import logging
 import numpy as np
 import plotly.graph_objects as go
 import base64
@@ -11,10 +12,86 @@ from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 from io import BytesIO
 from PIL import Image
 
+import catalogos
+import memoria
+from artefatos import salvar_artefato
+from modelos_figura import ModeloFigura
+from resultados import ResultadoDesafio1
+
+logger = logging.getLogger(__name__)
+
+
+# Faces do paralelepípedo (quads convertidos em dois triângulos cada) e arestas, por índice de vértice
+FACES_BLOCO = [[0, 1, 2, 3], [4, 5, 6, 7], [0, 1, 5, 4],
+               [3, 2, 6, 7], [0, 3, 7, 4], [1, 2, 6, 5]]
+ARESTAS_BLOCO = np.array([(0,1),(1,2),(2,3),(3,0),(4,5),(5,6),(6,7),(7,4),
+                          (0,4),(1,5),(2,6),(3,7)])
+
+# Estrutura da visualização 3D: 5 blocos do núcleo (malha + bordas), 2 enrolamentos e,
+# na variante com rótulos, os textos Np e Ns. As coordenadas são trocadas a cada chamada.
+def _estrutura_imagem_3d(com_rotulos):
+    fig = go.Figure()
+    i_tri, j_tri, k_tri = [], [], []
+    for face in FACES_BLOCO:
+        i_tri += [face[0], face[0]]
+        j_tri += [face[1], face[2]]
+        k_tri += [face[2], face[3]]
+
+    # Blocos 3D (núcleo): superfície e bordas em preto
+    for _ in range(5):
+        fig.add_trace(go.Mesh3d(
+            x=[0] * 8, y=[0] * 8, z=[0] * 8, i=i_tri, j=j_tri, k=k_tri,
+            color='rgb(160,160,170)', opacity=0.65, flatshading=True, alphahull=0
+        ))
+        fig.add_trace(go.Scatter3d(
+            x=[0], y=[0], z=[0], mode='lines',
+            line=dict(color='black', width=2), showlegend=False
+        ))
+
+    # Espiras helicoidais para representar os enrolamentos
+    for cor, nome in (('brown', 'Primário'), ('gold', 'Secundário')):
+        fig.add_trace(go.Scatter3d(
+            x=[0], y=[0], z=[0],
+            mode='lines', line=dict(color=cor, width=4), name=nome
+        ))
+
+    if com_rotulos:
+        for cor in ('brown', 'goldenrod'):
+            fig.add_trace(go.Scatter3d(
+                x=[0], y=[0], z=[0],
+                mode='text',
+                text=[""],
+                showlegend=False,
+                textfont=dict(size=20, color=cor)
+            ))
 
+    # === Configuração do layout e da câmera ===
+    fig.update_layout(
+        scene=dict(
+            xaxis_title='X', yaxis_title='Y', zaxis_title='Z',
+            aspectmode='data',
+            bgcolor='white',
+            camera=dict(eye=dict(x=-2.0, y=-2.0, z=1.5)),  # Câmera olhando na direção oposta do eixo X
+            xaxis_showspikes=False, yaxis_showspikes=False, zaxis_showspikes=False
+        ),
+        width=1000, height=800,
+        margin=dict(l=0, r=0, b=0, t=40),
+        title="Transformador Monofásico 3D"
+    )
+    return fig
+
+MODELO_3D = ModeloFigura(_estrutura_imagem_3d)
 
 class TransformadorMonofasico1:
-    def __init__(self):
+    # Lista de tipos válidos
+    tipos_validos = (
+        "Transformador de um primário e um secundário",
+        "Transformador de dois primários e um secundário",
+        "Transformador de um primário e dois secundários",
+        "Transformador de dois primários e dois secundários"
+    )
+
+    def __init__(self, catalogo_fios: str = None, catalogo_laminas: str = None):
         # Dados de entrada
         self.tipo_transformador: str = None
         self.Vp: List[float] = None      # Tensões primárias (V)
@@ -35,57 +112,45 @@ class TransformadorMonofasico1:
         self.Sm: float = None           # Seção magnética do núcleo (cm²)
         self.Sg: float = None           # Seção geométrica do núcleo (cm²)
         self.dimensoes_nucleo: Tuple[float, float] = None  # Dimensões do núcleo (a x b)
+        self.espiras_por_volt: float = None  # Espiras por volt do núcleo escolhido
         self.peso_ferro: float = None   # Peso do ferro (kg)
         self.peso_cobre: float = None   # Peso do cobre (kg)
         self.viabilidade: bool = None   # Se o transformador é viável
         self.mensagem_viabilidade: str = None  # Mensagem sobre viabilidade
         
-        # Lista de tipos válidos
-        self.tipos_validos = [
-            "Transformador de um primário e um secundário",
-            "Transformador de dois primários e um secundário",
-            "Transformador de um primário e dois secundários",
-            "Transformador de dois primários e dois secundários"
-        ]
-        
-        # Tabelas de referência
-        self.laminas_padronizadas = [
-            {"numero": 0, "a_cm": 1.5, "secao_mm2": 168, "peso_kgcm": 0.095},
-            {"numero": 1, "a_cm": 2, "secao_mm2": 300, "peso_kgcm": 0.170},
-            {"numero": 2, "a_cm": 2.5, "secao_mm2": 468, "peso_kgcm": 0.273},
-            {"numero": 3, "a_cm": 3, "secao_mm2": 675, "peso_kgcm": 0.380},
-            {"numero": 4, "a_cm": 3.5, "secao_mm2": 900, "peso_kgcm": 0.516},
-            {"numero": 5, "a_cm": 4, "secao_mm2": 1200, "peso_kgcm": 0.674},
-            {"numero": 6, "a_cm": 5, "secao_mm2": 1880, "peso_kgcm": 1.053}
-        ]
-        
-        self.laminas_compridas = [
-            {"numero": 5, "a_cm": 4, "secao_mm2": 2400, "peso_kgcm": 1.000},
-            {"numero": 6, "a_cm": 5, "secao_mm2": 3750, "peso_kgcm": 1.580}
-        ]
-        
-        self.awg_table = [
-            {"AWG": 25, "area_mm2": 0.162}, {"AWG": 24, "area_mm2": 0.205},
-            {"AWG": 23, "area_mm2": 0.258}, {"AWG": 22, "area_mm2": 0.326},
-            {"AWG": 21, "area_mm2": 0.410}, {"AWG": 20, "area_mm2": 0.518},
-            {"AWG": 19, "area_mm2": 0.653}, {"AWG": 18, "area_mm2": 0.823},
-            {"AWG": 17, "area_mm2": 1.04}, {"AWG": 16, "area_mm2": 1.31},
-            {"AWG": 15, "area_mm2": 1.65}, {"AWG": 14, "area_mm2": 2.08},
-            {"AWG": 13, "area_mm2": 2.62}, {"AWG": 12, "area_mm2": 3.31},
-            {"AWG": 11, "area_mm2": 4.17}, {"AWG": 10, "area_mm2": 5.26},
-            {"AWG": 9, "area_mm2": 6.63}, {"AWG": 8, "area_mm2": 8.37},
-            {"AWG": 7, "area_mm2": 10.55}, {"AWG": 6, "area_mm2": 13.30},
-            {"AWG": 5, "area_mm2": 16.80}, {"AWG": 4, "area_mm2": 21.15},
-            {"AWG": 3, "area_mm2": 26.67}, {"AWG": 2, "area_mm2": 33.62},
-            {"AWG": 1, "area_mm2": 42.41}, {"AWG": 0, "area_mm2": 53.49},
-        ]
+        # Catálogos de fios e lâminas (compartilhados entre instâncias, sem cópia)
+        self.catalogo_fios = catalogos.catalogo_fios(catalogo_fios)
+        self.catalogo_laminas = catalogos.catalogo_laminas(catalogo_laminas)
+    
+    @property
+    def awg_table(self):
+        return self.catalogo_fios.entradas
+
+    @property
+    def laminas_padronizadas(self):
+        return self.catalogo_laminas.laminas("Padronizada")
+
+    @property
+    def laminas_compridas(self):
+        return self.catalogo_laminas.laminas("Comprida")
     
     def carregar_dados_entrada(self, arquivo_json: str) -> bool:
         """Carrega os dados de entrada de um arquivo JSON com validações adicionais"""
         try:
             with open(arquivo_json, 'r') as f:
                 dados = json.load(f)
-            
+        except FileNotFoundError:
+            logger.error("Arquivo '%s' não encontrado", arquivo_json)
+            return False
+        except json.JSONDecodeError:
+            logger.error("Arquivo JSON mal formatado: %s", arquivo_json)
+            return False
+
+        return self.carregar_dados(dados)
+
+    def carregar_dados(self, dados: Dict) -> bool:
+        """Carrega e valida os dados de entrada a partir de um dicionário já em memória"""
+        try:
             # Validar dados obrigatórios
             campos_obrigatorios = ['tipo_transformador', 'Vp', 'Vs', 'Potencia', 'tipo_lamina']
             for campo in campos_obrigatorios:
@@ -127,28 +192,28 @@ class TransformadorMonofasico1:
             if self.Potencia <= 0:
                 raise ValueError("Potência deve ser maior que zero")
             
+            # Catálogos podem ser escolhidos por requisição
+            if 'catalogo_fios' in dados:
+                self.catalogo_fios = catalogos.catalogo_fios(dados['catalogo_fios'])
+            if 'catalogo_laminas' in dados:
+                self.catalogo_laminas = catalogos.catalogo_laminas(dados['catalogo_laminas'])
+
             self.tipo_lamina = dados['tipo_lamina']
-            if self.tipo_lamina not in ["Padronizada", "Comprida"]:
-                raise ValueError("Tipo de lâmina deve ser 'Padronizada' ou 'Comprida'")
+            if self.tipo_lamina not in self.catalogo_laminas.tipos:
+                raise ValueError(f"Tipo de lâmina deve ser um dos: {', '.join(self.catalogo_laminas.tipos)}")
             
             # Frequência é opcional (padrão 50Hz)
             self.frequencia = int(dados.get('frequencia', 50))
             if self.frequencia not in [50, 60]:
-                print("Aviso: Frequência diferente de 50Hz ou 60Hz. Cálculos podem não ser precisos.")
+                logger.warning("Frequência diferente de 50Hz ou 60Hz. Cálculos podem não ser precisos.")
             
             return True
         
-        except FileNotFoundError:
-            print(f"Erro: Arquivo '{arquivo_json}' não encontrado.")
-            return False
-        except json.JSONDecodeError:
-            print("Erro: Arquivo JSON mal formatado.")
-            return False
         except ValueError as e:
-            print(f"Erro nos dados de entrada: {str(e)}")
+            logger.warning("Erro nos dados de entrada: %s", e)
             return False
         except Exception as e:
-            print(f"Erro inesperado: {str(e)}")
+            logger.exception("Erro inesperado: %s", e)
             return False
     
     def calcular_correntes_e_secao(self):
@@ -179,14 +244,11 @@ class TransformadorMonofasico1:
         self.bitola_secundario = [self._encontrar_awg_por_secao(s) for s in secao_secundario]
     
     def _encontrar_awg_por_secao(self, secao_mm2: float) -> Dict:
-        """Encontra o fio AWG mais adequado para uma dada seção"""
-        for fio in self.awg_table:
-            if fio["area_mm2"] >= secao_mm2:
-                return fio
-        return self.awg_table[-1]  # Retorna o maior disponível se não encontrar
+        """Encontra o fio mais adequado para uma dada seção (o maior disponível se nenhum atender)"""
+        return self.catalogo_fios.por_secao(secao_mm2)
     
-    def calcular_espiras(self):
-        """Calcula o número de espiras para primário e secundário"""
+    def secao_magnetica_estimada(self) -> float:
+        """Seção magnética do núcleo pela potência (cm²), antes do ajuste à lâmina do catálogo"""
         # Fator baseado no tipo de transformador (atualizado para todos os casos)
         fator_tipo = {
             "Transformador de um primário e um secundário": 1,
@@ -198,8 +260,12 @@ class TransformadorMonofasico1:
         # Coeficiente baseado no tipo de lâmina
         coef = 7.5 if self.tipo_lamina == "Padronizada" else 6
         
+        return round(coef * math.sqrt((fator_tipo * self.Potencia) / self.frequencia), 1)
+
+    def calcular_nucleo(self):
+        """Seleciona a lâmina, dimensiona o núcleo e calcula as espiras por volt"""
         # Seção magnética do núcleo
-        self.Sm = round(coef * math.sqrt((fator_tipo * self.Potencia) / self.frequencia), 1)
+        self.Sm = self.secao_magnetica_estimada()
         
         # Seção geométrica do núcleo (10% maior que Sm)
         self.Sg = round(self.Sm * 1.1, 1)
@@ -209,13 +275,7 @@ class TransformadorMonofasico1:
         b = round(self.Sg / a)             # Comprimento do pacote laminado
         
         # Selecionar lâmina mais adequada
-        laminas = self.laminas_padronizadas if self.tipo_lamina == "Padronizada" else self.laminas_compridas
-        for lamina in laminas:
-            if a <= lamina["a_cm"]:
-                self.lamina_selecionada = lamina
-                break
-        else:
-            self.lamina_selecionada = laminas[-1]
+        self.lamina_selecionada = self.catalogo_laminas.por_largura(self.tipo_lamina, a)
         
         # Ajustar dimensões reais baseado na lâmina selecionada
         a = self.lamina_selecionada["a_cm"]
@@ -227,15 +287,21 @@ class TransformadorMonofasico1:
         
         # Espiras por volt
         if self.frequencia == 50:
-            esp_por_volt = round(40 / self.Sm, 2)
+            self.espiras_por_volt = round(40 / self.Sm, 2)
         elif self.frequencia == 60:
-            esp_por_volt = round(33.5 / self.Sm, 2)
+            self.espiras_por_volt = round(33.5 / self.Sm, 2)
         else:
-            esp_por_volt = round((1e8 / (4.44 * 11300 * self.frequencia)) / self.Sm, 2)
-        
-        # Número de espiras
-        self.Np = [math.ceil(esp_por_volt * v) for v in self.Vp]
-        self.Ns = [math.ceil(esp_por_volt * v * 1.1) for v in self.Vs]  # +10% para compensar perdas
+            self.espiras_por_volt = round((1e8 / (4.44 * 11300 * self.frequencia)) / self.Sm, 2)
+
+    def calcular_enrolamentos(self):
+        """Número de espiras de cada enrolamento a partir das espiras por volt"""
+        self.Np = [math.ceil(self.espiras_por_volt * v) for v in self.Vp]
+        self.Ns = [math.ceil(self.espiras_por_volt * v * 1.1) for v in self.Vs]  # +10% para compensar perdas
+
+    def calcular_espiras(self):
+        """Calcula o número de espiras para primário e secundário"""
+        self.calcular_nucleo()
+        self.calcular_enrolamentos()
     
     def verificar_viabilidade(self):
         """Verifica se o transformador é viável (relação Sj/Scu >= 3)"""
@@ -288,11 +354,9 @@ class TransformadorMonofasico1:
         # Peso do cobre (considerando densidade do cobre = 9g/cm³)
         self.peso_cobre = (Scu / 100 * lm * 9) / 1000  # em kg
     
-    def gerar_imagem_3d(self, angle_rad=0) -> str:
+    @memoria.medir("desafio1.imagem_3d")
+    def gerar_imagem_3d(self, angle_rad=0, html_path="transformador_3d_interativo.html") -> str:
         """Gera visualização 3D do transformador e salva em HTML interativo"""
-        import plotly.graph_objects as go
-        import numpy as np
-        import os
 
         # Cria os 8 vértices de um paralelepípedo a partir da posição (x, y, z) e das dimensões (dx, dy, dz)
         def criar_secoes(x, y, z, dx, dy, dz):
@@ -302,60 +366,16 @@ class TransformadorMonofasico1:
             ])
 
         # Aplica rotação 3D em torno do eixo Z
-        def rotacionar(vertices, angle):
-            R = np.array([
-                [np.cos(angle), -np.sin(angle), 0],
-                [np.sin(angle),  np.cos(angle), 0],
-                [0, 0, 1]
-            ])
+        R = np.array([
+            [np.cos(angle_rad), -np.sin(angle_rad), 0],
+            [np.sin(angle_rad),  np.cos(angle_rad), 0],
+            [0, 0, 1]
+        ])
+        def rotacionar(vertices):
             return vertices @ R.T
 
-        # Adiciona um bloco 3D (núcleo ou bobina) ao gráfico
-        def plot_bloco(fig, vertices, color='gray', opacity=0.6):
-            # Extrai coordenadas dos vértices
-            vx, vy, vz = vertices[:, 0], vertices[:, 1], vertices[:, 2]
-            # Define faces do paralelepípedo (em quads, convertidas para triângulos)
-            faces_quad = [[0, 1, 2, 3], [4, 5, 6, 7], [0, 1, 5, 4],
-                        [3, 2, 6, 7], [0, 3, 7, 4], [1, 2, 6, 5]]
-            i_tri, j_tri, k_tri = [], [], []
-            for face in faces_quad:
-                i_tri += [face[0], face[0]]
-                j_tri += [face[1], face[2]]
-                k_tri += [face[2], face[3]]
-            # Adiciona a malha (superfície 3D)
-            fig.add_trace(go.Mesh3d(
-                x=vx, y=vy, z=vz, i=i_tri, j=j_tri, k=k_tri,
-                color=color, opacity=opacity, flatshading=True, alphahull=0
-            ))
-            # Adiciona as bordas do bloco como linhas pretas
-            edges = [(0,1),(1,2),(2,3),(3,0),(4,5),(5,6),(6,7),(7,4),
-                    (0,4),(1,5),(2,6),(3,7)]
-            edge_x, edge_y, edge_z = [], [], []
-            for p1, p2 in edges:
-                edge_x += [vertices[p1,0], vertices[p2,0], None]
-                edge_y += [vertices[p1,1], vertices[p2,1], None]
-                edge_z += [vertices[p1,2], vertices[p2,2], None]
-            fig.add_trace(go.Scatter3d(
-                x=edge_x, y=edge_y, z=edge_z, mode='lines',
-                line=dict(color='black', width=2), showlegend=False
-            ))
-
-        # Adiciona espiras helicoidais para representar enrolamentos
-        def add_espiras(fig, cx, cy, z0, z1, raio, cor, nome):
-            t = np.linspace(0, 2*np.pi*8, 300)  # Ângulo
-            z = np.linspace(z0, z1, 300)       # Altura crescente
-            x = cx + raio * np.cos(t)          # Hélice em X
-            y = cy + raio * np.sin(t)          # Hélice em Y
-            pontos = np.stack([x, y, z], axis=1)
-            rot = rotacionar(pontos, angle_rad)
-            fig.add_trace(go.Scatter3d(
-                x=rot[:,0], y=rot[:,1], z=rot[:,2],
-                mode='lines', line=dict(color=cor, width=4), name=nome
-            ))
-
         # === GEOMETRIA DO NÚCLEO E BOBINAS ===
         a, b = self.dimensoes_nucleo  # Largura da coluna e altura do núcleo
-        fig = go.Figure()
 
         # Dimensões da coluna central do núcleo
         pc_dx, pc_dy, pc_dz = a * 0.8, b * 0.7, 0.8 * a
@@ -406,167 +426,116 @@ class TransformadorMonofasico1:
             [ple_x - offset_x, pc_y - offset_y, topo_z, (pld_x+pl_dx)-ple_x, pc_dy, espessura]              # Base superior
         ]
 
-        # Adiciona todos os blocos ao gráfico 3D
-        for x, y, z, dx, dy, dz in partes:
-            v = criar_secoes(x, y, z, dx, dy, dz)
-            v_rot = rotacionar(v, angle_rad)
-            plot_bloco(fig, v_rot, color='rgb(160,160,170)', opacity=0.65)
-
-        # Adiciona as espiras primárias e secundárias
-        add_espiras(fig, centro_x_ple, centro_y_ple, esp_z0, esp_z1, pl_dx * 0.6, 'brown', 'Primário')
-        add_espiras(fig, centro_x_pld, centro_y_pld, esp_z0, esp_z1, pl_dx * 0.6, 'gold', 'Secundário')
-
-        # === Adiciona o texto Np e Ns como legendas flutuantes ===
-        if self.Np and self.Ns:
-            fig.add_trace(go.Scatter3d(
-                x=[centro_x_ple],
-                y=[centro_y_ple],
-                z=[esp_z1 + 0.3 * a],
-                mode='text',
-                text=[f"<b>Np = {self.Np[0]}</b>"],
-                showlegend=False,
-                textfont=dict(size=20, color='brown')
-            ))
-            fig.add_trace(go.Scatter3d(
-                x=[centro_x_pld],
-                y=[centro_y_pld],
-                z=[esp_z1 + 0.3 * a],
-                mode='text',
-                text=[f"<b>Ns = {self.Ns[0]}</b>"],
-                showlegend=False,
-                textfont=dict(size=20, color='goldenrod')
-            ))
-
-        # === Configuração do layout e da câmera ===
-        fig.update_layout(
-            scene=dict(
-                xaxis_title='X', yaxis_title='Y', zaxis_title='Z',
-                aspectmode='data',
-                bgcolor='white',
-                camera=dict(eye=dict(x=-2.0, y=-2.0, z=1.5)),  # Câmera olhando na direção oposta do eixo X
-                xaxis_showspikes=False, yaxis_showspikes=False, zaxis_showspikes=False
-            ),
-            width=1000, height=800,
-            margin=dict(l=0, r=0, b=0, t=40),
-            title="Transformador Monofásico 3D"
-        )
+        # A estrutura da figura vem de MODELO_3D: aqui só entram as coordenadas e os rótulos
+        campos = {}
+        eixos = ("x", "y", "z")
+
+        # Blocos 3D (núcleo): malha e bordas de cada paralelepípedo
+        for n, (x, y, z, dx, dy, dz) in enumerate(partes):
+            v_rot = rotacionar(criar_secoes(x, y, z, dx, dy, dz))
+            # Bordas como segmentos separados por None (uma única linha com interrupções)
+            segmentos = np.full((len(ARESTAS_BLOCO), 3, 3), None, dtype=object)
+            segmentos[:, :2, :] = v_rot[ARESTAS_BLOCO]
+            for c, eixo in enumerate(eixos):
+                campos[("data", 2 * n, eixo)] = v_rot[:, c]
+                campos[("data", 2 * n + 1, eixo)] = segmentos[:, :, c].ravel().tolist()
+
+        # Espiras helicoidais primárias e secundárias
+        t = np.linspace(0, 2*np.pi*8, 300)  # Ângulo
+        z = np.linspace(esp_z0, esp_z1, 300)  # Altura crescente
+        raio = pl_dx * 0.6
+        for traco, (cx, cy) in ((10, (centro_x_ple, centro_y_ple)), (11, (centro_x_pld, centro_y_pld))):
+            rot = rotacionar(np.stack([cx + raio * np.cos(t), cy + raio * np.sin(t), z], axis=1))
+            for c, eixo in enumerate(eixos):
+                campos[("data", traco, eixo)] = rot[:, c]
+
+        # === Texto Np e Ns como legendas flutuantes ===
+        com_rotulos = bool(self.Np and self.Ns)
+        if com_rotulos:
+            for traco, (cx, cy), texto in ((12, (centro_x_ple, centro_y_ple), f"<b>Np = {self.Np[0]}</b>"),
+                                           (13, (centro_x_pld, centro_y_pld), f"<b>Ns = {self.Ns[0]}</b>")):
+                campos[("data", traco, "x")] = [cx]
+                campos[("data", traco, "y")] = [cy]
+                campos[("data", traco, "z")] = [esp_z1 + 0.3 * a]
+                campos[("data", traco, "text")] = [texto]
 
         # === Exporta o HTML interativo ===
-        html_path = "transformador_3d_interativo.html"
-        fig.write_html(html_path, include_plotlyjs="cdn")
-        return html_path
-
-
-
+        figura = MODELO_3D.preencher(campos, variante=com_rotulos)
+        return salvar_artefato(html_path, lambda destino: figura.write_html(destino, include_plotlyjs="cdn"))
+
+
+
+
+    def gerar_resultado(self) -> ResultadoDesafio1:
+        """Monta o resultado compacto a partir dos valores calculados (sem cópias)"""
+        return ResultadoDesafio1(
+            tipo_transformador=self.tipo_transformador,
+            Vp=self.Vp,
+            Vs=self.Vs,
+            potencia=self.Potencia,
+            frequencia=self.frequencia,
+            tipo_lamina=self.tipo_lamina,
+            Np=self.Np,
+            Ns=self.Ns,
+            bitola_primario=self.bitola_primario,
+            bitola_secundario=self.bitola_secundario,
+            lamina=self.lamina_selecionada["numero"],
+            quant_laminas=self.quant_laminas,
+            Sm=self.Sm,
+            Sg=self.Sg,
+            a=self.dimensoes_nucleo[0],
+            b=self.dimensoes_nucleo[1],
+            peso_ferro=self.peso_ferro,
+            peso_cobre=self.peso_cobre,
+            viabilidade=self.viabilidade,
+            mensagem_viabilidade=self.mensagem_viabilidade
+        )
 
     def gerar_resultados_json(self) -> Dict:
-        resultados = {
-            "dados_entrada": {
-                "tipo_transformador": self.tipo_transformador,
-                "tensao_primaria": self.Vp,
-                "tensao_secundaria": self.Vs,
-                "potencia": self.Potencia,
-                "frequencia": self.frequencia,
-                "tipo_lamina": self.tipo_lamina
-            },
-            "resultados": {
-                "espiras": {
-                    "primario": self.Np,
-                    "secundario": self.Ns
-                },
-                "bitolas": {
-                    "primario": [{"AWG": b["AWG"], "area_mm2": b["area_mm2"]} for b in self.bitola_primario],
-                    "secundario": [{"AWG": b["AWG"], "area_mm2": b["area_mm2"]} for b in self.bitola_secundario]
-                },
-                "nucleo": {
-                    "lamina": self.lamina_selecionada["numero"],
-                    "quantidade": self.quant_laminas,
-                    "secao_magnetica": self.Sm,
-                    "secao_geometrica": self.Sg,
-                    "dimensoes": {
-                        "a": self.dimensoes_nucleo[0],
-                        "b": self.dimensoes_nucleo[1]
-                    }
-                },
-                "pesos": {
-                    "ferro": round(self.peso_ferro, 2),
-                    "cobre": round(self.peso_cobre, 2)
-                },
-                "viabilidade": {
-                    "executavel": self.viabilidade,
-                    "mensagem": self.mensagem_viabilidade
-                },
-                "dimensoes_finais": {
-                    "largura": self.dimensoes_nucleo[0] + 4,
-                    "profundidade": self.dimensoes_nucleo[1] + 4,
-                    "altura": self.dimensoes_nucleo[1] * 1.5
-                }
-            },
-            # "imagem_3d_base64": self.imagem_3d_base64
-        }
-        return resultados
-
-    def executar_desafio1(self, arquivo_json: str) -> Optional[Dict]:
-        if not self.carregar_dados_entrada(arquivo_json):
-            return None
+        return self.gerar_resultado().para_json()
 
+    def calcular_projeto(self):
+        """Executa todas as etapas numéricas do dimensionamento (sem gerar o modelo 3D)"""
         self.calcular_correntes_e_secao()
         self.calcular_espiras()
         self.verificar_viabilidade()
         self.calcular_pesos()
-        self.gerar_imagem_3d()
 
-        resultados = self.gerar_resultados_json()
+    def executar_desafio1(self, arquivo_json: str, renderizar: bool = True) -> Optional[ResultadoDesafio1]:
+        if not self.carregar_dados_entrada(arquivo_json):
+            return None
+
+        self.calcular_projeto()
+        if renderizar:
+            self.gerar_imagem_3d()
+
+        return self.gerar_resultado()
 
-        # Mostrar resultados no terminal
+if __name__ == "__main__":
+    # Exemplo 1 - Transformador simples (1 primário + 1 secundário)
+    dados_exemplo1 = {
+        "tipo_transformador": "Transformador de um primário e um secundário",
+        "Vp": "120",
+        "Vs": "12",
+        "Potencia": 100,
+        "tipo_lamina": "Padronizada",
+        "frequencia": 60
+    }
+
+    # Salvar em arquivo JSON
+    with open('exemplo1_transformador.json', 'w') as f:
+        json.dump(dados_exemplo1, f, indent=2)
+
+    # Executar dimensionamento
+    transformador1 = TransformadorMonofasico1()
+    resultados1 = transformador1.executar_desafio1('exemplo1_transformador.json')
+
+    if resultados1:
         print("\n=== RESULTADOS DO TRANSFORMADOR ===")
-        print(json.dumps(resultados, indent=2, ensure_ascii=False))
-        
-        return resultados
-
-# Exemplo 1 - Transformador simples (1 primário + 1 secundário)
-dados_exemplo1 = {
-    "tipo_transformador": "Transformador de um primário e um secundário",
-    "Vp": "120",
-    "Vs": "12",
-    "Potencia": 100,
-    "tipo_lamina": "Padronizada",
-    "frequencia": 60
-}
-
-# Salvar em arquivo JSON
-with open('exemplo1_transformador.json', 'w') as f:
-    json.dump(dados_exemplo1, f, indent=2)
-
-# Executar dimensionamento
-transformador1 = TransformadorMonofasico1()
-resultados1 = transformador1.executar_desafio1('exemplo1_transformador.json')
-
-# if __name__ == "__main__":
-#     try:
-#         parametros_json = {
-#             "tipo_transformador": "Transformador de um primário e um secundário",
-#             "Vp": "120",
-#             "Vs": "12",
-#             "Potencia": 100,
-#             "tipo_lamina": "Padronizada",
-#             "frequencia": 60
-#         }
-
-#         transformador1 = TransformadorMonofasico1()
-#         resultados1 = transformador1.executar_desafio1(parametros_json)
-
-#     except Exception as e:
-#         print(f"Erro: {e}")
-
-
-
-
-
-if resultados1:
-    print("\n=== Resultados Exemplo 1 ===")
-    print(f"Espiras Primário: {resultados1['resultados']['espiras']['primario'][0]}")
-    print(f"Espiras Secundário: {resultados1['resultados']['espiras']['secundario'][0]}")
-    print(f"Bitola Primário: AWG {resultados1['resultados']['bitolas']['primario'][0]['AWG']}")
-    print(f"Bitola Secundário: AWG {resultados1['resultados']['bitolas']['secundario'][0]['AWG']}")
-    print(f"Viabilidade: {resultados1['resultados']['viabilidade']['mensagem']}")
+        print(json.dumps(resultados1.para_json(), indent=2, ensure_ascii=False))
+        print("\n=== Resultados Exemplo 1 ===")
+        print(f"Espiras Primário: {resultados1.Np[0]}")
+        print(f"Espiras Secundário: {resultados1.Ns[0]}")
+        print(f"Bitola Primário: AWG {resultados1.bitola_primario[0]['AWG']}")
+        print(f"Bitola Secundário: AWG {resultados1.bitola_secundario[0]['AWG']}")
+        print(f"Viabilidade: {resultados1.mensagem_viabilidade}")
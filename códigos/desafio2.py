@@ -1,52 +1,80 @@
 # Importações necessárias para cálculo, manipulação de arquivos e geração de gráficos
 import numpy as np                          # Biblioteca para operações com arrays e funções matemáticas
-import matplotlib.pyplot as plt             # Biblioteca para geração de gráficos
-import pandas as pd                         # Para leitura de arquivos Excel
+from matplotlib.figure import Figure        # Figura independente do pyplot (segura entre threads)
 from scipy.interpolate import interp1d      # Para interpolação linear entre pontos da curva
 import json, os, io, base64                 # Utilitários para manipulação de arquivos, entrada/saída e codificação
 from pathlib import Path                    # Para lidar com caminhos de arquivos de forma multiplataforma
+from resultados import ResultadoDesafio2    # Resultado compacto retornado pela API
+import materiais                            # Biblioteca de curvas de magnetização
+import memoria                              # Perfil de memória por etapa (tracemalloc)
+import limites                              # Prazo e limites de recursos (verificados entre blocos)
+from artefatos import caminho_artefato, salvar_artefato    # Gravação atômica e ETag do gráfico gerado
+
+# Instantes calculados por bloco em calcular_corrente_magnetizacao (entre blocos o prazo é verificado)
+AMOSTRAS_POR_BLOCO = 1 << 18
+
+# Piso da tolerância da amostragem adaptativa, relativo ao pico da corrente
+TOLERANCIA_RELATIVA_MIN = 1e-9
+
+# Curva MMF(Φ) linear por partes, avaliada de forma vetorizada
+class CurvaFMM:
+    """
+    Mesma interpolação de interp1d(kind='linear', fill_value='extrapolate'),
+    mas devolvendo também a inclinação dMMF/dΦ do segmento usado em cada ponto.
+    """
+
+    def __init__(self, fluxo, fmm):
+        fluxo = np.asarray(fluxo, dtype=float)
+        fmm = np.asarray(fmm, dtype=float)
+        # Ordena pelo fluxo e descarta pontos repetidos (inclinação indefinida)
+        self.fluxo, indices = np.unique(fluxo, return_index=True)
+        self.fmm = fmm[indices]
+        if len(self.fluxo) < 2:
+            raise ValueError("A curva de magnetização precisa de pelo menos dois pontos distintos")
+        self.inclinacoes = np.diff(self.fmm) / np.diff(self.fluxo)
+
+    def avaliar(self, fluxo):
+        """Retorna (MMF, dMMF/dΦ) para cada valor de fluxo"""
+        fluxo = np.asarray(fluxo, dtype=float)
+        segmento = np.clip(np.searchsorted(self.fluxo, fluxo, side='right') - 1, 0, len(self.inclinacoes) - 1)
+        inclinacao = self.inclinacoes[segmento]
+        return self.fmm[segmento] + inclinacao * (fluxo - self.fluxo[segmento]), inclinacao
+
+    def __call__(self, fluxo):
+        return self.avaliar(fluxo)[0]
 
 # Classe que representa o comportamento magnético de um transformador
 class TransformadorMagnetico2:
     
-    def _carregar_curva_magnetizacao(self, caminho_arquivo=None):
+    def _carregar_curva_magnetizacao(self, caminho_arquivo=None, material=None,
+                                     area_nucleo=None, comprimento_medio=None):
         """
-        Carrega o arquivo Excel com a curva de magnetização (MMF vs Fluxo) e 
-        cria a função de interpolação para posterior uso.
+        Carrega a curva de magnetização (MMF vs Fluxo) e cria a função de
+        interpolação para posterior uso.
 
         MMF (Força MagnetoMotriz) vs Fluxo magnético Φ
+
+        Sem caminho_arquivo, a curva vem da biblioteca de materiais (lida uma única
+        vez por processo); 'material' escolhe a curva (padrão: MagCurve.xlsx).
+        Curvas B-H exigem area_nucleo (m²) e comprimento_medio (m).
         """
         try:
-            # Lista de locais padrão onde o arquivo MagCurve.xlsx pode estar localizado
-            locais_padrao = [
-                "MagCurve.xlsx",
-                os.path.join(os.path.dirname(__file__), "MagCurve.xlsx"),
-                "../MagCurve.xlsx",
-                "data/MagCurve.xlsx"
-            ]
             if caminho_arquivo is not None:
-                locais_padrao = [caminho_arquivo]  # Usa caminho fornecido, se existir
-
-            # Verifica onde o arquivo realmente existe
-            arquivo_encontrado = None
-            for local in locais_padrao:
-                if Path(local).exists():
-                    arquivo_encontrado = local
-                    break
-
-            if arquivo_encontrado is None:
-                raise FileNotFoundError(f"Arquivo 'MagCurve.xlsx' não encontrado. Procurado em: {locais_padrao}")
-
-            # Lê o conteúdo do arquivo Excel
-            df = pd.read_excel(arquivo_encontrado)
-
-            # Verifica se as colunas necessárias estão presentes
-            if 'MMF' not in df.columns or 'Fluxo' not in df.columns:
-                raise ValueError("Arquivo Excel deve conter colunas 'MMF' e 'Fluxo'")
+                if not Path(caminho_arquivo).exists():
+                    raise FileNotFoundError(f"Arquivo '{caminho_arquivo}' não encontrado")
+                tipo, fluxo, fmm = materiais.ler_curva(caminho_arquivo)
+                if tipo != "fmm":
+                    raise ValueError("Arquivo Excel deve conter colunas 'MMF' e 'Fluxo'")
+            else:
+                biblioteca = materiais.biblioteca()
+                material = material or materiais.MATERIAL_PADRAO
+                if material == materiais.MATERIAL_PADRAO and material not in biblioteca:
+                    raise FileNotFoundError(f"Arquivo 'MagCurve.xlsx' não encontrado. Procurado em: {materiais.LOCAIS_CURVA_PADRAO}")
+                fluxo, fmm = biblioteca.curva_fmm(material, area_nucleo, comprimento_medio)
 
             # Extrai os dados das colunas
-            self.fmm_data = df['MMF'].values     # Força magnetomotriz (FMM), em Ampère-espiras
-            self.fluxo_data = df['Fluxo'].values # Fluxo magnético (Φ), em Weber
+            self.fmm_data = fmm      # Força magnetomotriz (FMM), em Ampère-espiras
+            self.fluxo_data = fluxo  # Fluxo magnético (Φ), em Weber
 
             # Cria uma função interpoladora: FMM = f(Φ)
             # Interpolação linear entre os pontos medidos, extrapolando quando necessário
@@ -54,10 +82,20 @@ class TransformadorMagnetico2:
                 self.fluxo_data, self.fmm_data, kind='linear', fill_value="extrapolate"
             )
 
+        except ValueError:
+            raise  # Entrada inválida (material desconhecido, curva B-H sem dimensões): erro do cliente
         except Exception as e:
             raise RuntimeError(f"Erro ao carregar curva de magnetização: {str(e)}")
 
-    def calcular_corrente_magnetizacao(self, vm=None, n=None, freq=None, tempo_max=0.340, passo=1/3000):
+    def curva(self) -> CurvaFMM:
+        """Curva carregada em forma vetorizada (MMF e inclinação), para as simulações no tempo"""
+        if not hasattr(self, 'fluxo_data'):
+            raise RuntimeError("Execute _carregar_curva_magnetizacao() primeiro")
+        return CurvaFMM(self.fluxo_data, self.fmm_data)
+
+    @memoria.medir("desafio2.corrente")
+    def calcular_corrente_magnetizacao(self, vm=None, n=None, freq=None, tempo_max=0.340, passo=1/3000,
+                                       amostragem='uniforme', tolerancia=None):
         """
         Calcula a corrente de magnetização (Im) ao longo do tempo usando a equação do fluxo magnético.
         
@@ -66,6 +104,9 @@ class TransformadorMagnetico2:
         - Φ(t) = -(Vm / (ω * N)) * cos(ωt)   → Lei de Faraday
         - MMF(t) = f(Φ(t))                   → obtido por interpolação dos dados reais
         - Im(t) = MMF(t) / N                 → relação da corrente com a força magnetomotriz
+
+        Com amostragem='adaptativa' o passo é ignorado: os instantes são escolhidos por
+        _amostrar_periodo_adaptativo com erro máximo 'tolerancia' (A) na corrente.
         """
         if vm is None or n is None or freq is None:
             raise ValueError("Parâmetros vm, n e freq devem ser fornecidos")
@@ -76,20 +117,141 @@ class TransformadorMagnetico2:
 
         w = 2 * np.pi * self.freq  # Frequência angular (rad/s)
 
-        # Cria vetor de tempo de 0 até tempo_max com passo definido
-        self.t = np.arange(0, tempo_max, passo)
+        if amostragem == 'adaptativa':
+            # Amostra um período com densidade proporcional à variação de Im(t) e repete nos demais
+            periodo = 1 / self.freq
+            n_periodos = int(np.ceil(tempo_max / periodo))
+            t_periodo = self._amostrar_periodo_adaptativo(w, tolerancia, n_periodos=n_periodos)
+            limites.exigir("amostras_max", n_periodos * len(t_periodo))
+            t = (t_periodo[None, :] + periodo * np.arange(n_periodos)[:, None]).ravel()
+            self.t = t[t < tempo_max]
+        elif amostragem == 'uniforme':
+            # Cria vetor de tempo de 0 até tempo_max com passo definido
+            self.t = np.arange(0, tempo_max, passo)
+        else:
+            raise ValueError("amostragem deve ser 'uniforme' ou 'adaptativa'")
+
+        # Calculado em blocos de AMOSTRAS_POR_BLOCO instantes, verificando o prazo entre eles
+        self.fluxo_t = np.empty_like(self.t)
+        self.fmm_t = np.empty_like(self.t)
+        self.corrente_t = np.empty_like(self.t)
+        for inicio in range(0, len(self.t), AMOSTRAS_POR_BLOCO):
+            limites.verificar_cancelamento()
+            bloco = slice(inicio, inicio + AMOSTRAS_POR_BLOCO)
+
+            # Calcula o fluxo magnético Φ(t)
+            # Derivada da tensão senoidal -> fluxo = integral da tensão
+            # Φ(t) = -(Vm / (w * N)) * cos(wt)
+            self.fluxo_t[bloco] = -self.VM / (w * self.N) * np.cos(w * self.t[bloco])
+
+            # Usa interpolação para obter MMF(t) correspondente ao fluxo
+            self.fmm_t[bloco] = self.fluxo_para_fmm(self.fluxo_t[bloco])
+
+            # Corrente de magnetização: Im(t) = MMF(t) / N
+            self.corrente_t[bloco] = self.fmm_t[bloco] / self.N
 
-        # Calcula o fluxo magnético Φ(t)
-        # Derivada da tensão senoidal -> fluxo = integral da tensão
-        # Φ(t) = -(Vm / (w * N)) * cos(wt)
-        self.fluxo_t = -self.VM / (w * self.N) * np.cos(w * self.t)
+    def _amostrar_periodo_adaptativo(self, w, tolerancia=None, pontos_iniciais=16, max_niveis=24, n_periodos=1):
+        """
+        Escolhe os instantes de um período de Im(t) para que a interpolação linear entre
+        eles fique a no máximo 'tolerancia' (A) da curva exata.
+
+        - A curva MMF(Φ) é linear por partes: toda a sua curvatura está nos vértices.
+          Os instantes em que Φ(t) passa por vértices de curvatura relevante entram
+          como amostras, então entre duas amostras Im(t) é suave.
+        - Cada intervalo é dividido ao meio enquanto o desvio no ponto médio passar
+          da tolerância; todos os intervalos de um nível são testados de uma vez.
+        - A tolerância tem um piso relativo ao pico (abaixo dele o arredondamento nunca
+          converge) e o total de amostras (n_periodos repetições) é conferido a cada nível.
+        """
+        curva = self.curva()
+        amplitude = self.VM / (w * self.N)
+        periodo = 2 * np.pi / w
+
+        def corrente(t):
+            return curva(-amplitude * np.cos(w * t)) / self.N
+
+        pico = max(abs(curva(amplitude)), abs(curva(-amplitude))) / self.N
+        if tolerancia is None:
+            # Padrão: 0,1% do pico da corrente em regime
+            tolerancia = 1e-3 * pico if pico > 0 else 1e-9
+        tolerancia = max(tolerancia, TOLERANCIA_RELATIVA_MIN * pico)
+
+        # Vértices alcançados pelo fluxo cuja curvatura (mudança de inclinação) pesa mais que a
+        # tolerância: desvio máximo, em corrente, de uma reta que ignorasse o vértice
+        curvatura = np.abs(np.diff(curva.inclinacoes))
+        antes, depois = np.diff(curva.fluxo)[:-1], np.diff(curva.fluxo)[1:]
+        desvio = curvatura * antes * depois / (antes + depois) / self.N
+        vertices = curva.fluxo[1:-1][desvio > tolerancia]
+        vertices = vertices[np.abs(vertices) < amplitude]
+        t_vertice = np.arccos(-vertices / amplitude) / w      # 1º meio período (Φ crescente)
+        t = np.unique(np.concatenate([
+            np.linspace(0, periodo, pontos_iniciais + 1)[:-1],
+            t_vertice,
+            periodo - t_vertice                               # 2º meio período (Φ decrescente)
+        ]))
+        t = np.append(t, periodo)
+        i = corrente(t)
+
+        for _ in range(max_niveis):
+            limites.verificar_cancelamento()
+            t_medio = (t[:-1] + t[1:]) / 2
+            i_medio = corrente(t_medio)
+            dividir = np.abs(i_medio - (i[:-1] + i[1:]) / 2) > tolerancia
+            if not dividir.any():
+                break
+            # Recusa (422) antes de alocar um nível que passaria do limite de amostras
+            limites.exigir("amostras_max", (len(t) - 1 + int(dividir.sum())) * n_periodos)
+            # Insere os pontos médios dos intervalos reprovados
+            posicoes = np.nonzero(dividir)[0] + 1
+            t = np.insert(t, posicoes, t_medio[dividir])
+            i = np.insert(i, posicoes, i_medio[dividir])
+
+        self.tolerancia_amostragem = tolerancia
+        return t[:-1]  # O último ponto é o início do próximo período
+
+    def erro_contra_referencia(self, passo_referencia=None):
+        """
+        Maior desvio (A) entre Im(t) interpolado a partir das amostras atuais e uma
+        referência densa calculada diretamente da curva.
+        """
+        if not hasattr(self, 'corrente_t'):
+            raise RuntimeError("Execute calcular_corrente_magnetizacao() primeiro")
+        w = 2 * np.pi * self.freq
+        if passo_referencia is None:
+            passo_referencia = 1 / (self.freq * 20000)
+        t_ref = np.arange(self.t[0], self.t[-1], passo_referencia)
+        i_ref = self.fluxo_para_fmm(-self.VM / (w * self.N) * np.cos(w * t_ref)) / self.N
+        return float(np.max(np.abs(np.interp(t_ref, self.t, self.corrente_t) - i_ref)))
 
-        # Usa interpolação para obter MMF(t) correspondente ao fluxo
-        self.fmm_t = self.fluxo_para_fmm(self.fluxo_t)
+    @memoria.medir("desafio2.comparacao")
+    def comparar_materiais(self, lista_materiais, vm, n, freq, tempo_max=0.340, passo=1/3000,
+                           area_nucleo=None, comprimento_medio=None):
+        """
+        Calcula Im(t) de vários materiais para o mesmo (Vm, N, f) em uma única chamada
+        vetorizada à biblioteca de materiais.
+        """
+        self.VM, self.N, self.freq = vm, n, freq
+        w = 2 * np.pi * freq
+        self.t = np.arange(0, tempo_max, passo)
+        self.fluxo_t = -vm / (w * n) * np.cos(w * self.t)
+        fmm = materiais.biblioteca().comparar(lista_materiais, self.fluxo_t, area_nucleo, comprimento_medio)
+        self.correntes_materiais = dict(zip(lista_materiais, fmm / n))
+        return self.correntes_materiais
 
-        # Corrente de magnetização: Im(t) = MMF(t) / N
-        self.corrente_t = self.fmm_t / self.N
+    def colunas(self):
+        """
+        Formas de onda calculadas como colunas (os próprios arrays, sem cópia):
+        t, fluxo, fmm e corrente; na comparação de materiais, uma corrente por material.
+        """
+        if hasattr(self, 'correntes_materiais'):
+            dados = {"t": self.t, "fluxo": self.fluxo_t}
+            dados.update((f"corrente_{material}", corrente) for material, corrente in self.correntes_materiais.items())
+            return dados
+        if not hasattr(self, 'corrente_t'):
+            raise RuntimeError("Execute calcular_corrente_magnetizacao() primeiro")
+        return {"t": self.t, "fluxo": self.fluxo_t, "fmm": self.fmm_t, "corrente": self.corrente_t}
 
+    @memoria.medir("desafio2.grafico")
     def gerar_grafico_base64(self, salvar_png_em='grafico_magnetizacao.png'):
         """
         Gera um gráfico da corrente de magnetização ao longo do tempo e retorna sua versão em base64.
@@ -99,52 +261,44 @@ class TransformadorMagnetico2:
         - x: Tempo (ms)
         - y: Corrente de Magnetização (A)
         """
-        if not hasattr(self, 'corrente_t'):
+        if not hasattr(self, 'corrente_t') and not hasattr(self, 'correntes_materiais'):
             raise RuntimeError("Execute calcular_corrente_magnetizacao() primeiro")
 
-        # Cria a figura do gráfico
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(self.t * 1000, self.corrente_t, color='blue')  # Tempo em milissegundos
+        # Cria a figura do gráfico (sem pyplot, que mantém estado global entre threads)
+        fig = Figure(figsize=(10, 6))
+        ax = fig.subplots()
+        if hasattr(self, 'correntes_materiais'):
+            # Uma curva por material na comparação
+            for material, corrente in self.correntes_materiais.items():
+                ax.plot(self.t * 1000, corrente, label=material)
+            ax.legend()
+        else:
+            ax.plot(self.t * 1000, self.corrente_t, color='blue')  # Tempo em milissegundos
         ax.set_title('Corrente de Magnetização x Tempo')
         ax.set_xlabel('Tempo (ms)')
         ax.set_ylabel('Corrente de Magnetização (A)')
         ax.grid(True)
 
-        # Salva o gráfico como arquivo PNG
-        fig.savefig(salvar_png_em)
-
-        # Codifica o gráfico em base64 para uso em HTML ou APIs
+        # Renderiza o PNG uma vez: o mesmo conteúdo vai para o arquivo e para o base64
         buffer = io.BytesIO()
         fig.savefig(buffer, format='png')
-        buffer.seek(0)
-        img_bytes = buffer.read()
+        img_bytes = buffer.getvalue()
+
+        def escrever(destino):
+            with open(destino, 'wb') as f:
+                f.write(img_bytes)
+        salvar_artefato(salvar_png_em, escrever)
+
+        # Codifica o gráfico em base64 para uso em HTML ou APIs
         img_base64 = base64.b64encode(img_bytes).decode('utf-8')
 
-        plt.close(fig)  # Fecha o gráfico para liberar memória
         return img_base64
 
-# Função principal que orquestra a execução completa
-def executar_desafio2(json_input=None, salvar_grafico_em='grafico_magnetizacao.png'):
+# Atualiza um dicionário de parâmetros padrão com a entrada recebida
+def atualizar_parametros(parametros, json_input=None):
     """
-    Função principal do desafio.
-
-    Passos:
-    1. Lê os parâmetros de entrada (padrão, string JSON, dicionário ou arquivo JSON)
-    2. Cria instância do transformador
-    3. Carrega curva de magnetização
-    4. Calcula a corrente de magnetização
-    5. Gera e salva gráfico, retornando-o em base64
+    Atualiza 'parametros' com a entrada externa: dicionário, string JSON ou caminho de arquivo JSON.
     """
-    # Parâmetros padrão
-    parametros = {
-        "VM": 325,           # Tensão de pico (V)
-        "N": 850,            # Número de espiras
-        "freq": 50,          # Frequência (Hz)
-        "tempo_max": 0.340,  # Tempo total da simulação (s)
-        "passo": 1/3000      # Passo de tempo (s)
-    }
-
-    # Se houver entrada externa, atualiza os parâmetros
     if json_input is not None:
         if isinstance(json_input, str):
             if os.path.exists(json_input):  # Verifica se é um arquivo
@@ -159,23 +313,85 @@ def executar_desafio2(json_input=None, salvar_grafico_em='grafico_magnetizacao.p
             parametros.update(json_input)
         else:
             raise TypeError("Entrada deve ser dict, string JSON ou caminho para arquivo JSON")
+    return parametros
+
+# Parâmetros padrão do desafio 2
+def parametros_padrao():
+    return {
+        "VM": 325,           # Tensão de pico (V)
+        "N": 850,            # Número de espiras
+        "freq": 50,          # Frequência (Hz)
+        "tempo_max": 0.340,  # Tempo total da simulação (s)
+        "passo": 1/3000,     # Passo de tempo (s)
+        "amostragem": "uniforme",  # "uniforme" (usa passo) ou "adaptativa"
+        "tolerancia": None,  # Erro máximo em Im (A) na amostragem adaptativa
+        "material": None,    # Curva da biblioteca de materiais (padrão: MagCurve.xlsx)
+        "materiais": None,   # Lista de materiais para comparar no mesmo gráfico
+        "area_nucleo": None,        # Área do núcleo (m²), para curvas B-H
+        "comprimento_medio": None   # Caminho magnético médio (m), para curvas B-H
+    }
+
+# Executa apenas os cálculos (sem gráfico)
+def calcular_desafio2(json_input=None) -> TransformadorMagnetico2:
+    """
+    Lê os parâmetros, carrega a curva e calcula Im(t) (ou as correntes de cada
+    material na comparação). Retorna o transformador com as formas de onda.
+    """
+    # Se houver entrada externa, atualiza os parâmetros padrão
+    parametros = atualizar_parametros(parametros_padrao(), json_input)
 
     # Cria o objeto do transformador e realiza os cálculos
     transformador = TransformadorMagnetico2()
-    transformador._carregar_curva_magnetizacao()
+
+    if parametros["materiais"]:
+        transformador.comparar_materiais(
+            parametros["materiais"],
+            vm=parametros["VM"],
+            n=parametros["N"],
+            freq=parametros["freq"],
+            tempo_max=parametros["tempo_max"],
+            passo=parametros["passo"],
+            area_nucleo=parametros["area_nucleo"],
+            comprimento_medio=parametros["comprimento_medio"]
+        )
+        return transformador
+
+    transformador._carregar_curva_magnetizacao(
+        material=parametros["material"],
+        area_nucleo=parametros["area_nucleo"],
+        comprimento_medio=parametros["comprimento_medio"]
+    )
 
     transformador.calcular_corrente_magnetizacao(
         vm=parametros["VM"],
         n=parametros["N"],
         freq=parametros["freq"],
         tempo_max=parametros["tempo_max"],
-        passo=parametros["passo"]
+        passo=parametros["passo"],
+        amostragem=parametros["amostragem"],
+        tolerancia=parametros["tolerancia"]
     )
+    return transformador
+
+# Função principal que orquestra a execução completa
+def executar_desafio2(json_input=None, salvar_grafico_em='grafico_magnetizacao.png'):
+    """
+    Função principal do desafio.
+
+    Passos:
+    1. Lê os parâmetros de entrada (padrão, string JSON, dicionário ou arquivo JSON)
+    2. Cria instância do transformador
+    3. Carrega curva de magnetização
+    4. Calcula a corrente de magnetização
+    5. Gera e salva gráfico, retornando-o em base64 (ResultadoDesafio2)
+    """
+    transformador = calcular_desafio2(json_input)
 
     # Gera o gráfico e retorna imagem em base64
+    salvar_grafico_em = caminho_artefato(salvar_grafico_em)
     imagem_base64 = transformador.gerar_grafico_base64(salvar_png_em=salvar_grafico_em)
 
-    return imagem_base64
+    return ResultadoDesafio2(imagem_base64, salvar_grafico_em)
 
 # Executa diretamente como script se for chamado pelo terminal
 if __name__ == "__main__":
@@ -1,11 +1,88 @@
 import math
 import json
+import logging
 import os
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Arc
 import plotly.graph_objects as go
 
+import memoria
+from artefatos import salvar_artefato
+from modelos_figura import ModeloFigura
+from resultados import ResultadoDesafio3
+
+logger = logging.getLogger(__name__)
+
+# Raio do arco que indica o ângulo φ no diagrama fasorial (unidades normalizadas)
+RAIO_ANGULO = 0.25
+
+# Estrutura do diagrama fasorial da corrente de excitação; variante: desenha (ou não) o ângulo φ
+def _estrutura_diagrama_fasorial(com_angulo):
+    fator_ampliacao = 1.2
+    fig = go.Figure()
+
+    # Vetor de tensão (referência angular apenas)
+    fig.add_trace(go.Scatter(x=[0, 0.4], y=[0, 0], mode='lines+text',
+                            line=dict(color='orange', width=2, dash='dot'),
+                            name='V (referência)',
+                            text=["", "V"],
+                            textposition="top right"))
+
+    # Ic (ativa)
+    fig.add_trace(go.Scatter(x=[0, 1], y=[0, 0], mode='lines+text',
+                            line=dict(color='red', width=2),
+                            name='Ic (ativa)',
+                            text=["", "Ic"],
+                            textposition="bottom right"))
+
+    # Im (reativa)
+    fig.add_trace(go.Scatter(x=[0, 0], y=[0, 1], mode='lines+text',
+                            line=dict(color='blue', width=2),
+                            name='Im (reativa)',
+                            text=["", "Im"],
+                            textposition="top left"))
+
+    # Iφ (resultante)
+    fig.add_trace(go.Scatter(x=[0, 1], y=[0, 1], mode='lines+text',
+                            line=dict(color='green', width=3),
+                            name='Iφ (resultante)',
+                            text=["", "Iφ"],
+                            textposition="top center"))
+
+    if com_angulo:
+        # Arco do ângulo φ
+        fig.add_trace(go.Scatter(x=[0], y=[0], mode='lines',
+                                line=dict(color='purple', dash='dot'),
+                                name='φ'))
+
+        # Texto do ângulo φ
+        fig.add_annotation(x=0, y=0,
+                        text='φ',
+                        showarrow=False,
+                        font=dict(color='purple', size=14))
+
+    # Layout final
+    fig.update_layout(
+        title='Diagrama Fasorial da Corrente de Excitação',
+        xaxis_title='Eixo Real (normalizado)',
+        yaxis_title='Eixo Imaginário (normalizado)',
+        showlegend=True,
+        width=700,
+        height=600,
+        margin=dict(l=40, r=40, t=60, b=40),
+        xaxis=dict(range=[-fator_ampliacao, fator_ampliacao],
+                zeroline=True, showgrid=True, gridcolor='lightgray',
+                scaleanchor="y", scaleratio=1),
+        yaxis=dict(range=[-fator_ampliacao, fator_ampliacao],
+                zeroline=True, showgrid=True, gridcolor='lightgray'),
+        plot_bgcolor='white'
+    )
+    return fig
+
+# Validado na primeira chamada; as seguintes só trocam coordenadas e o texto do ângulo
+MODELO_FASORIAL = ModeloFigura(_estrutura_diagrama_fasorial)
+
 class TransformadorMonofasico:
     def __init__(self, N1=1000, N2=200,Va=40, Ia=5, Pa=100,Vb=220, Ib=1.2, Pb=60,circuit_type='Serie',
                  referred_to='primario',sec_type='circuito-aberto'):
@@ -96,6 +173,7 @@ class TransformadorMonofasico:
         self.ReqTotal_out, self.XeqTotal_out, self.Rp, self.Xp, self.Rs, self.Xs = self.calcular_parametros_equivalentes()
 
     #Método que gera uma tabela com os dados calculados (encontrados)
+    @memoria.medir("desafio3.relatorio")
     def gerar_relatorio_ensaios(self, nome_arquivo='relatorio_ensaios.html'):
         ensaio_ca_lado = "secundario" if self.sec_type == "circuito-aberto" else "primario"
         ensaio_cc_lado = "secundario" if self.sec_type == "curto-circuito" else "primario"
@@ -140,16 +218,19 @@ class TransformadorMonofasico:
         html += "</body></html>"
 
         # Salvar arquivo
-        with open(nome_arquivo, 'w', encoding='utf-8') as f:
-            f.write(html)
+        def escrever(destino):
+            with open(destino, 'w', encoding='utf-8') as f:
+                f.write(html)
+        nome_arquivo = salvar_artefato(nome_arquivo, escrever)
 
-        print(f"Relatório HTML salvo como {nome_arquivo}")
+        logger.info("Relatório HTML salvo como %s", nome_arquivo, extra={"evento": "arquivo_salvo"})
         return nome_arquivo
 
    # gera o gráfico do diagrama fasorial
+    @memoria.medir("desafio3.diagrama")
     def plotar_diagrama_fasorial(self, nome_arquivo='diagrama_fasorial.html'):
         if self.Ic is None or self.Im is None:
-            print("Corrente de excitação inválida ou ausente. Verifique os dados de entrada.")
+            logger.warning("Corrente de excitação inválida ou ausente. Verifique os dados de entrada.")
             return
 
         Ic = self.Ic
@@ -157,44 +238,18 @@ class TransformadorMonofasico:
 
         Iphi = np.sqrt(Ic**2 + Im**2)
         max_val = max(abs(Iphi), abs(Ic), abs(Im))
-        fator_ampliacao = 1.2
         escala = 1 / max_val if max_val != 0 else 1
 
         # Correntes normalizadas
         Ic_n = Ic * escala
         Im_n = Im * escala
-        Iphi_n_x = Ic_n
-        Iphi_n_y = Im_n
-
-        fig = go.Figure()
-
-        # Vetor de tensão (referência angular apenas)
-        fig.add_trace(go.Scatter(x=[0, 0.4], y=[0, 0], mode='lines+text',
-                                line=dict(color='orange', width=2, dash='dot'),
-                                name='V (referência)',
-                                text=["", "V"],
-                                textposition="top right"))
-
-        # Ic (ativa)
-        fig.add_trace(go.Scatter(x=[0, Ic_n], y=[0, 0], mode='lines+text',
-                                line=dict(color='red', width=2),
-                                name='Ic (ativa)',
-                                text=["", "Ic"],
-                                textposition="bottom right"))
-
-        # Im (reativa)
-        fig.add_trace(go.Scatter(x=[0, 0], y=[0, Im_n], mode='lines+text',
-                                line=dict(color='blue', width=2),
-                                name='Im (reativa)',
-                                text=["", "Im"],
-                                textposition="top left"))
-
-        # Iφ (resultante)
-        fig.add_trace(go.Scatter(x=[0, Iphi_n_x], y=[0, Iphi_n_y], mode='lines+text',
-                                line=dict(color='green', width=3),
-                                name='Iφ (resultante)',
-                                text=["", "Iφ"],
-                                textposition="top center"))
+
+        campos = {
+            ("data", 1, "x"): [0, Ic_n],   # Ic (ativa)
+            ("data", 2, "y"): [0, Im_n],   # Im (reativa)
+            ("data", 3, "x"): [0, Ic_n],   # Iφ (resultante)
+            ("data", 3, "y"): [0, Im_n],
+        }
 
         # Ângulo φ
         if Iphi != 0:
@@ -203,62 +258,40 @@ class TransformadorMonofasico:
             phi_rad = np.arccos(cos_phi)
             phi_deg = np.degrees(phi_rad)
 
-            # Arco do ângulo φ
+            # Arco do ângulo φ e o texto no meio dele
             theta = np.linspace(0, phi_rad, 100)
-            raio = 0.25
-            x_arc = raio * np.cos(theta)
-            y_arc = raio * np.sin(theta)
-
-            fig.add_trace(go.Scatter(x=x_arc, y=y_arc, mode='lines',
-                                    line=dict(color='purple', dash='dot'),
-                                    name='φ'))
-
-            # Texto do ângulo φ
-            fig.add_annotation(x=raio * np.cos(phi_rad / 2),
-                            y=raio * np.sin(phi_rad / 2),
-                            text=f'φ = {phi_deg:.2f}°',
-                            showarrow=False,
-                            font=dict(color='purple', size=14))
-
-        # Layout final
-        fig.update_layout(
-            title='Diagrama Fasorial da Corrente de Excitação',
-            xaxis_title='Eixo Real (normalizado)',
-            yaxis_title='Eixo Imaginário (normalizado)',
-            showlegend=True,
-            width=700,
-            height=600,
-            margin=dict(l=40, r=40, t=60, b=40),
-            xaxis=dict(range=[-fator_ampliacao, fator_ampliacao],
-                    zeroline=True, showgrid=True, gridcolor='lightgray',
-                    scaleanchor="y", scaleratio=1),
-            yaxis=dict(range=[-fator_ampliacao, fator_ampliacao],
-                    zeroline=True, showgrid=True, gridcolor='lightgray'),
-            plot_bgcolor='white'
-        )
-
-        fig.write_html(nome_arquivo)
-        print(f"Gráfico salvo como {nome_arquivo}")
+            campos[("data", 4, "x")] = RAIO_ANGULO * np.cos(theta)
+            campos[("data", 4, "y")] = RAIO_ANGULO * np.sin(theta)
+            campos[("layout", "annotations", 0, "x")] = RAIO_ANGULO * np.cos(phi_rad / 2)
+            campos[("layout", "annotations", 0, "y")] = RAIO_ANGULO * np.sin(phi_rad / 2)
+            campos[("layout", "annotations", 0, "text")] = f'φ = {phi_deg:.2f}°'
+
+        fig = MODELO_FASORIAL.preencher(campos, variante=bool(Iphi != 0))
+
+        nome_arquivo = salvar_artefato(nome_arquivo, fig.write_html)
+        logger.info("Gráfico salvo como %s", nome_arquivo, extra={"evento": "arquivo_salvo"})
         return nome_arquivo
 
 def ler_dados_json(nome_arquivo):
     if not os.path.isfile(nome_arquivo):
-        print(f"Arquivo {nome_arquivo} não encontrado. Usando valores padrão.")
+        logger.warning("Arquivo %s não encontrado. Usando valores padrão.", nome_arquivo)
         return None
     with open(nome_arquivo, 'r') as f:
         try:
             dados = json.load(f)
             if not dados:
-                print("Arquivo JSON vazio. Usando valores padrão.")
+                logger.warning("Arquivo JSON vazio. Usando valores padrão.")
                 return None
             return dados
         except json.JSONDecodeError:
-            print("Erro ao decodificar JSON. Usando valores padrão.")
+            logger.warning("Erro ao decodificar JSON. Usando valores padrão.")
             return None
 
-def executar_desafio3(arquivo_json):
+def executar_desafio3(arquivo_json, renderizar=True):
     try:
-        if arquivo_json:
+        if isinstance(arquivo_json, dict):
+            dados = arquivo_json
+        elif arquivo_json:
             with open(arquivo_json, 'r') as f:
                 dados = json.load(f)
         else:
@@ -275,16 +308,19 @@ def executar_desafio3(arquivo_json):
     # Processa os ensaios e parâmetros
     tf.processar_ensaios()
 
-    # Gera relatório em arquivo HTML e obtém nome do arquivo
-    arquivo_relatorio_html = tf.gerar_relatorio_ensaios()
+    arquivo_relatorio_html = arquivo_html = None
+    if renderizar:
+        # Gera relatório em arquivo HTML e obtém nome do arquivo
+        arquivo_relatorio_html = tf.gerar_relatorio_ensaios()
 
-    # Gera o diagrama fasorial, retorna o nome do arquivo HTML gerado
-    arquivo_html = tf.plotar_diagrama_fasorial()
+        # Gera o diagrama fasorial, retorna o nome do arquivo HTML gerado
+        arquivo_html = tf.plotar_diagrama_fasorial()
 
-    return {
-        "relatorio_html": arquivo_relatorio_html,
-        "diagrama_html": arquivo_html
-    }
+    return ResultadoDesafio3(
+        tf.Rc, tf.Xm, tf.Zphi, tf.Ic, tf.Im, tf.Req, tf.Xeq, tf.Zcc,
+        relatorio_html=arquivo_relatorio_html,
+        diagrama_html=arquivo_html
+    )
 
 '''
 if __name__ == "__main__":
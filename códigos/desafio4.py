@@ -3,8 +3,16 @@ import numpy as np
 import cmath  # Para lidar com números complexos (fasores)
 import plotly.graph_objects as go  # Para gráficos interativos
 import json
+import logging
 from pathlib import Path
 
+import memoria
+from artefatos import salvar_artefato
+from modelos_figura import ModeloFigura
+from resultados import ResultadoDesafio4
+
+logger = logging.getLogger(__name__)
+
 # Lê os parâmetros do transformador a partir de um arquivo JSON
 def ler_parametros_json(caminho_arquivo='parametros_transformador.json'):
     """
@@ -15,16 +23,16 @@ def ler_parametros_json(caminho_arquivo='parametros_transformador.json'):
             parametros = json.load(f)
         return parametros
     except FileNotFoundError:
-        print(f"Erro: Arquivo '{caminho_arquivo}' não encontrado.")
+        logger.error("Arquivo '%s' não encontrado", caminho_arquivo)
         return None
     except json.JSONDecodeError:
-        print(f"Erro: Arquivo '{caminho_arquivo}' mal formatado.")
+        logger.error("Arquivo '%s' mal formatado", caminho_arquivo)
         return None
 
-# Calcula os fasores e plota o diagrama interativo
-def calcular_e_plotar_interativo(parametros):
+# Calcula os fasores e a regulação de tensão (sem gráfico)
+def calcular_regulacao(parametros):
     """
-    Cria um diagrama fasorial interativo com base nos parâmetros fornecidos.
+    Calcula os fasores do circuito equivalente e a regulação percentual.
     """
 
     # Extrai os parâmetros do dicionário
@@ -52,32 +60,52 @@ def calcular_e_plotar_interativo(parametros):
     # Cálculo da regulação percentual
     regulacao = ((V20 - V2) / V2) * 100
 
-    # Cria gráfico com Plotly
-    fig = go.Figure()
+    return {
+        "V2_fasor": V2_fasor,
+        "I2_fasor": I2_fasor,
+        "V20_fasor": V20_fasor,
+        "V20": V20,
+        "regulacao": regulacao
+    }
 
-    # Função auxiliar para adicionar vetores ao gráfico
-    def add_vector(fig, origin, vector, name, color):
-        x_end = origin[0] + vector.real
-        y_end = origin[1] + vector.imag
+# Calcula os fasores e plota o diagrama interativo
+def calcular_e_plotar_interativo(parametros):
+    """
+    Cria um diagrama fasorial interativo com base nos parâmetros fornecidos.
+    """
+    fasores = calcular_regulacao(parametros)
+    return fasores["regulacao"], plotar_diagrama_interativo(parametros, fasores)
+
+# (nome, cor) dos vetores do diagrama fasorial, na ordem dos traços e das anotações
+VETORES_DIAGRAMA = (
+    ("V₂ (Carga)", "blue"),     # Tensão da carga
+    ("I₂", "green"),            # Corrente (escalada)
+    ("I₂Rₑq", "red"),           # Queda resistiva
+    ("I₂Xₑq", "purple"),        # Queda reativa
+    ("V₂₀ (Vazio)", "cyan"),    # Tensão a vazio
+)
+
+# Estrutura do diagrama fasorial interativo (traços, anotações e layout), validada uma única vez
+def _estrutura_diagrama_interativo(_variante=None):
+    fig = go.Figure()
 
-        # Adiciona o vetor como uma linha com marcador
+    # Cada vetor: uma linha com marcador e uma anotação de texto sobre ela
+    for name, color in VETORES_DIAGRAMA:
         fig.add_trace(
             go.Scatter(
-                x=[origin[0], x_end],
-                y=[origin[1], y_end],
+                x=[0, 1],
+                y=[0, 1],
                 mode="lines+markers",
                 name=name,
                 line=dict(color=color, width=3),
                 marker=dict(symbol="arrow-up", size=10, angleref="previous"),
-                hovertemplate=f"<b>{name}</b><br>Magnitude: {abs(vector):.1f} V<br>Ângulo: {np.degrees(cmath.phase(vector)):.1f}°",
+                hovertemplate=f"<b>{name}</b>",
                 showlegend=True
             )
         )
-
-        # Anotação de texto sobre o vetor
         fig.add_annotation(
-            x=(origin[0] + x_end) / 2,
-            y=(origin[1] + y_end) / 2,
+            x=0.5,
+            y=0.5,
             text=name,
             showarrow=False,
             font=dict(size=12, color=color),
@@ -87,18 +115,9 @@ def calcular_e_plotar_interativo(parametros):
             bordercolor=color
         )
 
-    # Adiciona os vetores fasoriais relevantes ao gráfico
-    add_vector(fig, [0, 0], V2_fasor, "V₂ (Carga)", "blue")  # Tensão da carga
-    add_vector(fig, [0, 0], I2_fasor * (V2 / (3 * I2)), "I₂", "green")  # Corrente (escalada)
-    add_vector(fig, [V2_fasor.real, V2_fasor.imag], I2_fasor * R_eq, "I₂Rₑq", "red")  # Queda resistiva
-    add_vector(fig,
-               [V2_fasor.real + (I2_fasor * R_eq).real, V2_fasor.imag + (I2_fasor * R_eq).imag],
-               I2_fasor * 1j * X_eq, "I₂Xₑq", "purple")  # Queda reativa
-    add_vector(fig, [0, 0], V20_fasor, "V₂₀ (Vazio)", "cyan")  # Tensão a vazio
-
     # Configurações visuais do gráfico
     fig.update_layout(
-        title=f"Diagrama Fasorial Interativo - FP {cos_phi} {tipo_fp}<br>Regulação: {regulacao:.2f}%",
+        title="Diagrama Fasorial Interativo",
         xaxis_title="Componente Real (V)",
         yaxis_title="Componente Imaginária (V)",
         template="plotly_white",
@@ -116,13 +135,201 @@ def calcular_e_plotar_interativo(parametros):
         height=800
     )
     fig.update_yaxes(scaleanchor="x", scaleratio=1)  # Escala igual nos eixos X e Y
+    return fig
+
+MODELO_DIAGRAMA = ModeloFigura(_estrutura_diagrama_interativo)
 
-    return regulacao, fig
+# Monta o diagrama fasorial a partir de fasores já calculados
+def plotar_diagrama_interativo(parametros, fasores):
+    """
+    Cria a figura Plotly do diagrama fasorial para um ponto de operação.
+    A estrutura vem de MODELO_DIAGRAMA: aqui só entram coordenadas, hover e título
+    (o retorno tem write_html/to_html como uma go.Figure).
+    """
+    V2 = parametros['V2']
+    I2 = parametros['I2']
+    R_eq = parametros['R_eq']
+    X_eq = parametros['X_eq']
+    cos_phi = parametros['cos_phi']
+    tipo_fp = parametros['tipo_fp']
+    V2_fasor = fasores["V2_fasor"]
+    I2_fasor = fasores["I2_fasor"]
+    V20_fasor = fasores["V20_fasor"]
+    regulacao = fasores["regulacao"]
+
+    # (origem, vetor) na ordem de VETORES_DIAGRAMA
+    queda_R = I2_fasor * R_eq
+    # Corrente desenhada com 1/3 do comprimento de V₂; a vazio (I₂ = 0) o vetor é nulo
+    escala_I = V2 / (3 * I2) if I2 else 0.0
+    vetores = (
+        ([0, 0], V2_fasor),
+        ([0, 0], I2_fasor * escala_I),
+        ([V2_fasor.real, V2_fasor.imag], queda_R),
+        ([V2_fasor.real + queda_R.real, V2_fasor.imag + queda_R.imag], I2_fasor * 1j * X_eq),
+        ([0, 0], V20_fasor),
+    )
+
+    campos = {("layout", "title", "text"):
+              f"Diagrama Fasorial Interativo - FP {cos_phi} {tipo_fp}<br>Regulação: {regulacao:.2f}%"}
+    for k, ((name, _), (origem, vetor)) in enumerate(zip(VETORES_DIAGRAMA, vetores)):
+        x_end = origem[0] + vetor.real
+        y_end = origem[1] + vetor.imag
+        campos[("data", k, "x")] = [origem[0], x_end]
+        campos[("data", k, "y")] = [origem[1], y_end]
+        campos[("data", k, "hovertemplate")] = (
+            f"<b>{name}</b><br>Magnitude: {abs(vetor):.1f} V<br>Ângulo: {np.degrees(cmath.phase(vetor)):.1f}°")
+        campos[("layout", "annotations", k, "x")] = (origem[0] + x_end) / 2
+        campos[("layout", "annotations", k, "y")] = (origem[1] + y_end) / 2
+
+    return MODELO_DIAGRAMA.preencher(campos)
+
+# Campos que podem ser listas (sequência de pontos de operação) no modo animado
+CAMPOS_SEQUENCIA = ('V2', 'I2', 'cos_phi', 'tipo_fp')
+
+# Calcula os fasores de vários pontos de operação de uma só vez
+def calcular_regulacao_vetorizado(parametros):
+    """
+    Mesmo cálculo de calcular_regulacao para sequências de pontos de operação.
+    V2, I2, cos_phi e tipo_fp podem ser listas (de mesmo tamanho) ou valores únicos;
+    os fasores são retornados como arrays complexos.
+    """
+    V2, I2, cos_phi, tipo_fp = np.broadcast_arrays(
+        np.asarray(parametros['V2'], dtype=float),
+        np.asarray(parametros['I2'], dtype=float),
+        np.asarray(parametros['cos_phi'], dtype=float),
+        np.asarray(parametros['tipo_fp'])
+    )
+    Z_eq = parametros['R_eq'] + 1j * parametros['X_eq']
+
+    phi = np.arccos(cos_phi)
+    angulo_corrente = np.where(tipo_fp == 'adiantado', phi, -phi)
+
+    V2_fasor = V2.astype(complex)
+    I2_fasor = I2 * np.exp(1j * angulo_corrente)
+    queda_R = I2_fasor * parametros['R_eq']         # I₂·Req
+    queda_X = I2_fasor * 1j * parametros['X_eq']    # I₂·jXeq
+    V20_fasor = V2_fasor + I2_fasor * Z_eq
+    V20 = np.abs(V20_fasor)
+
+    return {
+        "V2": V2, "I2": I2, "cos_phi": cos_phi, "tipo_fp": tipo_fp,
+        "V2_fasor": V2_fasor,
+        "I2_fasor": I2_fasor,
+        "queda_R": queda_R,
+        "queda_X": queda_X,
+        "V20_fasor": V20_fasor,
+        "V20": V20,
+        "regulacao": (V20 - V2) / V2 * 100
+    }
+
+# Diagrama fasorial com um quadro de animação por ponto de operação
+def plotar_diagrama_animado(fasores):
+    """
+    Cria uma única figura Plotly com os vetores V₂, I₂, I₂Rₑq, I₂Xₑq e V₂₀ animados
+    ao longo dos pontos de operação, com botões de reprodução e um slider.
+    Os eixos são fixos para que o movimento dos fasores fique visível.
+    """
+    V2_fasor, I2_fasor = fasores["V2_fasor"], fasores["I2_fasor"]
+    queda_R, queda_X, V20_fasor = fasores["queda_R"], fasores["queda_X"], fasores["V20_fasor"]
+    n = V2_fasor.size
+
+    # Corrente em escala única (a maior corrente vira 1/3 da maior tensão), para comparar os quadros
+    escala_I = np.abs(V2_fasor).max() / (3 * max(np.abs(I2_fasor).max(), 1e-12))
+
+    # (nome, cor, origem, vetor): arrays de tamanho n
+    zeros = np.zeros(n, dtype=complex)
+    vetores = (
+        ("V₂ (Carga)", "blue", zeros, V2_fasor),
+        ("I₂", "green", zeros, I2_fasor * escala_I),
+        ("I₂Rₑq", "red", V2_fasor, queda_R),
+        ("I₂Xₑq", "purple", V2_fasor + queda_R, queda_X),
+        ("V₂₀ (Vazio)", "cyan", zeros, V20_fasor),
+    )
+    # Magnitude exibida no hover (a corrente em A, sem a escala do desenho)
+    magnitudes = (np.abs(V2_fasor), np.abs(I2_fasor), np.abs(queda_R), np.abs(queda_X), np.abs(V20_fasor))
+    unidades = ("V", "A", "V", "V", "V")
+    angulos = [np.degrees(np.angle(v)) for _, _, _, v in vetores]
+
+    # Dados de cada quadro como dicionários simples: a figura valida tudo uma única vez
+    def tracos(k):
+        return [
+            dict(
+                type="scatter",
+                x=[origem[k].real, origem[k].real + vetor[k].real],
+                y=[origem[k].imag, origem[k].imag + vetor[k].imag],
+                text=[nome, f"{magnitudes[j][k]:.1f} {unidades[j]} ∠ {angulos[j][k]:.1f}°"]
+            )
+            for j, (nome, _, origem, vetor) in enumerate(vetores)
+        ]
+
+    def rotulo(k):
+        return f"I₂ = {fasores['I2'][k]:.1f} A, FP {fasores['cos_phi'][k]:.2f} {fasores['tipo_fp'][k]}"
+
+    def titulo(k):
+        return f"Diagrama Fasorial - {rotulo(k)}<br>Regulação: {fasores['regulacao'][k]:.2f}%"
+
+    # Primeiro quadro completo; os demais só trocam coordenadas, textos e título
+    fig = go.Figure(
+        data=[
+            dict(traco, mode="lines+markers", name=nome,
+                 hovertemplate=f"<b>{nome}</b><br>%{{text}}<extra></extra>",
+                 line=dict(color=cor, width=3),
+                 marker=dict(symbol="arrow-up", size=10, angleref="previous"))
+            for traco, (nome, cor, _, _) in zip(tracos(0), vetores)
+        ],
+        frames=[dict(name=str(k), data=tracos(k), layout=dict(title=dict(text=titulo(k))))
+                for k in range(n)]
+    )
+
+    # Limites fixos que contêm todos os vetores de todos os quadros
+    pontos = np.concatenate([np.concatenate([origem, origem + vetor]) for _, _, origem, vetor in vetores])
+    margem = 0.05 * max(np.ptp(pontos.real), np.ptp(pontos.imag), 1e-9)
+    faixa_x = [pontos.real.min() - margem, pontos.real.max() + margem]
+    faixa_y = [pontos.imag.min() - margem, pontos.imag.max() + margem]
+
+    animacao = dict(frame=dict(duration=300, redraw=True), transition=dict(duration=150), mode="immediate")
+    fig.update_layout(
+        title=titulo(0),
+        xaxis=dict(title="Componente Real (V)", range=faixa_x, autorange=False),
+        yaxis=dict(title="Componente Imaginária (V)", range=faixa_y, autorange=False,
+                   scaleanchor="x", scaleratio=1),
+        template="plotly_white",
+        hovermode="closest",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1,
+                    bgcolor="rgba(255,255,255,0.5)"),
+        margin=dict(l=50, r=50, b=50, t=100),
+        width=900,
+        height=850,
+        updatemenus=[dict(
+            type="buttons", direction="left", x=0, y=-0.08, xanchor="left", yanchor="top",
+            buttons=[
+                dict(label="▶", method="animate", args=[None, dict(animacao, fromcurrent=True)]),
+                dict(label="❚❚", method="animate",
+                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")])
+            ]
+        )],
+        sliders=[dict(
+            active=0, x=0.1, len=0.9, y=-0.08, yanchor="top",
+            currentvalue=dict(prefix="Ponto: "),
+            steps=[dict(label=str(k + 1), method="animate",
+                        args=[[str(k)], dict(animacao, frame=dict(duration=0, redraw=True))])
+                   for k in range(n)]
+        )]
+    )
+    return fig
+
+# Calcula todos os pontos de operação e monta o diagrama animado
+def calcular_e_plotar_animado(parametros):
+    """
+    Versão de calcular_e_plotar_interativo para uma sequência de cargas e fatores de potência.
+    """
+    fasores = calcular_regulacao_vetorizado(parametros)
+    return fasores["regulacao"], plotar_diagrama_animado(fasores)
 
 # Gera um JSON de exemplo se ele não existir ainda
 def gerar_arquivo_json_exemplo(caminho='parametros_transformador.json'):
     """Gera um arquivo JSON de exemplo se não existir"""
-    if True:
+    if not Path(caminho).exists():
         dados_exemplo = {
         "V2": 2400,
         "I2": 20.8,
@@ -133,44 +340,80 @@ def gerar_arquivo_json_exemplo(caminho='parametros_transformador.json'):
         }
         with open(caminho, 'w') as f:
             json.dump(dados_exemplo, f, indent=4)
-        print(f"Arquivo de exemplo criado: {caminho}")
+        logger.info("Arquivo de exemplo criado: %s", caminho, extra={"evento": "arquivo_salvo"})
 
 # Executa todas as etapas do desafio 4
-def executar_desafio4(caminho_json='parametros_transformador.json'):
+def executar_desafio4(caminho_json='parametros_transformador.json', renderizar=True):
     """
     Função principal que executa todo o fluxo do desafio 4.
+    Aceita o caminho do arquivo JSON ou os parâmetros já em um dicionário.
     """
-    # Garante que o arquivo JSON de exemplo existe
-    gerar_arquivo_json_exemplo(caminho_json)
+    if isinstance(caminho_json, dict):
+        parametros = caminho_json
+    else:
+        # Garante que o arquivo JSON de exemplo existe
+        gerar_arquivo_json_exemplo(caminho_json)
 
-    # Lê os parâmetros do arquivo
-    parametros = ler_parametros_json(caminho_json)
+        # Lê os parâmetros do arquivo
+        parametros = ler_parametros_json(caminho_json)
     if parametros is None:
         return None
 
+    # Listas em V2, I2, cos_phi ou tipo_fp: vários pontos de operação em um único diagrama animado
+    if any(isinstance(parametros.get(campo), list) for campo in CAMPOS_SEQUENCIA):
+        return executar_sequencia(parametros, renderizar)
+
     # Realiza cálculos e gera o gráfico
     try:
-        regulacao, fig = calcular_e_plotar_interativo(parametros)
+        fasores = calcular_regulacao(parametros)
+        regulacao = fasores["regulacao"]
 
-        # Mostra os resultados no terminal
-        print("\nResultados:")
-        print(f"- Tensão secundário (V2): {parametros['V2']} V")
-        print(f"- Corrente secundário (I2): {parametros['I2']} A")
-        print(f"- Fator de potência: {parametros['cos_phi']} {parametros['tipo_fp']}")
-        print(f"\nRegulação calculada: {regulacao:.2f}%")
+        logger.info("Regulação calculada: %.2f%%", regulacao, extra={
+            "evento": "regulacao", "V2": parametros['V2'], "I2": parametros['I2'],
+            "cos_phi": parametros['cos_phi'], "tipo_fp": parametros['tipo_fp']})
 
         # Salva o gráfico em um arquivo HTML
-        caminho_html = "diagrama_fasorial.html"
-        fig.write_html(caminho_html)
-        print(f"Gráfico salvo em: {caminho_html}")
+        caminho_html = None
+        if renderizar:
+            with memoria.etapa("desafio4.diagrama"):
+                caminho_html = salvar_artefato("diagrama_fasorial.html",
+                                               plotar_diagrama_interativo(parametros, fasores).write_html)
+            logger.info("Gráfico salvo em: %s", caminho_html, extra={"evento": "arquivo_salvo"})
+
+        return ResultadoDesafio4(regulacao, caminho_html, fasores["V20"])
+    except Exception as e:
+        logger.exception("Erro durante os cálculos: %s", e)
+        return None
+
+# Executa o desafio 4 para uma sequência de pontos de operação
+def executar_sequencia(parametros, renderizar=True):
+    """
+    Calcula a regulação de todos os pontos em uma passada vetorizada e, se pedido,
+    grava um único HTML com o diagrama animado.
+    """
+    try:
+        fasores = calcular_regulacao_vetorizado(parametros)
+
+        logger.info("Regulação calculada para %d pontos de operação: %.2f%% a %.2f%%",
+                    fasores['regulacao'].size, fasores['regulacao'].min(), fasores['regulacao'].max(),
+                    extra={"evento": "regulacao"})
 
-        return regulacao, caminho_html
+        caminho_html = None
+        if renderizar:
+            with memoria.etapa("desafio4.diagrama_animado"):
+                caminho_html = salvar_artefato("diagrama_fasorial.html", plotar_diagrama_animado(fasores).write_html)
+            logger.info("Gráfico salvo em: %s", caminho_html, extra={"evento": "arquivo_salvo"})
+
+        return ResultadoDesafio4(fasores["regulacao"].tolist(), caminho_html, fasores["V20"].tolist())
     except Exception as e:
-        print(f"Erro durante os cálculos: {str(e)}")
+        logger.exception("Erro durante os cálculos: %s", e)
         return None
 
 # Execução direta se o script for executado como principal
 if __name__ == "__main__":
+    import registro
+    registro.configurar()  # Mostra os resultados registrados no terminal
+
     # Executa o desafio completo
     resultado = executar_desafio4()
 
@@ -0,0 +1,205 @@
+# Ensaios de bancada: reduz capturas brutas de v(t) e i(t) às medições Va/Ia/Pa/Vb/Ib/Pb do desafio 3
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from desafio2 import atualizar_parametros
+from desafio3 import executar_desafio3
+from resultados import MedicaoBancada, ResultadoBancada
+
+# Parâmetros do TransformadorMonofasico que não são medições
+CONFIGURACAO = ("N1", "N2", "circuit_type", "referred_to", "sec_type")
+
+# Descrição padrão de um arquivo de captura: amostras intercaladas (v, i) em int16 sem cabeçalho
+CAPTURA_PADRAO = {
+    "taxa_amostragem": 50000,  # Amostras por segundo, por canal
+    "formato": "<i2",          # dtype NumPy das amostras (ex.: "<i2", "<i4", "<f4")
+    "canais": 2,               # Canais intercalados por instante
+    "canal_tensao": 0,
+    "canal_corrente": 1,
+    "escala_tensao": 1.0,      # V por unidade do conversor
+    "escala_corrente": 1.0,    # A por unidade do conversor
+    "deslocamento": 0,         # Bytes de cabeçalho antes da primeira amostra
+}
+
+# Amostras (por canal) lidas do disco a cada bloco
+AMOSTRAS_POR_BLOCO = 1 << 21
+
+
+def abrir_captura(arquivo, formato="<i2", canais=2, deslocamento=0):
+    """
+    Mapeia o arquivo em memória como uma matriz (amostras, canais) sem lê-lo:
+    arquivos .npy usam o próprio cabeçalho, os demais são binário bruto.
+    """
+    arquivo = Path(arquivo)
+    if not arquivo.exists():
+        raise FileNotFoundError(f"Captura '{arquivo}' não encontrada")
+    if arquivo.suffix.lower() == ".npy":
+        dados = np.load(arquivo, mmap_mode="r")
+        return dados.reshape(len(dados), -1)
+    tipo = np.dtype(formato)
+    amostras = (arquivo.stat().st_size - deslocamento) // (tipo.itemsize * canais)
+    if amostras <= 0:
+        raise ValueError(f"Captura '{arquivo}' não contém amostras")
+    return np.memmap(arquivo, dtype=tipo, mode="r", offset=deslocamento, shape=(amostras, canais))
+
+
+class AnalisadorJanelas:
+    """
+    Divide a captura em janelas de um número inteiro de ciclos e calcula, por janela,
+    valores eficazes, potência ativa e os fasores fundamentais (DFT de uma única raia).
+
+    Os blocos lidos do disco têm um número inteiro de janelas e são remodelados para
+    (janelas, amostras): somas de quadrados e produtos viram einsum, e a DFT da
+    fundamental vira um único produto matriz × [cos, sen] resolvido pelo BLAS.
+    """
+
+    def __init__(self, taxa_amostragem, freq, ciclos_por_janela=10):
+        self.taxa_amostragem = float(taxa_amostragem)
+        self.freq = float(freq)
+        self.amostras_janela = int(round(ciclos_por_janela * self.taxa_amostragem / self.freq))
+        if self.amostras_janela < 4:
+            raise ValueError("Janela muito curta: aumente ciclos_por_janela ou a taxa de amostragem")
+        # Base da DFT na frequência fundamental, com a duração real da janela (em amostras inteiras)
+        fase = 2 * np.pi * self.freq / self.taxa_amostragem * np.arange(self.amostras_janela)
+        self.base = np.stack([np.cos(fase), -np.sin(fase)], axis=1) * (np.sqrt(2) / self.amostras_janela)
+
+    def _fasores(self, sinal):
+        # Fasor eficaz com o seno como referência: √2/n · Σ x[k]·e^{-jωk} vale -j·X, daí o fator j
+        reim = sinal @ self.base
+        return (reim[:, 0] + 1j * reim[:, 1]) * 1j
+
+    def analisar(self, captura, canal_tensao=0, canal_corrente=1, escala_tensao=1.0, escala_corrente=1.0,
+                 amostras_por_bloco=AMOSTRAS_POR_BLOCO):
+        """Percorre a captura em blocos e devolve a MedicaoBancada com os valores por janela"""
+        n = self.amostras_janela
+        janelas = len(captura) // n
+        if janelas == 0:
+            raise ValueError(f"Captura com {len(captura)} amostras é menor que uma janela ({n} amostras)")
+        por_bloco = max(1, amostras_por_bloco // n)
+
+        tensao_eficaz = np.empty(janelas)
+        corrente_eficaz = np.empty(janelas)
+        potencia = np.empty(janelas)
+        tensao_fundamental = np.empty(janelas, dtype=complex)
+        corrente_fundamental = np.empty(janelas, dtype=complex)
+
+        for inicio in range(0, janelas, por_bloco):
+            fim = min(inicio + por_bloco, janelas)
+            bloco = captura[inicio * n:fim * n]
+            # Conversão para float64 já em escala física; só as colunas usadas são copiadas
+            v = np.multiply(bloco[:, canal_tensao], escala_tensao, dtype=float).reshape(fim - inicio, n)
+            i = np.multiply(bloco[:, canal_corrente], escala_corrente, dtype=float).reshape(fim - inicio, n)
+            tensao_eficaz[inicio:fim] = np.sqrt(np.einsum("jk,jk->j", v, v) / n)
+            corrente_eficaz[inicio:fim] = np.sqrt(np.einsum("jk,jk->j", i, i) / n)
+            potencia[inicio:fim] = np.einsum("jk,jk->j", v, i) / n
+            tensao_fundamental[inicio:fim] = self._fasores(v)
+            corrente_fundamental[inicio:fim] = self._fasores(i)
+
+        return MedicaoBancada(
+            janelas=janelas,
+            amostras_janela=n,
+            tensao_eficaz=tensao_eficaz,
+            corrente_eficaz=corrente_eficaz,
+            potencia=potencia,
+            tensao_fundamental=tensao_fundamental,
+            corrente_fundamental=corrente_fundamental
+        )
+
+
+def totais(medicao, grandeza="eficaz"):
+    """(V, I, P) da captura inteira: as janelas têm o mesmo tamanho, então combinam pela média dos quadrados"""
+    if grandeza == "fundamental":
+        return (
+            float(np.sqrt(np.mean(np.abs(medicao.tensao_fundamental) ** 2))),
+            float(np.sqrt(np.mean(np.abs(medicao.corrente_fundamental) ** 2))),
+            float(np.mean((medicao.tensao_fundamental * medicao.corrente_fundamental.conj()).real)),
+        )
+    return (
+        float(np.sqrt(np.mean(medicao.tensao_eficaz ** 2))),
+        float(np.sqrt(np.mean(medicao.corrente_eficaz ** 2))),
+        float(np.mean(medicao.potencia)),
+    )
+
+
+def medir(descricao, freq, ciclos_por_janela=10, captura_padrao=None):
+    """Analisa um arquivo de captura; 'descricao' sobrepõe os campos de CAPTURA_PADRAO"""
+    descricao = {**CAPTURA_PADRAO, **(captura_padrao or {}), **descricao}
+    captura = abrir_captura(descricao["arquivo"], descricao["formato"], descricao["canais"], descricao["deslocamento"])
+    analisador = AnalisadorJanelas(descricao["taxa_amostragem"], freq, ciclos_por_janela)
+    return analisador.analisar(
+        captura,
+        canal_tensao=descricao["canal_tensao"],
+        canal_corrente=descricao["canal_corrente"],
+        escala_tensao=descricao["escala_tensao"],
+        escala_corrente=descricao["escala_corrente"]
+    )
+
+
+def executar_ensaio_bancada(json_input=None, renderizar=False):
+    """
+    Mede as capturas dos dois ensaios e calcula os parâmetros do desafio 3.
+
+    Parâmetros:
+    - circuito_aberto, curto_circuito: {"arquivo": ..., campos de CAPTURA_PADRAO}
+    - captura: campos de CAPTURA_PADRAO comuns aos dois arquivos
+    - freq, ciclos_por_janela
+    - grandeza: "eficaz" (valores eficazes verdadeiros, como um wattímetro) ou
+      "fundamental" (só a componente fundamental de tensão, corrente e potência)
+    - N1, N2, circuit_type, referred_to, sec_type: como no desafio 3
+    """
+    parametros = atualizar_parametros({
+        "circuito_aberto": None,
+        "curto_circuito": None,
+        "captura": None,
+        "freq": 60,
+        "ciclos_por_janela": 10,
+        "grandeza": "eficaz"
+    }, json_input)
+    if parametros["grandeza"] not in ("eficaz", "fundamental"):
+        raise ValueError("grandeza deve ser 'eficaz' ou 'fundamental'")
+
+    medicoes = {}
+    for ensaio in ("circuito_aberto", "curto_circuito"):
+        if not parametros[ensaio]:
+            raise ValueError(f"Informe a captura do ensaio de {ensaio.replace('_', ' ')}")
+        medicoes[ensaio] = medir(parametros[ensaio], parametros["freq"], parametros["ciclos_por_janela"],
+                                 parametros["captura"])
+
+    # Ensaio de curto-circuito → Va/Ia/Pa, ensaio de circuito aberto → Vb/Ib/Pb
+    ensaios = {}
+    for ensaio, sufixo in (("curto_circuito", "a"), ("circuito_aberto", "b")):
+        tensao, corrente, potencia = totais(medicoes[ensaio], parametros["grandeza"])
+        ensaios["V" + sufixo], ensaios["I" + sufixo], ensaios["P" + sufixo] = tensao, corrente, potencia
+
+    configuracao = {nome: parametros[nome] for nome in CONFIGURACAO if nome in parametros}
+    return ResultadoBancada(
+        medicoes=medicoes,
+        ensaios=ensaios,
+        parametros=executar_desafio3({**configuracao, **ensaios}, renderizar=renderizar)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extrai Va/Ia/Pa/Vb/Ib/Pb de capturas de bancada e calcula o circuito equivalente")
+    parser.add_argument("entrada", help="arquivo JSON com as capturas e a configuração do transformador")
+    parser.add_argument("--renderizar", action="store_true", help="gera o relatório e o diagrama fasorial do desafio 3")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    resultado = executar_ensaio_bancada(args.entrada, renderizar=args.renderizar)
+    duracao = time.perf_counter() - inicio
+
+    amostras = sum(m.janelas * m.amostras_janela for m in resultado.medicoes.values())
+    print(json.dumps(resultado.para_json()["ensaios"], indent=2))
+    print(json.dumps(resultado.parametros.para_json()["parametros"], indent=2))
+    print(f"{amostras} amostras por canal em {duracao:.2f} s ({amostras / duracao / 1e6:.1f} M amostras/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+# Escalonador de admissão: faixas por classe (leve/pesada), enfileiramento justo ponderado e concorrência por faixa
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Cálculos executando ao mesmo tempo, somando todas as faixas
+TOTAL_PADRAO = int(os.environ.get("ESCALONADOR_TOTAL", 0)) or os.cpu_count() or 4
+
+# Faixas padrão:
+# - peso: parcela do serviço quando as duas faixas têm fila (enfileiramento justo ponderado)
+# - concorrencia: cálculos simultâneos da faixa; com mais de uma vaga no total a pesada
+#   nunca ocupa todas, então sempre sobra vaga para a leve
+# - fila_max: pedidos aguardando; acima disso o pedido é recusado na hora
+# - espera_max_s: tempo máximo na fila antes de desistir
+FAIXAS_PADRAO = {
+    "leve": {"classes": ["desafio3", "desafio4"], "peso": 4, "concorrencia": TOTAL_PADRAO,
+             "fila_max": 1000, "espera_max_s": 30},
+    "pesada": {"classes": ["desafio1", "desafio2", "inrush", "simulacao_carga", "incerteza", "pipeline"],
+               "peso": 1, "concorrencia": max(1, TOTAL_PADRAO // 2), "fila_max": 200, "espera_max_s": 60},
+}
+
+# Classes fora de todas as listas
+FAIXA_PADRAO = "pesada"
+
+# Custo inicial estimado (ms) antes das primeiras medições; depois vale a média móvel
+CUSTO_INICIAL_MS = {"desafio3": 5, "desafio4": 5, "desafio1": 100, "desafio2": 500, "inrush": 200,
+                    "simulacao_carga": 200, "incerteza": 1000, "pipeline": 500}
+
+# Peso da última medição na média móvel exponencial do custo
+SUAVIZACAO = 0.2
+
+# Esperas guardadas por faixa para os percentis
+AMOSTRAS_ESPERA = 1024
+
+
+def _carregar_faixas():
+    """ESCALONADOR (JSON {faixa: {campo: valor}}) sobrepõe as faixas padrão"""
+    faixas = {nome: dict(valores) for nome, valores in FAIXAS_PADRAO.items()}
+    extras = os.environ.get("ESCALONADOR", "")
+    if extras:
+        for nome, valores in json.loads(extras).items():
+            faixas.setdefault(nome, {"classes": []}).update(valores)
+            if "classes" in valores:
+                # Uma classe movida para esta faixa sai das demais
+                for outra, outros in faixas.items():
+                    if outra != nome:
+                        outros["classes"] = [c for c in outros.get("classes", ()) if c not in valores["classes"]]
+    return faixas
+
+
+class FilaCheia(RuntimeError):
+    """Pedido recusado na chegada: fila da faixa cheia"""
+
+
+class EsperaEsgotada(TimeoutError):
+    """Pedido desistiu depois de aguardar espera_max_s na fila da faixa"""
+
+
+class _Pedido:
+    __slots__ = ("classe", "faixa", "etiqueta", "chegada", "evento", "admitido")
+
+    def __init__(self, classe, faixa):
+        self.classe = classe
+        self.faixa = faixa
+        self.etiqueta = 0.0
+        self.chegada = time.monotonic()
+        self.evento = threading.Event()
+        self.admitido = False
+
+
+class Faixa:
+    __slots__ = ("nome", "peso", "concorrencia", "fila_max", "espera_max_s", "fila", "em_execucao",
+                 "ultima_etiqueta", "etiqueta_admitida", "admitidos", "concluidos", "recusados", "desistencias", "esperas",
+                 "execucao_ms")
+
+    def __init__(self, nome, peso=1, concorrencia=1, fila_max=100, espera_max_s=60, **_):
+        self.nome = nome
+        self.peso = float(peso)
+        self.concorrencia = max(1, int(concorrencia))
+        self.fila_max = int(fila_max)
+        self.espera_max_s = float(espera_max_s) if espera_max_s else None
+        self.fila = deque()
+        self.em_execucao = 0
+        self.ultima_etiqueta = 0.0
+        self.etiqueta_admitida = 0.0  # Do último pedido admitido (na faixa elas crescem na ordem da fila)
+        self.admitidos = 0
+        self.concluidos = 0
+        self.recusados = 0
+        self.desistencias = 0
+        self.esperas = deque(maxlen=AMOSTRAS_ESPERA)  # ms
+        self.execucao_ms = 0.0
+
+
+def _percentil(ordenados, fracao):
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(fracao * len(ordenados)))]
+
+
+class Escalonador:
+    """
+    Admissão dos cálculos por faixa. Cada pedido recebe uma etiqueta de término
+    virtual (início = maior entre o tempo virtual e a última etiqueta da faixa;
+    término = início + custo estimado da classe / peso da faixa); o tempo virtual é a
+    etiqueta do último pedido admitido (autorregulado, sem relógio). Quando há vaga,
+    é admitido o primeiro da fila de menor etiqueta entre as faixas abaixo da
+    própria concorrência: uma rajada de cálculos pesados não atrasa os leves além
+    da sua parcela de peso, e a faixa pesada não ocupa as vagas reservadas à leve.
+    """
+
+    def __init__(self, faixas=None, total=TOTAL_PADRAO):
+        faixas = faixas or _carregar_faixas()
+        self.total = max(1, int(total))
+        self.faixas = {nome: Faixa(nome, **valores) for nome, valores in faixas.items()}
+        self._faixa_da_classe = {classe: nome for nome, valores in faixas.items()
+                                 for classe in valores.get("classes", ())}
+        self._custos_ms = dict(CUSTO_INICIAL_MS)
+        self._tempo_virtual = 0.0
+        self._em_execucao = 0
+        self._trava = threading.Lock()
+
+    def faixa(self, classe):
+        return self.faixas[self._faixa_da_classe.get(classe, FAIXA_PADRAO)]
+
+    @contextmanager
+    def admitir(self, classe):
+        """Aguarda a vez do pedido na faixa da classe e ocupa uma vaga durante o bloco"""
+        pedido = self._entrar(classe)
+        inicio = time.monotonic()
+        try:
+            yield pedido.faixa.nome
+        finally:
+            self._sair(pedido, (time.monotonic() - inicio) * 1000)
+
+    def _entrar(self, classe):
+        faixa = self.faixa(classe)
+        pedido = _Pedido(classe, faixa)
+        with self._trava:
+            etiqueta_anterior = faixa.ultima_etiqueta
+            inicio_virtual = max(self._tempo_virtual, faixa.ultima_etiqueta)
+            pedido.etiqueta = faixa.ultima_etiqueta = inicio_virtual + self._custos_ms.get(classe, 100) / faixa.peso
+            faixa.fila.append(pedido)
+            self._despachar()
+            # Sem vaga imediata e com a fila já no limite: recusa na hora (o pedido é o último da fila)
+            if not pedido.admitido and len(faixa.fila) > faixa.fila_max:
+                faixa.fila.pop()
+                faixa.ultima_etiqueta = etiqueta_anterior
+                faixa.recusados += 1
+                raise FilaCheia(f"Fila da faixa '{faixa.nome}' cheia ({faixa.fila_max} pedidos); tente mais tarde")
+
+        if not pedido.evento.wait(faixa.espera_max_s):
+            with self._trava:
+                # A vaga pode ter sido concedida junto com o fim da espera
+                if not pedido.admitido:
+                    ultimo = faixa.fila[-1] is pedido
+                    faixa.fila.remove(pedido)
+                    # O custo de quem desistiu sai da etiqueta da faixa: os próximos não herdam o atraso
+                    if ultimo:
+                        faixa.ultima_etiqueta = faixa.fila[-1].etiqueta if faixa.fila else faixa.etiqueta_admitida
+                    faixa.desistencias += 1
+                    raise EsperaEsgotada(f"{classe}: mais de {faixa.espera_max_s:g} s na fila da faixa "
+                                         f"'{faixa.nome}'; servidor ocupado")
+        return pedido
+
+    def _despachar(self):
+        """Ocupa as vagas livres com os pedidos de menor etiqueta (chamada com _trava)"""
+        while self._em_execucao < self.total:
+            elegiveis = [f for f in self.faixas.values() if f.fila and f.em_execucao < f.concorrencia]
+            if not elegiveis:
+                return
+            faixa = min(elegiveis, key=lambda f: f.fila[0].etiqueta)
+            pedido = faixa.fila.popleft()
+            # Monotônico: o limite de concorrência pode admitir uma etiqueta maior antes de uma menor
+            self._tempo_virtual = max(self._tempo_virtual, pedido.etiqueta)
+            faixa.etiqueta_admitida = pedido.etiqueta
+            faixa.em_execucao += 1
+            faixa.admitidos += 1
+            faixa.esperas.append((time.monotonic() - pedido.chegada) * 1000)
+            self._em_execucao += 1
+            pedido.admitido = True
+            pedido.evento.set()
+
+    def _sair(self, pedido, duracao_ms):
+        with self._trava:
+            faixa = pedido.faixa
+            faixa.em_execucao -= 1
+            faixa.concluidos += 1
+            faixa.execucao_ms += duracao_ms
+            self._em_execucao -= 1
+            custo = self._custos_ms.get(pedido.classe)
+            self._custos_ms[pedido.classe] = duracao_ms if custo is None else custo + SUAVIZACAO * (duracao_ms - custo)
+            self._despachar()
+
+    def estatisticas(self):
+        """Por faixa: configuração, ocupação, contadores e percentis da espera na fila (ms)"""
+        with self._trava:
+            faixas = {}
+            for nome, faixa in self.faixas.items():
+                esperas = sorted(faixa.esperas)
+                faixas[nome] = {
+                    "classes": sorted(c for c, f in self._faixa_da_classe.items() if f == nome),
+                    "peso": faixa.peso,
+                    "concorrencia": faixa.concorrencia,
+                    "em_execucao": faixa.em_execucao,
+                    "na_fila": len(faixa.fila),
+                    "admitidos": faixa.admitidos,
+                    "concluidos": faixa.concluidos,
+                    "recusados": faixa.recusados,
+                    "desistencias": faixa.desistencias,
+                    "execucao_media_ms": round(faixa.execucao_ms / max(faixa.concluidos, 1), 2),
+                    "espera_ms": {
+                        "p50": round(_percentil(esperas, 0.50), 3),
+                        "p95": round(_percentil(esperas, 0.95), 3),
+                        "p99": round(_percentil(esperas, 0.99), 3),
+                        "max": round(esperas[-1], 3) if esperas else 0.0,
+                        "amostras": len(esperas),
+                    },
+                }
+            return {
+                "total": self.total,
+                "em_execucao": self._em_execucao,
+                "faixas": faixas,
+                "custo_estimado_ms": {classe: round(custo, 2) for classe, custo in sorted(self._custos_ms.items())},
+            }
@@ -0,0 +1,411 @@
+# Esquemas declarativos dos parâmetros de cada classe, compilados uma vez e checados antes de qualquer cálculo
+import math
+
+import catalogos
+
+TIPOS_TRANSFORMADOR = (
+    "Transformador de um primário e um secundário",
+    "Transformador de dois primários e um secundário",
+    "Transformador de um primário e dois secundários",
+    "Transformador de dois primários e dois secundários"
+)
+
+# Instrumentos dos ensaios cuja exatidão a análise de incerteza aceita
+INSTRUMENTOS = ("Va", "Ia", "Pa", "Vb", "Ib", "Pb")
+
+
+class ErroValidacao(ValueError):
+    """Parâmetros rejeitados pelo esquema; 'detalhes' lista {campo, mensagem}"""
+
+    def __init__(self, detalhes):
+        super().__init__("Parâmetros inválidos")
+        self.detalhes = detalhes
+
+    def para_json(self):
+        return {"erro": str(self), "detalhes": self.detalhes}
+
+
+class _Invalido(Exception):
+    pass
+
+
+# === Conversores de tipo: recebem o valor bruto e devolvem o valor convertido ===
+
+def _numero(valor):
+    if isinstance(valor, bool):
+        raise _Invalido("deve ser um número")
+    if isinstance(valor, (int, float)):
+        numero = valor
+    elif isinstance(valor, str):
+        try:
+            numero = float(valor.strip().replace(",", "."))
+        except ValueError:
+            raise _Invalido("deve ser um número") from None
+    else:
+        raise _Invalido("deve ser um número")
+    if not math.isfinite(numero):
+        raise _Invalido("deve ser um número finito")
+    return numero
+
+
+def _inteiro(valor):
+    numero = _numero(valor)
+    if numero != int(numero):
+        raise _Invalido("deve ser um número inteiro")
+    return int(numero)
+
+
+def _texto(valor):
+    if not isinstance(valor, str):
+        raise _Invalido("deve ser um texto")
+    return valor
+
+
+def _booleano(valor):
+    if not isinstance(valor, bool):
+        raise _Invalido("deve ser true ou false")
+    return valor
+
+
+def _objeto(valor):
+    if not isinstance(valor, dict):
+        raise _Invalido("deve ser um objeto")
+    return valor
+
+
+def _qualquer(valor):
+    return valor
+
+
+def _lista_de(item):
+    def converter(valor):
+        if not isinstance(valor, list):
+            raise _Invalido("deve ser uma lista")
+        convertidos = []
+        for indice, elemento in enumerate(valor):
+            try:
+                convertidos.append(item(elemento))
+            except _Invalido as e:
+                raise _Invalido(f"item {indice} {e}") from None
+        return convertidos
+    return converter
+
+
+def _tensoes(valor):
+    """Tensões como "120/240", lista [120, 240] ou um único número"""
+    if isinstance(valor, str):
+        partes = [parte for parte in valor.split("/") if parte.strip()]
+        valor = partes
+    elif not isinstance(valor, list):
+        valor = [valor]
+    tensoes = _lista_de(_numero)(valor)
+    if not tensoes:
+        raise _Invalido("deve ter ao menos uma tensão")
+    for indice, tensao in enumerate(tensoes):
+        if tensao <= 0:
+            raise _Invalido(f"item {indice} deve ser > 0")
+    return tensoes
+
+
+def _exatidao(valor):
+    """{instrumento: classe (%)} ou {instrumento: {"classe": %, "fundo_escala": valor}}"""
+    convertido = {}
+    for nome, espec in _objeto(valor).items():
+        if nome not in INSTRUMENTOS:
+            raise _Invalido(f"instrumento '{nome}' desconhecido (use {', '.join(INSTRUMENTOS)})")
+        try:
+            if not isinstance(espec, dict):
+                espec = {"classe": espec}
+            desconhecidos = sorted(espec.keys() - {"classe", "fundo_escala"})
+            if desconhecidos:
+                raise _Invalido(f"campo '{desconhecidos[0]}' desconhecido (use classe e fundo_escala)")
+            item = {"classe": _numero(espec.get("classe", 0.0))}
+            if item["classe"] < 0:
+                raise _Invalido("classe deve ser >= 0")
+            if "fundo_escala" in espec:
+                item["fundo_escala"] = _numero(espec["fundo_escala"])
+                if item["fundo_escala"] <= 0:
+                    raise _Invalido("fundo_escala deve ser > 0")
+        except _Invalido as e:
+            raise _Invalido(f"{nome}: {e}") from None
+        convertido[nome] = item
+    return convertido
+
+
+def _numero_ou_lista(valor):
+    """Valor único ou sequência de valores (pontos de operação do desafio 4)"""
+    return _lista_de(_numero)(valor) if isinstance(valor, list) else _numero(valor)
+
+
+def _texto_ou_lista(valor):
+    return _lista_de(_texto)(valor) if isinstance(valor, list) else _texto(valor)
+
+
+def _renderizacoes(valor):
+    if isinstance(valor, bool):
+        return valor
+    return _lista_de(_texto)(valor)
+
+
+TIPOS = {
+    "numero": _numero,
+    "inteiro": _inteiro,
+    "texto": _texto,
+    "booleano": _booleano,
+    "objeto": _objeto,
+    "qualquer": _qualquer,
+    "tensoes": _tensoes,
+    "lista_numeros": _lista_de(_numero),
+    "lista_textos": _lista_de(_texto),
+    "numero_ou_lista": _numero_ou_lista,
+    "texto_ou_lista": _texto_ou_lista,
+    "renderizacoes": _renderizacoes,
+    "exatidao": _exatidao,
+}
+
+
+# === Esquemas: campo → especificação ===
+# tipo, obrigatorio, opcoes, minimo/maximo (inclusivos), acima_de (exclusivo), nulo (aceita null)
+# e esquema (objeto validado por outro esquema). "__regras__" lista checagens entre campos.
+
+def _regra_quantidade_tensoes(dados):
+    tipo = dados.get("tipo_transformador")
+    if tipo not in TIPOS_TRANSFORMADOR:
+        return []
+    erros = []
+    for campo, palavra in (("Vp", "primário"), ("Vs", "secundário")):
+        esperado = 2 if f"dois {palavra}s" in tipo else 1
+        if isinstance(dados.get(campo), list) and len(dados[campo]) != esperado:
+            erros.append({"campo": campo,
+                          "mensagem": f"deve ter {esperado} tensão(ões) para '{tipo}'"})
+    return erros
+
+
+def _regra_catalogos(dados):
+    """Catálogos existentes e tipo de lâmina presente no catálogo escolhido (ou no padrão)"""
+    erros = []
+    if dados.get("catalogo_fios") is not None and dados["catalogo_fios"] not in catalogos.CATALOGOS_FIOS:
+        erros.append({"campo": "catalogo_fios",
+                      "mensagem": f"deve ser um dos: {', '.join(catalogos.CATALOGOS_FIOS)}"})
+    nome = dados.get("catalogo_laminas")
+    if nome is not None and nome not in catalogos.CATALOGOS_LAMINAS:
+        erros.append({"campo": "catalogo_laminas",
+                      "mensagem": f"deve ser um dos: {', '.join(catalogos.CATALOGOS_LAMINAS)}"})
+    elif dados.get("tipo_lamina") is not None:
+        tipos = catalogos.catalogo_laminas(nome).tipos
+        if dados["tipo_lamina"] not in tipos:
+            erros.append({"campo": "tipo_lamina", "mensagem": f"deve ser um dos: {', '.join(tipos)}"})
+    return erros
+
+
+def _regra_relatorio_ensaios(dados):
+    """O relatório do fluxo completo é o dos ensaios: pedi-lo explicitamente exige 'ensaios'"""
+    renderizar = dados.get("renderizar")
+    if isinstance(renderizar, list) and "relatorio" in renderizar and not dados.get("ensaios"):
+        return [{"campo": "renderizar", "mensagem": "'relatorio' requer os ensaios em 'ensaios'"}]
+    return []
+
+
+def _regra_tamanhos_iguais(*campos):
+    def regra(dados):
+        tamanhos = {campo: len(dados[campo]) for campo in campos if isinstance(dados.get(campo), list)}
+        if len(set(tamanhos.values())) > 1:
+            return [{"campo": ", ".join(tamanhos), "mensagem": "as listas devem ter o mesmo tamanho"}]
+        return []
+    return regra
+
+
+_ENSAIOS = {
+    "N1": {"tipo": "numero", "acima_de": 0},
+    "N2": {"tipo": "numero", "acima_de": 0},
+    "Va": {"tipo": "numero", "minimo": 0},
+    "Ia": {"tipo": "numero", "minimo": 0},
+    "Pa": {"tipo": "numero", "minimo": 0},
+    "Vb": {"tipo": "numero", "minimo": 0},
+    "Ib": {"tipo": "numero", "minimo": 0},
+    "Pb": {"tipo": "numero", "minimo": 0},
+    "circuit_type": {"tipo": "texto", "opcoes": ("Serie", "T", "L")},
+    "referred_to": {"tipo": "texto", "opcoes": ("primario", "secundario")},
+    "sec_type": {"tipo": "texto", "opcoes": ("circuito-aberto", "curto-circuito")},
+}
+
+_MAGNETIZACAO = {
+    "VM": {"tipo": "numero", "acima_de": 0},
+    "N": {"tipo": "numero", "acima_de": 0},
+    "freq": {"tipo": "numero", "acima_de": 0},
+    "tempo_max": {"tipo": "numero", "acima_de": 0},
+    "material": {"tipo": "texto", "nulo": True},
+    "area_nucleo": {"tipo": "numero", "acima_de": 0, "nulo": True},
+    "comprimento_medio": {"tipo": "numero", "acima_de": 0, "nulo": True},
+}
+
+ESQUEMAS = {
+    "desafio1": {
+        "tipo_transformador": {"tipo": "texto", "obrigatorio": True, "opcoes": TIPOS_TRANSFORMADOR},
+        "Vp": {"tipo": "tensoes", "obrigatorio": True},
+        "Vs": {"tipo": "tensoes", "obrigatorio": True},
+        "Potencia": {"tipo": "numero", "obrigatorio": True, "acima_de": 0},
+        "tipo_lamina": {"tipo": "texto", "obrigatorio": True},
+        "frequencia": {"tipo": "inteiro", "acima_de": 0},
+        "catalogo_fios": {"tipo": "texto"},
+        "catalogo_laminas": {"tipo": "texto"},
+        "__regras__": (_regra_quantidade_tensoes, _regra_catalogos),
+    },
+    "desafio2": {
+        **_MAGNETIZACAO,
+        "passo": {"tipo": "numero", "acima_de": 0},
+        "amostragem": {"tipo": "texto", "opcoes": ("uniforme", "adaptativa")},
+        "tolerancia": {"tipo": "numero", "acima_de": 0, "nulo": True},
+        "materiais": {"tipo": "lista_textos", "nulo": True},
+    },
+    "desafio3": _ENSAIOS,
+    "desafio4": {
+        "V2": {"tipo": "numero_ou_lista", "obrigatorio": True, "acima_de": 0},
+        "I2": {"tipo": "numero_ou_lista", "obrigatorio": True, "minimo": 0},
+        "R_eq": {"tipo": "numero", "obrigatorio": True, "minimo": 0},
+        "X_eq": {"tipo": "numero", "obrigatorio": True, "minimo": 0},
+        "cos_phi": {"tipo": "numero_ou_lista", "obrigatorio": True, "minimo": 0, "maximo": 1},
+        "tipo_fp": {"tipo": "texto_ou_lista", "obrigatorio": True, "opcoes": ("atrasado", "adiantado")},
+        "__regras__": (_regra_tamanhos_iguais("V2", "I2", "cos_phi", "tipo_fp"),),
+    },
+    "inrush": {
+        **_MAGNETIZACAO,
+        "R": {"tipo": "numero", "minimo": 0},
+        "angulos": {"tipo": "lista_numeros"},
+        "fluxos_residuais": {"tipo": "lista_numeros"},
+        "rtol": {"tipo": "numero", "acima_de": 0},
+        "atol": {"tipo": "numero", "acima_de": 0},
+        "pontos_saida": {"tipo": "inteiro", "minimo": 0},
+    },
+    "simulacao_carga": {
+        **_MAGNETIZACAO,
+        "ensaios": {"tipo": "objeto", "esquema": "desafio3", "nulo": True},
+        "R_c": {"tipo": "numero", "acima_de": 0, "nulo": True},
+        "R_eq": {"tipo": "numero", "minimo": 0, "nulo": True},
+        "X_eq": {"tipo": "numero", "minimo": 0, "nulo": True},
+        "potencia": {"tipo": "numero_ou_lista", "minimo": 0},
+        "cos_phi": {"tipo": "numero_ou_lista", "minimo": 0, "maximo": 1},
+        "tipo_fp": {"tipo": "texto_ou_lista", "opcoes": ("atrasado", "adiantado")},
+        "pontos_por_periodo": {"tipo": "inteiro", "minimo": 8},
+        "harmonicas": {"tipo": "inteiro", "acima_de": 0},
+        "formas_de_onda": {"tipo": "booleano"},
+        "__regras__": (_regra_tamanhos_iguais("potencia", "cos_phi", "tipo_fp"),),
+    },
+    "incerteza": {
+        **_ENSAIOS,
+        "exatidao": {"tipo": "exatidao"},
+        "amostras": {"tipo": "inteiro", "acima_de": 0},
+        "distribuicao": {"tipo": "texto", "opcoes": ("uniforme", "normal")},
+        "percentis": {"tipo": "lista_numeros"},
+        "tamanho_bloco": {"tipo": "inteiro", "acima_de": 0},
+        "processos": {"tipo": "inteiro", "acima_de": 0},
+        "semente": {"tipo": "inteiro", "nulo": True},
+        "amostras_piloto": {"tipo": "inteiro", "acima_de": 0},
+    },
+    "pipeline": {
+        "projeto": {"tipo": "objeto", "obrigatorio": True, "esquema": "desafio1"},
+        "ensaios": {"tipo": "objeto", "esquema": "desafio3", "nulo": True},
+        "R_eq": {"tipo": "numero", "minimo": 0},
+        "X_eq": {"tipo": "numero", "minimo": 0},
+        "relacao_x_r": {"tipo": "numero", "minimo": 0},
+        "carga": {"tipo": "objeto", "esquema": "carga"},
+        "renderizar": {"tipo": "renderizacoes"},
+        "__regras__": (_regra_relatorio_ensaios,),
+    },
+    "carga": {
+        "V2": {"tipo": "numero", "acima_de": 0},
+        "I2": {"tipo": "numero", "minimo": 0},
+        "cos_phi": {"tipo": "numero", "minimo": 0, "maximo": 1},
+        "tipo_fp": {"tipo": "texto", "opcoes": ("atrasado", "adiantado")},
+    },
+}
+
+# Classes que podem ser pedidas em /mensagem (as demais entradas são esquemas auxiliares)
+CLASSES = ("desafio1", "desafio2", "desafio3", "desafio4", "inrush", "simulacao_carga", "incerteza", "pipeline")
+
+
+def _compilar_campo(nome, espec, compilados):
+    """Transforma a especificação de um campo em uma única função de checagem"""
+    converter = TIPOS[espec["tipo"]]
+    opcoes = espec.get("opcoes")
+    minimo, maximo, acima_de = espec.get("minimo"), espec.get("maximo"), espec.get("acima_de")
+    nulo = espec.get("nulo", False)
+    subesquema = espec.get("esquema")
+
+    def checar_escalar(valor):
+        if opcoes is not None and isinstance(valor, str) and valor not in opcoes:
+            raise _Invalido(f"deve ser um dos: {', '.join(opcoes)}")
+        if isinstance(valor, (int, float)):
+            if minimo is not None and valor < minimo:
+                raise _Invalido(f"deve ser >= {minimo}")
+            if maximo is not None and valor > maximo:
+                raise _Invalido(f"deve ser <= {maximo}")
+            if acima_de is not None and valor <= acima_de:
+                raise _Invalido(f"deve ser > {acima_de}")
+
+    def checar(valor, caminho, erros):
+        if valor is None:
+            if not nulo:
+                erros.append({"campo": caminho, "mensagem": "não pode ser nulo"})
+            return None
+        try:
+            valor = converter(valor)
+            # Limites e opções valem para cada item quando o valor é uma lista
+            for item in (valor if isinstance(valor, list) else (valor,)):
+                checar_escalar(item)
+        except _Invalido as e:
+            erros.append({"campo": caminho, "mensagem": str(e)})
+            return None
+        if subesquema is not None:
+            valor = compilados[subesquema](valor, erros, f"{caminho}.")
+        return valor
+
+    return nome, espec.get("obrigatorio", False), checar
+
+
+def _compilar(esquemas):
+    compilados = {}
+    for nome_esquema, esquema in esquemas.items():
+        campos = [_compilar_campo(nome, espec, compilados)
+                  for nome, espec in esquema.items() if nome != "__regras__"]
+        conhecidos = frozenset(nome for nome, _, _ in campos)
+        regras = esquema.get("__regras__", ())
+
+        def validar_objeto(dados, erros, prefixo="", parcial=False,
+                           campos=campos, conhecidos=conhecidos, regras=regras):
+            for chave in sorted(dados.keys() - conhecidos):
+                erros.append({"campo": f"{prefixo}{chave}", "mensagem": "campo desconhecido"})
+            saida = {}
+            for nome, obrigatorio, checar in campos:
+                if nome in dados:
+                    saida[nome] = checar(dados[nome], f"{prefixo}{nome}", erros)
+                elif obrigatorio and not parcial:
+                    erros.append({"campo": f"{prefixo}{nome}", "mensagem": "campo obrigatório"})
+            for regra in regras:
+                erros.extend({**erro, "campo": f"{prefixo}{erro['campo']}"} for erro in regra(saida))
+            return saida
+
+        compilados[nome_esquema] = validar_objeto
+    return compilados
+
+
+_VALIDADORES = _compilar(ESQUEMAS)
+
+
+def validar(classe, parametros, parcial=False):
+    """
+    Valida e converte os parâmetros da classe. Retorna os parâmetros convertidos
+    (ex.: Vp "120/240" → [120.0, 240.0]) ou lança ErroValidacao com todos os problemas.
+    parcial=True não exige os campos obrigatórios (alterações de uma sessão).
+    """
+    if classe not in CLASSES:
+        raise ErroValidacao([{"campo": "classe", "mensagem": f"deve ser um dos: {', '.join(CLASSES)}"}])
+    if parametros in (None, ""):
+        parametros = {}
+    if not isinstance(parametros, dict):
+        raise ErroValidacao([{"campo": "parametros", "mensagem": "deve ser um objeto"}])
+    erros = []
+    convertidos = _VALIDADORES[classe](parametros, erros, parcial=parcial)
+    if erros:
+        raise ErroValidacao(erros)
+    return convertidos
@@ -0,0 +1,176 @@
+# Exportação colunar dos resultados numéricos: Arrow IPC, Parquet e NPZ
+import io
+import json
+
+import numpy as np
+
+from desafio1 import TransformadorMonofasico1
+from desafio2 import calcular_desafio2
+from desafio3 import TransformadorMonofasico
+from desafio4 import calcular_regulacao_vetorizado
+from incerteza import executar_incerteza
+from inrush import executar_inrush
+from pipeline import executar_pipeline
+from simulacao_carga import executar_simulacao_carga
+from resultados import ResultadoDesafio3
+import tabela_respostas
+
+try:
+    import pyarrow as pa  # Arrow/Parquet são opcionais; NPZ funciona só com NumPy
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+FORMATOS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+    "npz": "application/octet-stream",
+}
+
+
+def _achatar(valor, prefixo="", destino=None):
+    """Transforma a estrutura aninhada de para_json em {campo.subcampo: valor}"""
+    if destino is None:
+        destino = {}
+    if hasattr(valor, "para_json"):
+        valor = valor.para_json()
+    if isinstance(valor, dict):
+        for chave, item in valor.items():
+            _achatar(item, f"{prefixo}.{chave}" if prefixo else str(chave), destino)
+    elif isinstance(valor, (list, tuple)):
+        for indice, item in enumerate(valor):
+            _achatar(item, f"{prefixo}.{indice}", destino)
+    elif valor is not None and not isinstance(valor, str) and hasattr(valor, "tolist"):
+        _achatar(valor.tolist(), prefixo, destino)
+    else:
+        # None (inclusive inf convertido por para_json) vira NaN para manter a coluna numérica
+        destino[prefixo] = float("nan") if valor is None else valor
+    return destino
+
+
+def _linha(resultado):
+    """Um resultado escalar vira uma tabela de uma linha"""
+    return {nome: np.asarray([valor]) for nome, valor in _achatar(resultado).items()}
+
+
+def _complexo(colunas, nome, valores):
+    # Arrow não tem tipo complexo: parte real e imaginária em colunas separadas
+    colunas[f"{nome}_real"] = valores.real
+    colunas[f"{nome}_imag"] = valores.imag
+
+
+def calcular_colunas(classe, parametros):
+    """
+    Calcula a classe pedida sem renderizar nada e devolve {coluna: array}.
+    Formas de onda e grades saem como os próprios arrays NumPy do cálculo.
+    """
+    if classe == "desafio1":
+        transformador = TransformadorMonofasico1()
+        if not transformador.carregar_dados(parametros):
+            raise ValueError("Parâmetros de projeto inválidos")
+        tabela_respostas.calcular_projeto(transformador)
+        return _linha(transformador.gerar_resultado())
+
+    if classe == "desafio2":
+        return calcular_desafio2(parametros).colunas()
+
+    if classe == "desafio3":
+        tf = TransformadorMonofasico(**parametros) if parametros else TransformadorMonofasico()
+        tf.processar_ensaios()
+        return _linha(ResultadoDesafio3(tf.Rc, tf.Xm, tf.Zphi, tf.Ic, tf.Im, tf.Req, tf.Xeq, tf.Zcc)
+                      .para_json()["parametros"])
+
+    if classe == "desafio4":
+        fasores = calcular_regulacao_vetorizado(parametros)
+        colunas = {nome: np.atleast_1d(fasores[nome])
+                   for nome in ("V2", "I2", "cos_phi", "tipo_fp", "V20", "regulacao")}
+        for nome in ("I2_fasor", "V20_fasor"):
+            _complexo(colunas, nome, np.atleast_1d(fasores[nome]))
+        return colunas
+
+    if classe == "inrush":
+        resultado = executar_inrush(parametros)
+        angulos, residuais = np.meshgrid(resultado.angulos, resultado.fluxos_residuais, indexing="ij")
+        # Formato longo: uma linha por cenário (ravel de arrays contíguos não copia)
+        return {
+            "angulo": angulos.ravel(),
+            "fluxo_residual": residuais.ravel(),
+            "pico": resultado.pico.ravel(),
+            "instante_pico": resultado.instante_pico.ravel(),
+            "passos": resultado.passos.ravel(),
+        }
+
+    if classe == "simulacao_carga":
+        resultado = executar_simulacao_carga(parametros)
+        # Uma linha por carga; cada harmônica em sua coluna
+        colunas = {nome: getattr(resultado, nome) for nome in (
+            "potencia", "cos_phi", "tipo_fp", "eficaz", "pico", "fator_crista", "dht",
+            "potencia_ativa", "fator_potencia")}
+        for h in range(resultado.harmonicas.shape[1]):
+            colunas[f"harmonica_{h + 1}"] = resultado.harmonicas[:, h]
+        return colunas
+
+    if classe == "incerteza":
+        return _linha(executar_incerteza(parametros))
+
+    if classe == "pipeline":
+        return _linha(executar_pipeline({**parametros, "renderizar": False}))
+
+    raise ValueError(f"Classe '{classe}' não suportada na exportação")
+
+
+def _exigir_pyarrow(formato):
+    if pa is None:
+        raise RuntimeError(f"Formato '{formato}' indisponível: instale o pacote 'pyarrow' (ou use 'npz')")
+
+
+def para_tabela_arrow(colunas, metadados=None):
+    """Tabela Arrow apoiada nos buffers NumPy (arrays numéricos contíguos não são copiados)"""
+    _exigir_pyarrow("arrow")
+    tabela = pa.table({nome: pa.array(valores) for nome, valores in colunas.items()})
+    if metadados:
+        tabela = tabela.replace_schema_metadata({chave: json.dumps(valor, default=str)
+                                                 for chave, valor in metadados.items()})
+    return tabela
+
+
+def para_arrow_ipc(colunas, metadados=None):
+    """Serializa no formato de fluxo (stream) do Arrow IPC"""
+    tabela = para_tabela_arrow(colunas, metadados)
+    saida = pa.BufferOutputStream()
+    with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return saida.getvalue()
+
+
+def gravar_parquet(colunas, destino, metadados=None):
+    """Grava em Parquet; 'destino' pode ser um caminho ou um arquivo binário aberto"""
+    _exigir_pyarrow("parquet")
+    pa.parquet.write_table(para_tabela_arrow(colunas, metadados), destino)
+    return destino
+
+
+def gravar_npz(colunas, destino):
+    """Grava em NPZ (sem compressão: os buffers são escritos diretamente)"""
+    np.savez(destino, **colunas)
+    return destino
+
+
+def exportar(classe, parametros, formato="arrow"):
+    """Calcula e serializa em memória; retorna (bytes, mimetype)"""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato deve ser um dos: {', '.join(FORMATOS)}")
+    colunas = calcular_colunas(classe, parametros)
+    metadados = {"classe": classe, "parametros": parametros}
+
+    if formato == "arrow":
+        corpo = para_arrow_ipc(colunas, metadados).to_pybytes()
+    else:
+        buffer = io.BytesIO()
+        if formato == "parquet":
+            gravar_parquet(colunas, buffer, metadados)
+        else:
+            gravar_npz(colunas, buffer)
+        corpo = buffer.getvalue()
+    return corpo, FORMATOS[formato]
@@ -0,0 +1,331 @@
+# Propagação de incerteza de medição (Monte Carlo) para os parâmetros dos ensaios do desafio 3
+import json
+import multiprocessing
+import time
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from desafio3 import TransformadorMonofasico
+import limites
+from resultados import ResultadoIncerteza
+
+ENTRADAS = ("Va", "Ia", "Pa", "Vb", "Ib", "Pb")
+SAIDAS = ("Rc", "Xm", "Req", "Xeq")
+
+# Parâmetros do TransformadorMonofasico que não são medições
+CONFIGURACAO = ("N1", "N2", "circuit_type", "referred_to", "sec_type")
+
+NUMERO_CLASSES_HISTOGRAMA = 8192
+
+# Padrões de propagar_incerteza (também usados na estimativa de trabalho de limites.medidas)
+AMOSTRAS_PADRAO = 1_000_000
+TAMANHO_BLOCO_PADRAO = 250_000
+AMOSTRAS_PILOTO_PADRAO = 20_000
+
+
+def calcular_parametros_vetorizado(tf, medidas):
+    """
+    Mesmas fórmulas de calcular_ensaio_circuito_aberto/calcular_ensaio_curto_circuito,
+    aplicadas a vetores de medições, incluindo os ramos Ib=0/Vb=0, Pb=0 (Rc infinito),
+    Ib <= Ic (Im=0, Xm infinito) e Zcc <= Req (Xeq=0).
+    """
+    Va, Ia, Pa = medidas["Va"], medidas["Ia"], medidas["Pa"]
+    Vb, Ib, Pb = medidas["Vb"], medidas["Ib"], medidas["Pb"]
+    a = tf.calcular_relacao_transformacao()
+    lado_ca = "secundario" if tf.sec_type == "circuito-aberto" else "primario"
+    lado_cc = "secundario" if tf.sec_type == "curto-circuito" else "primario"
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Circuito aberto
+        valido_ca = (Ib != 0) & (Vb != 0)
+        Rc = np.where(Pb > 0, Vb ** 2 / Pb, np.inf)
+        Ic = Pb / Vb
+        Im = np.where(Ib > Ic, np.sqrt(np.maximum(Ib ** 2 - Ic ** 2, 0)), 0.0)
+        Xm = np.where(Im != 0, Vb / Im, np.inf)
+        Rc = np.where(valido_ca, Rc, 0.0)
+        Xm = np.where(valido_ca, Xm, 0.0)
+
+        # Curto-circuito
+        valido_cc = (Ia != 0) & (Va != 0)
+        Req = Pa / Ia ** 2
+        Zcc = Va / Ia
+        delta = Zcc ** 2 - Req ** 2
+        Xeq = np.where(delta > 0, np.sqrt(np.maximum(delta, 0)), 0.0)
+        Req = np.where(valido_cc, Req, 0.0)
+        Xeq = np.where(valido_cc, Xeq, 0.0)
+
+    return {
+        "Rc": tf.referir_impedancia(Rc, a, lado_ca, tf.referred_to),
+        "Xm": tf.referir_impedancia(Xm, a, lado_ca, tf.referred_to),
+        "Req": tf.referir_impedancia(Req, a, lado_cc, tf.referred_to),
+        "Xeq": tf.referir_impedancia(Xeq, a, lado_cc, tf.referred_to),
+    }
+
+
+def _limites(nominal, exatidao):
+    """Semi-amplitude do erro de cada instrumento: classe% da leitura ou do fundo de escala"""
+    semiamplitudes = {}
+    for nome in ENTRADAS:
+        espec = exatidao.get(nome, {})
+        if isinstance(espec, (int, float)):
+            espec = {"classe": espec}
+        base = espec.get("fundo_escala", abs(nominal[nome]))
+        semiamplitudes[nome] = espec.get("classe", 0.0) / 100 * base
+    return semiamplitudes
+
+
+def _sortear(nominal, semiamplitudes, distribuicao, n, gerador):
+    medidas = {}
+    for nome in ENTRADAS:
+        if distribuicao == "normal":
+            # Limite da classe interpretado como 2σ (≈ 95%)
+            erro = gerador.normal(0.0, semiamplitudes[nome] / 2, n)
+        else:
+            erro = gerador.uniform(-semiamplitudes[nome], semiamplitudes[nome], n)
+        medidas[nome] = nominal[nome] + erro
+    return medidas
+
+
+def _acumulador_vazio(faixas):
+    return {
+        saida: {
+            "histograma": np.zeros(NUMERO_CLASSES_HISTOGRAMA, dtype=np.int64),
+            "abaixo": 0, "acima": 0, "infinitos": 0, "n": 0,
+            "minimo": np.inf, "maximo": -np.inf,
+            "soma": 0.0, "soma_quadrados": 0.0,
+            # Somas centradas (em torno do valor nominal) para as correlações com cada entrada
+            "sx": np.zeros(len(ENTRADAS)), "sxx": np.zeros(len(ENTRADAS)), "sxy": np.zeros(len(ENTRADAS)),
+        }
+        for saida in faixas
+    }
+
+
+def _simular_lote(configuracao, nominal, semiamplitudes, distribuicao, amostras, tamanho_bloco, semente, faixas, centros,
+                  prazo=None):
+    """
+    Executa uma parte das amostras em blocos de memória limitada e devolve somas mescláveis.
+    prazo: instante (time.time()) do fim do prazo, para os processos filhos (o contexto não é herdado)
+    """
+    if prazo is not None:
+        with limites.protegido("incerteza", max(prazo - time.time(), 1e-3)):
+            return _simular_lote(configuracao, nominal, semiamplitudes, distribuicao, amostras, tamanho_bloco,
+                                 semente, faixas, centros)
+    tf = TransformadorMonofasico(**configuracao, **nominal)
+    gerador = np.random.default_rng(semente)
+    acumulador = _acumulador_vazio(faixas)
+
+    restantes = amostras
+    while restantes > 0:
+        limites.verificar_cancelamento()
+        n = min(tamanho_bloco, restantes)
+        restantes -= n
+        medidas = _sortear(nominal, semiamplitudes, distribuicao, n, gerador)
+        saidas = calcular_parametros_vetorizado(tf, medidas)
+        desvios = np.stack([medidas[nome] - nominal[nome] for nome in ENTRADAS])
+
+        for saida, valores in saidas.items():
+            acc = acumulador[saida]
+            lo, hi = faixas[saida]
+            finitos = np.isfinite(valores)
+            y = valores[finitos]
+            acc["infinitos"] += int(n - y.size)
+            acc["n"] += int(y.size)
+            if not y.size:
+                continue
+            acc["minimo"] = min(acc["minimo"], float(y.min()))
+            acc["maximo"] = max(acc["maximo"], float(y.max()))
+            acc["abaixo"] += int(np.count_nonzero(y < lo))
+            acc["acima"] += int(np.count_nonzero(y > hi))
+            acc["histograma"] += np.histogram(y, bins=NUMERO_CLASSES_HISTOGRAMA, range=(lo, hi))[0]
+
+            yc = y - centros[saida]
+            xc = desvios[:, finitos]
+            acc["soma"] += float(yc.sum())
+            acc["soma_quadrados"] += float(yc @ yc)
+            acc["sx"] += xc.sum(axis=1)
+            acc["sxx"] += np.einsum("ij,ij->i", xc, xc)
+            acc["sxy"] += xc @ yc
+    return acumulador
+
+
+def _mesclar(acumuladores):
+    total = acumuladores[0]
+    for acc in acumuladores[1:]:
+        for saida, dados in acc.items():
+            destino = total[saida]
+            for chave, valor in dados.items():
+                if chave == "minimo":
+                    destino[chave] = min(destino[chave], valor)
+                elif chave == "maximo":
+                    destino[chave] = max(destino[chave], valor)
+                else:
+                    destino[chave] = destino[chave] + valor
+    return total
+
+
+def _percentil(acc, faixa, p, total):
+    """Percentil a partir do histograma; os infinitos ficam acima de todos os valores finitos"""
+    posicao = p / 100 * total
+    if posicao > acc["n"]:
+        return np.inf
+    if acc["n"] == 0:
+        return None
+    if posicao <= acc["abaixo"]:
+        return acc["minimo"]
+    lo, hi = faixa
+    acumulado = acc["abaixo"] + np.cumsum(acc["histograma"])
+    classe = int(np.searchsorted(acumulado, posicao))
+    if classe >= NUMERO_CLASSES_HISTOGRAMA:
+        return acc["maximo"]
+    largura = (hi - lo) / NUMERO_CLASSES_HISTOGRAMA
+    anterior = acumulado[classe - 1] if classe > 0 else acc["abaixo"]
+    dentro = acc["histograma"][classe]
+    fracao = (posicao - anterior) / dentro if dentro else 0.0
+    return float(min(max(lo + (classe + fracao) * largura, acc["minimo"]), acc["maximo"]))
+
+
+def _simular_em_processos(argumentos):
+    """
+    Distribui as partes entre processos novos (forkserver: nada de fork de um servidor com
+    threads). Cada processo recebe o prazo restante e a espera aqui também é limitada a ele.
+    """
+    prazo_s = limites.prazo_restante()
+    prazo = None if prazo_s is None else time.time() + prazo_s
+    metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    executor = ProcessPoolExecutor(max_workers=len(argumentos), mp_context=multiprocessing.get_context(metodo))
+    try:
+        pendentes = [executor.submit(_simular_lote, *args, prazo) for args in argumentos]
+        # Folga para o processo chegar ao próximo ponto de verificação e devolver o erro
+        fim = None if prazo_s is None else time.monotonic() + prazo_s + 5
+        return [futuro.result(timeout=None if fim is None else max(fim - time.monotonic(), 0))
+                for futuro in pendentes]
+    except limites.CalculoCancelado:
+        raise  # Prazo esgotado dentro de um processo (também é um TimeoutError)
+    except futures.TimeoutError:
+        raise limites.CalculoCancelado("incerteza: prazo esgotado aguardando os processos") from None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def propagar_incerteza(parametros, exatidao, amostras=AMOSTRAS_PADRAO, distribuicao="uniforme",
+                       percentis=(2.5, 50, 97.5), tamanho_bloco=TAMANHO_BLOCO_PADRAO, processos=1,
+                       semente=None, amostras_piloto=AMOSTRAS_PILOTO_PADRAO):
+    """
+    Sorteia as medições Va, Ia, Pa, Vb, Ib, Pb dentro das classes de exatidão dos
+    instrumentos e propaga até Rc, Xm, Req e Xeq.
+
+    - exatidao: {"Va": {"classe": 0.5, "fundo_escala": 100}, ...}; sem fundo_escala,
+      a classe é aplicada sobre a leitura. Um número sozinho é a classe em %.
+    - distribuicao: "uniforme" (retangular no limite da classe) ou "normal" (limite = 2σ)
+    - processos: número de processos; cada um recebe uma parte das amostras com semente própria
+    """
+    if distribuicao not in ("uniforme", "normal"):
+        raise ValueError("distribuicao deve ser 'uniforme' ou 'normal'")
+
+    padrao = TransformadorMonofasico()
+    completos = {nome: parametros.get(nome, getattr(padrao, nome)) for nome in CONFIGURACAO + ENTRADAS}
+    configuracao = {nome: completos[nome] for nome in CONFIGURACAO}
+    nominal = {nome: float(completos[nome]) for nome in ENTRADAS}
+    semiamplitudes = _limites(nominal, exatidao or {})
+
+    tf_nominal = TransformadorMonofasico(**completos)
+    valores_nominais = {
+        saida: float(v[0]) for saida, v in calcular_parametros_vetorizado(
+            tf_nominal, {nome: np.array([valor]) for nome, valor in nominal.items()}).items()
+    }
+    # Somas centradas precisam de um centro finito
+    centros = {s: (v if np.isfinite(v) else 0.0) for s, v in valores_nominais.items()}
+
+    # Amostra piloto (semente separada) define a faixa comum dos histogramas
+    sementes = np.random.SeedSequence(semente)
+    semente_piloto, semente_lotes = sementes.spawn(2)
+    piloto = calcular_parametros_vetorizado(
+        tf_nominal, _sortear(nominal, semiamplitudes, distribuicao, amostras_piloto, np.random.default_rng(semente_piloto)))
+    faixas = {}
+    for saida, valores in piloto.items():
+        finitos = valores[np.isfinite(valores)]
+        lo, hi = (float(finitos.min()), float(finitos.max())) if finitos.size else (0.0, 1.0)
+        margem = 0.25 * (hi - lo) or max(abs(lo) * 1e-9, 1e-12)
+        faixas[saida] = (lo - margem, hi + margem)
+
+    processos = max(1, int(processos))
+    partes = [amostras // processos + (1 if k < amostras % processos else 0) for k in range(processos)]
+    argumentos = [
+        (configuracao, nominal, semiamplitudes, distribuicao, n, tamanho_bloco, s, faixas, centros)
+        for n, s in zip(partes, semente_lotes.spawn(processos)) if n > 0
+    ]
+    if processos == 1:
+        acumuladores = [_simular_lote(*args) for args in argumentos]
+    else:
+        acumuladores = _simular_em_processos(argumentos)
+    total = _mesclar(acumuladores)
+
+    estatisticas, sensibilidade = {}, {}
+    for saida in SAIDAS:
+        acc = total[saida]
+        n = acc["n"]
+        media = centros[saida] + acc["soma"] / n if n else None
+        variancia = max(acc["soma_quadrados"] / n - (acc["soma"] / n) ** 2, 0.0) if n else None
+        estatisticas[saida] = {
+            "nominal": valores_nominais[saida],
+            "media": media,
+            "desvio_padrao": float(np.sqrt(variancia)) if n else None,
+            "percentis": {str(p): _percentil(acc, faixas[saida], p, amostras) for p in percentis},
+            "fracao_infinita": acc["infinitos"] / amostras,
+            "minimo": acc["minimo"] if n else None,
+            "maximo": acc["maximo"] if n else None,
+        }
+
+        # Correlação linear de cada medição com o parâmetro (somente amostras finitas)
+        correlacoes = {}
+        if n:
+            cov = acc["sxy"] / n - (acc["sx"] / n) * (acc["soma"] / n)
+            var_x = acc["sxx"] / n - (acc["sx"] / n) ** 2
+            for j, nome in enumerate(ENTRADAS):
+                denominador = np.sqrt(var_x[j] * variancia)
+                correlacoes[nome] = float(cov[j] / denominador) if denominador > 0 else 0.0
+        sensibilidade[saida] = sorted(
+            ({"entrada": nome, "correlacao": r} for nome, r in correlacoes.items()),
+            key=lambda item: abs(item["correlacao"]), reverse=True)
+
+    return ResultadoIncerteza(amostras, distribuicao, semiamplitudes, estatisticas, sensibilidade)
+
+
+def executar_incerteza(json_input=None):
+    """
+    Executa a propagação de incerteza a partir de um dicionário ou arquivo JSON com os
+    parâmetros do desafio 3 mais: exatidao, amostras, distribuicao, percentis,
+    tamanho_bloco, processos, semente e amostras_piloto. Por padrão usa um único processo
+    (a rota do servidor e o lote offline já paralelizam entre requisições).
+    """
+    if isinstance(json_input, str):
+        with open(json_input, 'r') as f:
+            dados = json.load(f)
+    else:
+        dados = dict(json_input or {})
+
+    opcoes = {chave: dados.pop(chave) for chave in
+              ("amostras", "distribuicao", "percentis", "tamanho_bloco", "processos", "semente", "amostras_piloto")
+              if chave in dados}
+    exatidao = dados.pop("exatidao", {})
+    return propagar_incerteza(dados, exatidao, **opcoes)
+
+
+if __name__ == "__main__":
+    exemplo = {
+        "N1": 2400, "N2": 240,
+        "Va": 48, "Ia": 20.8, "Pa": 617,
+        "Vb": 240, "Ib": 5.41, "Pb": 186,
+        "referred_to": "secundario",
+        "exatidao": {
+            "Va": {"classe": 0.5, "fundo_escala": 150}, "Ia": {"classe": 0.5, "fundo_escala": 25},
+            "Pa": {"classe": 1.0, "fundo_escala": 1000}, "Vb": {"classe": 0.5, "fundo_escala": 300},
+            "Ib": {"classe": 0.5, "fundo_escala": 10}, "Pb": {"classe": 1.0, "fundo_escala": 500}
+        },
+        "amostras": 1_000_000,
+        "processos": 4
+    }
+    resultado = executar_incerteza(exemplo)
+    print(json.dumps(resultado.para_json(), indent=2, ensure_ascii=False))
@@ -0,0 +1,201 @@
+# Simulação da corrente de energização (inrush) usando a curva MMF(Φ) do desafio 2
+import numpy as np
+
+from desafio2 import TransformadorMagnetico2, atualizar_parametros
+import limites
+from resultados import ResultadoInrush
+
+# Coeficientes do par embutido de Bogacki–Shampine (RK 3(2))
+_C2, _C3 = 1 / 2, 3 / 4
+_B1, _B2, _B3 = 2 / 9, 1 / 3, 4 / 9
+_E1, _E2, _E3, _E4 = -5 / 72, 1 / 12, 1 / 9, -1 / 8
+
+
+class SimuladorInrush:
+    """
+    Integra a equação do enrolamento primário energizado em vazio:
+
+        v(t)   = Vm · sin(ωt + α)
+        dΦ/dt  = (v(t) - R · i) / N
+        i(Φ)   = MMF(Φ) / N
+
+    para vários cenários (ângulo de fechamento α e fluxo residual Φr) ao mesmo tempo.
+    Cada cenário tem seu próprio passo adaptativo: o erro é controlado na corrente
+    (erro em Φ multiplicado por dMMF/dΦ / N), de modo que a região linear da curva
+    é atravessada com passos longos e apenas a saturação exige passos curtos.
+    """
+
+    def __init__(self, curva, vm, n, freq, r):
+        self.curva = curva   # CurvaFMM (desafio2)
+        self.vm = vm         # Tensão de pico (V)
+        self.n = n           # Número de espiras do primário
+        self.w = 2 * np.pi * freq
+        self.r = r           # Resistência do enrolamento primário (Ω)
+        # Fluxo de pico em regime permanente: Φ = Vm / (ωN)
+        self.fluxo_pico = vm / (self.w * n)
+
+    def _derivada(self, t, fluxo, alfa):
+        fmm, inclinacao = self.curva.avaliar(fluxo)
+        i = fmm / self.n
+        return (self.vm * np.sin(self.w * t + alfa) - self.r * i) / self.n, i, inclinacao
+
+    def simular(self, angulos_graus, fluxos_residuais_pu, tempo_max=0.2, rtol=1e-3, atol=1e-4,
+                pontos_saida=0, max_iteracoes=2_000_000):
+        """
+        Simula todos os cenários da grade ângulos × fluxos residuais.
+
+        - angulos_graus: ângulos de fechamento da tensão (°)
+        - fluxos_residuais_pu: fluxo residual em p.u. do fluxo de pico de regime
+        - pontos_saida: se > 0, também devolve i(t) em uma grade uniforme com esse número de pontos
+        """
+        angulos = np.asarray(angulos_graus, dtype=float)
+        residuais = np.asarray(fluxos_residuais_pu, dtype=float)
+        alfa_grade, residual_grade = np.meshgrid(np.radians(angulos), residuais, indexing='ij')
+        alfa = alfa_grade.ravel()
+        m = alfa.size
+
+        # Passo máximo: 1/20 de ciclo, para acompanhar a forma de onda da tensão
+        h_max = (2 * np.pi / self.w) / 20
+
+        t = np.zeros(m)
+        fluxo = residual_grade.ravel() * self.fluxo_pico
+        k1, i_atual, inclinacao = self._derivada(t, fluxo, alfa)
+        h = np.full(m, h_max / 100)
+
+        pico = np.abs(i_atual)
+        instante_pico = np.zeros(m)
+        passos = np.zeros(m, dtype=np.int64)
+
+        if pontos_saida:
+            t_saida = np.linspace(0, tempo_max, pontos_saida)
+            formas = np.empty((m, pontos_saida))
+            formas[:, 0] = i_atual
+            proximo = np.ones(m, dtype=np.int64)  # Próximo ponto da grade ainda não preenchido
+
+        ativos = np.arange(m)
+        iteracoes = 0
+        while ativos.size:
+            iteracoes += 1
+            limites.verificar_cancelamento()
+            if iteracoes > max_iteracoes:
+                raise RuntimeError("Número máximo de iterações excedido na simulação de inrush")
+
+            ta, ya, ha, aa, k1a = t[ativos], fluxo[ativos], h[ativos], alfa[ativos], k1[ativos]
+            ha = np.minimum(ha, tempo_max - ta)
+
+            k2, _, _ = self._derivada(ta + _C2 * ha, ya + _C2 * ha * k1a, aa)
+            k3, _, _ = self._derivada(ta + _C3 * ha, ya + _C3 * ha * k2, aa)
+            y_novo = ya + ha * (_B1 * k1a + _B2 * k2 + _B3 * k3)
+            k4, i_novo, inc_novo = self._derivada(ta + ha, y_novo, aa)
+
+            # Erro local em Φ convertido para erro em corrente pela inclinação local da curva
+            erro_fluxo = ha * (_E1 * k1a + _E2 * k2 + _E3 * k3 + _E4 * k4)
+            inc = np.maximum(np.abs(inclinacao[ativos]), np.abs(inc_novo))
+            escala = atol + rtol * np.maximum(np.abs(i_atual[ativos]), np.abs(i_novo))
+            erro = np.abs(erro_fluxo) * inc / self.n / escala
+
+            aceito = erro <= 1.0
+            fator = np.clip(0.9 * np.power(np.maximum(erro, 1e-10), -1 / 3), 0.2, 5.0)
+
+            if aceito.any():
+                idx = ativos[aceito]
+                t_anterior, i_anterior = t[idx], i_atual[idx]
+                t[idx] = ta[aceito] + ha[aceito]
+                fluxo[idx] = y_novo[aceito]
+                k1[idx] = k4[aceito]  # FSAL: a derivada do fim do passo inicia o próximo
+                i_atual[idx] = i_novo[aceito]
+                inclinacao[idx] = inc_novo[aceito]
+                passos[idx] += 1
+
+                maior = np.abs(i_novo[aceito]) > pico[idx]
+                pico[idx[maior]] = np.abs(i_novo[aceito][maior])
+                instante_pico[idx[maior]] = t[idx[maior]]
+
+                if pontos_saida:
+                    self._preencher_saida(formas, t_saida, proximo, idx, t_anterior, i_anterior, t[idx], i_atual[idx])
+
+            h[ativos] = np.minimum(ha * fator, h_max)
+            ativos = ativos[t[ativos] < tempo_max * (1 - 1e-12)]
+
+        forma = (len(angulos), len(residuais))
+        return ResultadoInrush(
+            angulos=angulos,
+            fluxos_residuais=residuais,
+            pico=pico.reshape(forma),
+            instante_pico=instante_pico.reshape(forma),
+            passos=passos.reshape(forma),
+            fluxo_pico=self.fluxo_pico,
+            t_saida=t_saida if pontos_saida else None,
+            formas_de_onda=formas.reshape(forma + (pontos_saida,)) if pontos_saida else None
+        )
+
+    @staticmethod
+    def _preencher_saida(formas, t_saida, proximo, idx, t0, i0, t1, i1):
+        """Interpola linearmente os pontos da grade de saída que caem em (t0, t1]"""
+        n_saida = len(t_saida)
+        pendentes = np.ones(idx.size, dtype=bool)
+        while True:
+            pos = proximo[idx]
+            pendentes &= pos < n_saida
+            if not pendentes.any():
+                break
+            ts = t_saida[np.minimum(pos, n_saida - 1)]
+            pendentes &= ts <= t1
+            if not pendentes.any():
+                break
+            sel = np.nonzero(pendentes)[0]
+            frac = (ts[sel] - t0[sel]) / np.maximum(t1[sel] - t0[sel], 1e-300)
+            formas[idx[sel], pos[sel]] = i0[sel] + frac * (i1[sel] - i0[sel])
+            proximo[idx[sel]] += 1
+
+
+def executar_inrush(json_input=None):
+    """
+    Simula a energização do transformador para uma grade de cenários.
+
+    Parâmetros (além de VM, N e freq do desafio 2):
+    - R: resistência do enrolamento primário (Ω)
+    - angulos: ângulos de fechamento (°)
+    - fluxos_residuais: fluxo residual em p.u. do fluxo de pico
+    - tempo_max, rtol, atol e pontos_saida (formas de onda opcionais)
+    - material (e area_nucleo/comprimento_medio para curvas B-H), como no desafio 2
+    """
+    parametros = atualizar_parametros({
+        "VM": 325,
+        "N": 850,
+        "freq": 50,
+        "R": 2.0,
+        "angulos": [0, 30, 60, 90],
+        "fluxos_residuais": [-0.8, 0.0, 0.8],
+        "tempo_max": 0.2,
+        "rtol": 1e-3,
+        "atol": 1e-4,
+        "pontos_saida": 0,
+        "material": None,
+        "area_nucleo": None,
+        "comprimento_medio": None
+    }, json_input)
+
+    transformador = TransformadorMagnetico2()
+    transformador._carregar_curva_magnetizacao(
+        material=parametros["material"],
+        area_nucleo=parametros["area_nucleo"],
+        comprimento_medio=parametros["comprimento_medio"]
+    )
+
+    simulador = SimuladorInrush(transformador.curva(), parametros["VM"], parametros["N"],
+                                parametros["freq"], parametros["R"])
+    return simulador.simular(
+        parametros["angulos"],
+        parametros["fluxos_residuais"],
+        tempo_max=parametros["tempo_max"],
+        rtol=parametros["rtol"],
+        atol=parametros["atol"],
+        pontos_saida=int(parametros["pontos_saida"])
+    )
+
+
+if __name__ == "__main__":
+    resultado = executar_inrush()
+    print("Pico de corrente (A) por ângulo × fluxo residual:")
+    print(resultado.pico)
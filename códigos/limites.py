@@ -0,0 +1,171 @@
+# Limites de recursos por classe (verificados antes do cálculo) e cancelamento cooperativo por prazo
+import contextvars
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+
+# Limites padrão por classe; "*" vale para todas. Medidas:
+# - tempo_s: prazo de relógio do cálculo (verificado entre blocos)
+# - amostras_max: pontos calculados (desafio 2: instantes × curvas; simulação de carga: cargas × pontos por período)
+# - saida_max: valores devolvidos nas formas de onda
+# - potencia_max (VA), pontos_max (pontos de operação), cenarios_max e amostras_max da incerteza
+#   (amostras + amostra piloto)
+# - processos_max, bloco_max (amostras por bloco) e piloto_max da incerteza
+LIMITES_PADRAO = {
+    "*": {"tempo_s": 120},
+    "desafio1": {"potencia_max": 100_000, "tempo_s": 30},
+    "desafio2": {"amostras_max": 5_000_000, "saida_max": 20_000_000, "tempo_s": 30},
+    "desafio3": {"tempo_s": 30},
+    "desafio4": {"pontos_max": 2_000, "tempo_s": 30},
+    "inrush": {"cenarios_max": 10_000, "saida_max": 5_000_000, "tempo_s": 60},
+    "simulacao_carga": {"amostras_max": 20_000_000, "saida_max": 5_000_000, "tempo_s": 30},
+    "incerteza": {"amostras_max": 50_000_000, "processos_max": 4, "bloco_max": 1_000_000,
+                  "piloto_max": 1_000_000, "tempo_s": 120},
+    "pipeline": {"potencia_max": 100_000, "tempo_s": 60},
+}
+
+
+def _carregar_limites():
+    """LIMITES_RECURSOS (JSON {classe: {medida: valor}}) sobrepõe os limites padrão"""
+    limites = {classe: dict(valores) for classe, valores in LIMITES_PADRAO.items()}
+    extras = os.environ.get("LIMITES_RECURSOS", "")
+    if extras:
+        for classe, valores in json.loads(extras).items():
+            limites.setdefault(classe, {}).update(valores)
+    return limites
+
+
+LIMITES = _carregar_limites()
+
+
+class LimiteExcedido(ValueError):
+    """Entrada que ultrapassa um limite de recursos da classe"""
+
+    def __init__(self, classe, medida, valor, maximo):
+        self.classe = classe
+        self.medida = medida
+        self.valor = valor
+        self.maximo = maximo
+        super().__init__(f"{classe}: {medida.removesuffix('_max')} = {valor:g} excede o limite de {maximo:g}")
+
+    def para_json(self):
+        return {"erro": str(self), "classe": self.classe, "limite": self.medida,
+                "valor": self.valor, "maximo": self.maximo}
+
+
+class CalculoCancelado(TimeoutError):
+    """Cálculo interrompido num ponto de verificação: prazo esgotado ou cancelamento pedido"""
+
+
+def limites_da_classe(classe):
+    return {**LIMITES.get("*", {}), **LIMITES.get(classe, {})}
+
+
+def _tamanho(valor):
+    return len(valor) if isinstance(valor, (list, tuple)) else 1
+
+
+def medidas(classe, parametros):
+    """Estimativa do trabalho pedido, a partir dos parâmetros já validados"""
+    if classe == "desafio1":
+        return {"potencia_max": parametros.get("Potencia", 0)}
+    if classe == "pipeline":
+        return {"potencia_max": parametros.get("projeto", {}).get("Potencia", 0)}
+    if classe == "desafio2":
+        from desafio2 import parametros_padrao
+        p = {**parametros_padrao(), **parametros}
+        curvas = max(_tamanho(p["materiais"]), 1) if p["materiais"] else 1
+        # Amostragem adaptativa: o total só é conhecido durante o cálculo (verificado em exigir)
+        instantes = 0 if p["amostragem"] == "adaptativa" else math.ceil(p["tempo_max"] / p["passo"])
+        return {"amostras_max": instantes * curvas, "saida_max": instantes * (curvas + 3)}
+    if classe == "desafio4":
+        return {"pontos_max": max(_tamanho(parametros.get(campo)) for campo in ("V2", "I2", "cos_phi", "tipo_fp"))}
+    if classe == "inrush":
+        cenarios = _tamanho(parametros.get("angulos", [0] * 4)) * _tamanho(parametros.get("fluxos_residuais", [0] * 3))
+        return {"cenarios_max": cenarios, "saida_max": cenarios * parametros.get("pontos_saida", 0)}
+    if classe == "simulacao_carga":
+        cargas = max(_tamanho(parametros.get(campo, [0] * 4 if campo == "potencia" else 0))
+                     for campo in ("potencia", "cos_phi", "tipo_fp"))
+        pontos = cargas * parametros.get("pontos_por_periodo", 512)
+        return {"amostras_max": pontos, "saida_max": pontos if parametros.get("formas_de_onda") else 0}
+    if classe == "incerteza":
+        from incerteza import AMOSTRAS_PADRAO, AMOSTRAS_PILOTO_PADRAO, TAMANHO_BLOCO_PADRAO
+        amostras = parametros.get("amostras", AMOSTRAS_PADRAO)
+        piloto = parametros.get("amostras_piloto", AMOSTRAS_PILOTO_PADRAO)
+        return {"amostras_max": amostras + piloto, "piloto_max": piloto,
+                "processos_max": parametros.get("processos", 1),
+                # Só o bloco que de fato é alocado conta (nunca maior que as amostras)
+                "bloco_max": min(parametros.get("tamanho_bloco", TAMANHO_BLOCO_PADRAO), amostras)}
+    return {}
+
+
+def verificar(classe, parametros):
+    """Recusa (LimiteExcedido) uma entrada acima de algum limite da classe, antes de qualquer cálculo"""
+    limites = limites_da_classe(classe)
+    for medida, valor in medidas(classe, parametros).items():
+        maximo = limites.get(medida)
+        if maximo is not None and valor > maximo:
+            raise LimiteExcedido(classe, medida, valor, maximo)
+
+
+class Protecao:
+    """Prazo e limites do cálculo em andamento, consultados nos pontos de verificação"""
+    __slots__ = ("classe", "limites", "prazo", "cancelado")
+
+    def __init__(self, classe, segundos=None):
+        self.classe = classe
+        self.limites = limites_da_classe(classe)
+        segundos = self.limites.get("tempo_s") if segundos is None else segundos
+        self.prazo = time.monotonic() + segundos if segundos else math.inf
+        self.cancelado = False
+
+    def cancelar(self):
+        """Pede a interrupção (atendida no próximo ponto de verificação)"""
+        self.cancelado = True
+
+    def verificar(self):
+        if self.cancelado:
+            raise CalculoCancelado(f"{self.classe}: cálculo cancelado")
+        if time.monotonic() > self.prazo:
+            raise CalculoCancelado(f"{self.classe}: prazo de {self.limites.get('tempo_s'):g} s esgotado; "
+                                   f"reduza o tamanho da entrada")
+
+
+_protecao = contextvars.ContextVar("protecao", default=None)
+
+
+@contextmanager
+def protegido(classe, segundos=None):
+    """Executa o bloco com o prazo (e os limites) da classe valendo para os pontos de verificação"""
+    protecao = Protecao(classe, segundos)
+    token = _protecao.set(protecao)
+    try:
+        yield protecao
+    finally:
+        _protecao.reset(token)
+
+
+def verificar_cancelamento():
+    """Ponto de verificação dos laços longos: sem proteção ativa (uso direto) não faz nada"""
+    protecao = _protecao.get()
+    if protecao is not None:
+        protecao.verificar()
+
+
+def prazo_restante():
+    """Segundos até o prazo do cálculo em andamento (None sem proteção ou sem prazo), para repassar a outros processos"""
+    protecao = _protecao.get()
+    if protecao is None or protecao.prazo == math.inf:
+        return None
+    return max(protecao.prazo - time.monotonic(), 0.0)
+
+
+def exigir(medida, valor):
+    """Limite de uma medida só conhecida durante o cálculo (ex.: amostragem adaptativa)"""
+    protecao = _protecao.get()
+    if protecao is not None:
+        maximo = protecao.limites.get(medida)
+        if maximo is not None and valor > maximo:
+            raise LimiteExcedido(protecao.classe, medida, valor, maximo)
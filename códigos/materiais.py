@@ -0,0 +1,231 @@
+# Biblioteca de curvas de magnetização de vários materiais, em um único armazenamento indexado
+import json
+import os
+import threading
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Locais onde a curva padrão (MagCurve.xlsx) é procurada
+LOCAIS_CURVA_PADRAO = [
+    "MagCurve.xlsx",
+    os.path.join(os.path.dirname(__file__), "MagCurve.xlsx"),
+    "../MagCurve.xlsx",
+    "data/MagCurve.xlsx"
+]
+MATERIAL_PADRAO = "padrao"
+
+# Diretório com uma curva por arquivo (<id>.csv ou <id>.xlsx)
+DIRETORIO_MATERIAIS = Path(__file__).resolve().parent / "dados" / "materiais"
+VARIAVEL_DIRETORIOS = "TRANSFORMADOR_MATERIAIS"
+
+# Nome do bloco de memória compartilhada publicado pelo processo principal
+VARIAVEL_MEMORIA = "TRANSFORMADOR_MATERIAIS_SHM"
+
+EXTENSOES = (".csv", ".xlsx", ".xls")
+
+
+def ler_curva(caminho):
+    """
+    Lê uma curva de um arquivo Excel/CSV e retorna (tipo, x, y):
+    - colunas 'Fluxo' e 'MMF' → tipo 'fmm' (Φ em Wb, MMF em A·e)
+    - colunas 'B' e 'H'       → tipo 'bh'  (B em T, H em A/m)
+    """
+    caminho = str(caminho)
+    df = pd.read_csv(caminho) if caminho.lower().endswith(".csv") else pd.read_excel(caminho)
+    if 'MMF' in df.columns and 'Fluxo' in df.columns:
+        return "fmm", df['Fluxo'].values, df['MMF'].values
+    if 'B' in df.columns and 'H' in df.columns:
+        return "bh", df['B'].values, df['H'].values
+    raise ValueError(f"Arquivo '{caminho}' deve conter colunas 'MMF' e 'Fluxo' (ou 'B' e 'H')")
+
+
+class BibliotecaMateriais:
+    """
+    Todas as curvas concatenadas em três vetores (x, y e chaves de busca) com um
+    índice de deslocamentos por material. Pode ser publicada em memória compartilhada
+    para que outros processos leiam os mesmos vetores sem cópia.
+    """
+
+    def __init__(self, ids, tipos, deslocamentos, x, y, chaves, memoria=None):
+        self.ids = tuple(ids)
+        self.tipos = tuple(tipos)
+        self.deslocamentos = np.asarray(deslocamentos, dtype=np.int64)
+        self.x = x
+        self.y = y
+        self.chaves = chaves     # 2k + posição normalizada de x no material k (crescente globalmente)
+        self._indice = {m: k for k, m in enumerate(self.ids)}
+        self._memoria = memoria  # Mantém o bloco compartilhado aberto enquanto a biblioteca existir
+
+    @classmethod
+    def de_curvas(cls, curvas):
+        """Monta a biblioteca a partir de {id: (tipo, x, y)}"""
+        ids, tipos, xs, ys, chaves, deslocamentos = [], [], [], [], [], [0]
+        for k, (material, (tipo, x, y)) in enumerate(curvas.items()):
+            x, unicos = np.unique(np.asarray(x, dtype=float), return_index=True)
+            y = np.asarray(y, dtype=float)[unicos]
+            if len(x) < 2:
+                raise ValueError(f"Curva do material '{material}' precisa de pelo menos dois pontos distintos")
+            ids.append(material)
+            tipos.append(tipo)
+            xs.append(x)
+            ys.append(y)
+            chaves.append(2 * k + (x - x[0]) / (x[-1] - x[0]))
+            deslocamentos.append(deslocamentos[-1] + len(x))
+        vazio = np.empty(0)
+        return cls(ids, tipos, deslocamentos,
+                   np.concatenate(xs) if xs else vazio,
+                   np.concatenate(ys) if ys else vazio,
+                   np.concatenate(chaves) if chaves else vazio)
+
+    def __contains__(self, material):
+        return material in self._indice
+
+    def _posicao(self, material):
+        if material not in self._indice:
+            raise ValueError(f"Material '{material}' não encontrado. Disponíveis: {', '.join(self.ids)}")
+        return self._indice[material]
+
+    def _escalas(self, posicoes, area_nucleo, comprimento_medio):
+        """Fatores que levam Φ → x da curva e y da curva → MMF (B = Φ/A, MMF = H·l)"""
+        escala_x = np.ones(len(posicoes))
+        escala_y = np.ones(len(posicoes))
+        for j, k in enumerate(posicoes):
+            if self.tipos[k] == "bh":
+                if not area_nucleo or not comprimento_medio:
+                    raise ValueError(f"Material '{self.ids[k]}' é uma curva B-H: informe area_nucleo (m²) e comprimento_medio (m)")
+                escala_x[j] = 1 / area_nucleo
+                escala_y[j] = comprimento_medio
+        return escala_x, escala_y
+
+    def curva_fmm(self, material, area_nucleo=None, comprimento_medio=None):
+        """Retorna (Φ, MMF) do material; para curvas MMF x Fluxo são vistas sem cópia"""
+        k = self._posicao(material)
+        ini, fim = self.deslocamentos[k], self.deslocamentos[k + 1]
+        escala_x, escala_y = self._escalas([k], area_nucleo, comprimento_medio)
+        if self.tipos[k] == "fmm":
+            return self.x[ini:fim], self.y[ini:fim]
+        return self.x[ini:fim] / escala_x[0], self.y[ini:fim] * escala_y[0]
+
+    def comparar(self, materiais, fluxo, area_nucleo=None, comprimento_medio=None):
+        """
+        MMF(Φ) de vários materiais para o mesmo vetor de fluxo, em uma única busca vetorizada.
+        Retorna uma matriz (materiais × pontos), com extrapolação linear nas pontas.
+        """
+        posicoes = np.array([self._posicao(m) for m in materiais], dtype=np.int64)
+        escala_x, escala_y = self._escalas(posicoes, area_nucleo, comprimento_medio)
+        ini = self.deslocamentos[posicoes][:, None]
+        fim = self.deslocamentos[posicoes + 1][:, None]
+
+        q = np.asarray(fluxo, dtype=float)[None, :] * escala_x[:, None]
+        x_min = self.x[ini]
+        faixa = self.x[fim - 1] - x_min
+        chave = 2 * posicoes[:, None] + np.clip((q - x_min) / faixa, 0, 1)
+
+        segmento = np.clip(np.searchsorted(self.chaves, chave, side='right') - 1, ini, fim - 2)
+        x0, x1 = self.x[segmento], self.x[segmento + 1]
+        y0, y1 = self.y[segmento], self.y[segmento + 1]
+        return (y0 + (y1 - y0) / (x1 - x0) * (q - x0)) * escala_y[:, None]
+
+    def publicar(self, nome=None):
+        """
+        Copia a biblioteca para um bloco de memória compartilhada e retorna uma nova
+        biblioteca apoiada nele. O nome do bloco fica em TRANSFORMADOR_MATERIAIS_SHM,
+        herdado pelos processos filhos.
+        """
+        cabecalho = json.dumps({
+            "ids": self.ids, "tipos": self.tipos, "deslocamentos": self.deslocamentos.tolist()
+        }).encode("utf-8")
+        inicio_dados = (8 + len(cabecalho) + 7) // 8 * 8
+        n = len(self.x)
+        memoria = shared_memory.SharedMemory(name=nome, create=True, size=max(inicio_dados + 3 * 8 * n, 1))
+        memoria.buf[:8] = len(cabecalho).to_bytes(8, "little")
+        memoria.buf[8:8 + len(cabecalho)] = cabecalho
+        vetores = np.ndarray((3, n), dtype=np.float64, buffer=memoria.buf, offset=inicio_dados)
+        vetores[0], vetores[1], vetores[2] = self.x, self.y, self.chaves
+        os.environ[VARIAVEL_MEMORIA] = memoria.name
+        return BibliotecaMateriais(self.ids, self.tipos, self.deslocamentos,
+                                   vetores[0], vetores[1], vetores[2], memoria)
+
+    @classmethod
+    def anexar(cls, nome):
+        """Abre uma biblioteca publicada por outro processo (somente leitura, sem cópia)"""
+        try:
+            memoria = shared_memory.SharedMemory(name=nome, track=False)  # Python >= 3.13
+        except TypeError:
+            memoria = shared_memory.SharedMemory(name=nome)
+            # Quem anexa não é dono do bloco: evita que o resource_tracker o remova ao sair
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(memoria._name, "shared_memory")
+            except Exception:
+                pass
+        tamanho = int.from_bytes(bytes(memoria.buf[:8]), "little")
+        cabecalho = json.loads(bytes(memoria.buf[8:8 + tamanho]).decode("utf-8"))
+        inicio_dados = (8 + tamanho + 7) // 8 * 8
+        n = cabecalho["deslocamentos"][-1]
+        vetores = np.ndarray((3, n), dtype=np.float64, buffer=memoria.buf, offset=inicio_dados)
+        vetores.flags.writeable = False
+        return cls(cabecalho["ids"], cabecalho["tipos"], cabecalho["deslocamentos"],
+                   vetores[0], vetores[1], vetores[2], memoria)
+
+    def liberar(self):
+        """Remove o bloco de memória compartilhada (apenas no processo que o publicou)"""
+        if self._memoria is not None:
+            self._memoria.close()
+            self._memoria.unlink()
+            self._memoria = None
+            os.environ.pop(VARIAVEL_MEMORIA, None)
+
+
+def _diretorios_materiais():
+    diretorios = [DIRETORIO_MATERIAIS]
+    extras = os.environ.get(VARIAVEL_DIRETORIOS, "")
+    diretorios += [Path(d) for d in extras.split(os.pathsep) if d]
+    return diretorios
+
+
+def carregar_biblioteca():
+    """Lê a curva padrão (MagCurve.xlsx) e todas as curvas dos diretórios de materiais"""
+    curvas = {}
+    for local in LOCAIS_CURVA_PADRAO:
+        if Path(local).exists():
+            curvas[MATERIAL_PADRAO] = ler_curva(local)
+            break
+    for diretorio in _diretorios_materiais():
+        if not diretorio.is_dir():
+            continue
+        for arquivo in sorted(diretorio.iterdir()):
+            if arquivo.suffix.lower() in EXTENSOES:
+                curvas[arquivo.stem] = ler_curva(arquivo)
+    return BibliotecaMateriais.de_curvas(curvas)
+
+
+_biblioteca = None
+_trava = threading.Lock()
+
+
+def biblioteca() -> BibliotecaMateriais:
+    """
+    Biblioteca única do processo: anexada da memória compartilhada se o processo
+    principal a publicou, ou carregada dos arquivos na primeira chamada.
+    """
+    global _biblioteca
+    if _biblioteca is None:
+        with _trava:
+            if _biblioteca is None:
+                nome = os.environ.get(VARIAVEL_MEMORIA)
+                _biblioteca = BibliotecaMateriais.anexar(nome) if nome else carregar_biblioteca()
+    return _biblioteca
+
+
+def publicar_biblioteca() -> BibliotecaMateriais:
+    """Carrega a biblioteca e a publica em memória compartilhada para os processos filhos"""
+    global _biblioteca
+    with _trava:
+        if _biblioteca is None or _biblioteca._memoria is None:
+            base = _biblioteca or carregar_biblioteca()
+            _biblioteca = base.publicar()
+    return _biblioteca
@@ -0,0 +1,146 @@
+# Perfil de memória por etapa (tracemalloc): pico e memória retida de cada etapa dos cálculos
+import functools
+import logging
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# PERFIL_MEMORIA=1 ativa o perfil na importação (PERFIL_MEMORIA=N guarda N quadros da pilha por alocação)
+QUADROS_PADRAO = int(os.environ.get("PERFIL_MEMORIA", "0") or 0)
+
+_trava = threading.Lock()
+_ativas = []         # Medições em andamento (de todas as threads)
+_estatisticas = {}   # nome da etapa → acumulados
+
+
+class _Medicao:
+    __slots__ = ("nome", "inicio", "pico")
+
+    def __init__(self, nome, inicio):
+        self.nome = nome
+        self.inicio = inicio
+        self.pico = inicio
+
+
+def ativo():
+    return tracemalloc.is_tracing()
+
+
+def ativar(quadros=1):
+    """Liga o tracemalloc (custo de CPU e memória em todas as alocações: use em diagnóstico)"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(max(1, int(quadros)))
+
+
+def desativar():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    with _trava:
+        _ativas.clear()
+
+
+def _coletar_pico():
+    """
+    O pico do tracemalloc é global: antes de zerá-lo, repassa o valor a todas as
+    medições em andamento, para que etapas aninhadas não apaguem o pico da externa.
+    Deve ser chamada com _trava.
+    """
+    pico = tracemalloc.get_traced_memory()[1]
+    for medicao in _ativas:
+        if pico > medicao.pico:
+            medicao.pico = pico
+    tracemalloc.reset_peak()
+
+
+@contextmanager
+def etapa(nome):
+    """
+    Mede a etapa: pico acima da memória do início e memória retida ao final (KB).
+    Sem o tracemalloc ativo não faz nada. Com requisições simultâneas o pico é o
+    do processo durante a etapa (inclui alocações de outras threads).
+    """
+    if not tracemalloc.is_tracing():
+        yield
+        return
+    with _trava:
+        _coletar_pico()
+        medicao = _Medicao(nome, tracemalloc.get_traced_memory()[0])
+        _ativas.append(medicao)
+    try:
+        yield
+    finally:
+        if tracemalloc.is_tracing():
+            with _trava:
+                _coletar_pico()
+                if medicao in _ativas:
+                    _ativas.remove(medicao)
+                fim = tracemalloc.get_traced_memory()[0]
+                _acumular(nome, (medicao.pico - medicao.inicio) / 1024, (fim - medicao.inicio) / 1024)
+
+
+def medir(nome):
+    """Decorador equivalente a 'with etapa(nome)'"""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if not tracemalloc.is_tracing():
+                return funcao(*args, **kwargs)
+            with etapa(nome):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def _acumular(nome, pico_kb, retido_kb):
+    dados = _estatisticas.get(nome)
+    if dados is None:
+        dados = _estatisticas[nome] = {"chamadas": 0, "pico_kb": 0.0, "ultimo_pico_kb": 0.0, "retido_kb": 0.0}
+    dados["chamadas"] += 1
+    dados["pico_kb"] = max(dados["pico_kb"], pico_kb)
+    dados["ultimo_pico_kb"] = pico_kb
+    dados["retido_kb"] += retido_kb
+    logger.debug("Etapa %s: pico %.1f KB, retido %.1f KB", nome, pico_kb, retido_kb,
+                 extra={"evento": "memoria", "etapa": nome})
+
+
+def estatisticas():
+    """Por etapa: chamadas, maior pico, último pico e memória retida acumulada (KB)"""
+    with _trava:
+        return {nome: {chave: round(valor, 1) for chave, valor in dados.items()}
+                for nome, dados in _estatisticas.items()}
+
+
+def zerar():
+    with _trava:
+        _estatisticas.clear()
+
+
+def maiores_alocacoes(limite=10, agrupar="lineno"):
+    """Linhas (ou arquivos) que mais retêm memória agora, segundo o tracemalloc"""
+    if not tracemalloc.is_tracing():
+        return []
+    instantaneo = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    return [
+        {"local": str(estatistica.traceback[0]), "kb": round(estatistica.size / 1024, 1), "blocos": estatistica.count}
+        for estatistica in instantaneo.statistics(agrupar)[:limite]
+    ]
+
+
+def relatorio(limite=10):
+    atual = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+    return {
+        "ativo": tracemalloc.is_tracing(),
+        "atual_kb": round(atual / 1024, 1),
+        "etapas": estatisticas(),
+        "maiores_alocacoes": maiores_alocacoes(limite),
+    }
+
+
+if QUADROS_PADRAO > 0:
+    ativar(QUADROS_PADRAO)
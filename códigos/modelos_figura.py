@@ -0,0 +1,81 @@
+# Modelos de figura Plotly: a estrutura é validada uma vez e cada chamada só troca dados e rótulos
+import threading
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+try:
+    # Plotly ≥ 6 grava arrays NumPy em base64 (como faz a validação); versões anteriores, como listas
+    from _plotly_utils.utils import to_typed_array_spec as _array_plotly
+except ImportError:
+    def _array_plotly(valor):
+        return valor
+
+
+class FiguraPronta:
+    """
+    Dicionário de figura cuja estrutura já passou pelos validadores do Plotly.
+    Oferece write_html/to_html como a go.Figure, mas sem revalidar nada.
+    """
+    __slots__ = ("dados",)
+
+    def __init__(self, dados):
+        self.dados = dados
+
+    def to_dict(self):
+        return self.dados
+
+    def to_plotly_json(self):
+        return self.dados
+
+    def to_html(self, **opcoes):
+        return pio.to_html(self.dados, validate=False, **opcoes)
+
+    def write_html(self, arquivo, **opcoes):
+        return pio.write_html(self.dados, arquivo, validate=False, **opcoes)
+
+    def figura(self):
+        """go.Figure completa (valida tudo de novo): só para quem precisa editar a figura"""
+        return go.Figure(self.dados)
+
+
+class ModeloFigura:
+    """
+    Modelo de uma figura: construir(variante) monta uma go.Figure de exemplo com os traços,
+    anotações e layout definitivos; ela é validada e convertida em dicionário uma única vez
+    por variante (ex.: com ou sem um traço opcional).
+
+    preencher() recebe {caminho: valor}, com caminhos como ("data", 0, "x") ou
+    ("layout", "title", "text"), e copia só os dicionários e listas no caminho de cada
+    campo alterado; o restante é compartilhado com o modelo e não deve ser modificado.
+    """
+
+    def __init__(self, construir):
+        self._construir = construir
+        self._modelos = {}
+        self._trava = threading.Lock()
+
+    def modelo(self, variante=None):
+        dados = self._modelos.get(variante)
+        if dados is None:
+            with self._trava:
+                dados = self._modelos.get(variante)
+                if dados is None:
+                    dados = self._modelos[variante] = self._construir(variante).to_dict()
+        return dados
+
+    def preencher(self, campos, variante=None):
+        dados = dict(self.modelo(variante))
+        copiados = {id(dados)}
+        for caminho, valor in campos.items():
+            no = dados
+            for chave in caminho[:-1]:
+                filho = no[chave]
+                if id(filho) not in copiados:
+                    filho = dict(filho) if isinstance(filho, dict) else list(filho)
+                    copiados.add(id(filho))
+                    no[chave] = filho
+                no = filho
+            no[caminho[-1]] = _array_plotly(valor) if isinstance(valor, np.ndarray) else valor
+        return FiguraPronta(dados)
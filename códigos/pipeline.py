@@ -0,0 +1,160 @@
+# Fluxo completo: dimensionamento (desafio 1) → parâmetros equivalentes → regulação (desafio 4)
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from artefatos import caminho_artefato, salvar_artefato
+from desafio1 import TransformadorMonofasico1
+from desafio3 import TransformadorMonofasico
+from desafio4 import calcular_regulacao, plotar_diagrama_interativo
+from resultados import ResultadoDesafio4, ResultadoPipeline
+import memoria
+import tabela_respostas
+
+# Resistividade do cobre a 75 °C (Ω·mm²/m), temperatura usual de referência dos enrolamentos
+RESISTIVIDADE_COBRE = 0.0211
+
+# Relação X/R usada quando não há ensaio nem Xeq informado (estimativa para pequenos transformadores)
+RELACAO_X_R_PADRAO = 0.5
+
+RENDERIZACOES = ("3d", "fasorial", "relatorio")
+
+# Pool compartilhado para as etapas que podem rodar em paralelo (renderizações)
+_executor = ThreadPoolExecutor(max_workers=4)
+
+
+def _normalizar_renderizacoes(pedido):
+    """Aceita True/False ou uma lista com os nomes das renderizações desejadas"""
+    if pedido is True:
+        return set(RENDERIZACOES)
+    if not pedido:
+        return set()
+    desconhecidas = set(pedido) - set(RENDERIZACOES)
+    if desconhecidas:
+        raise ValueError(f"Renderizações desconhecidas: {', '.join(sorted(desconhecidas))}")
+    return set(pedido)
+
+
+def _cronometrar(tempos, nome, funcao, *args):
+    inicio = time.perf_counter()
+    try:
+        with memoria.etapa(f"pipeline.{nome}"):
+            return funcao(*args)
+    finally:
+        tempos[nome] = round((time.perf_counter() - inicio) * 1000, 3)
+
+
+def estimar_parametros_equivalentes(transformador: TransformadorMonofasico1, relacao_x_r=RELACAO_X_R_PADRAO) -> Dict:
+    """
+    Estima Req e Xeq (referidos ao secundário) a partir do projeto do desafio 1.
+
+    - R = ρ · N · lm / S  (lm: comprimento médio da espira, S: seção do fio)
+    - Req = Rs + Rp / a², com a = Np / Ns
+    - Xeq = (X/R) · Req, pois o projeto não fornece a dispersão do fluxo
+    """
+    a_cm, b_cm = transformador.dimensoes_nucleo
+    lm = ((2 * a_cm) + (2 * b_cm) + (math.pi * a_cm)) / 100  # em m (mesma espira média de calcular_pesos)
+
+    Np, Ns = transformador.Np[0], transformador.Ns[0]
+    Rp = RESISTIVIDADE_COBRE * Np * lm / transformador.bitola_primario[0]["area_mm2"]
+    Rs = RESISTIVIDADE_COBRE * Ns * lm / transformador.bitola_secundario[0]["area_mm2"]
+    a = Np / Ns
+    R_eq = Rs + Rp / a ** 2
+
+    return {"R_eq": R_eq, "X_eq": relacao_x_r * R_eq, "origem": "estimativa"}
+
+
+def parametros_dos_ensaios(ensaios: Dict) -> TransformadorMonofasico:
+    """Obtém Req/Xeq dos ensaios (desafio 3), sempre referidos ao secundário"""
+    dados = dict(ensaios)
+    dados["referred_to"] = "secundario"
+    return TransformadorMonofasico(**dados)
+
+
+def executar_pipeline(entrada: Dict) -> ResultadoPipeline:
+    """
+    Executa projeto → parâmetros → regulação em memória, sem arquivos intermediários.
+
+    Entrada:
+    - projeto: parâmetros do desafio 1 (obrigatório)
+    - ensaios: parâmetros do desafio 3 (opcional; senão Req/Xeq são estimados)
+    - R_eq / X_eq: valores fixos (opcional; têm prioridade sobre os demais)
+    - relacao_x_r: X/R usado na estimativa (padrão 0.5)
+    - carga: {cos_phi, tipo_fp, I2?, V2?} — por padrão, corrente e tensão nominais do secundário
+    - renderizar: False (padrão), True ou lista entre "3d", "fasorial" e "relatorio"
+      ("relatorio" requer ensaios; com True e sem ensaios ele apenas não é gerado)
+    """
+    if not isinstance(entrada, dict) or "projeto" not in entrada:
+        raise ValueError("Informe os parâmetros do dimensionamento em 'projeto'")
+
+    inicio = time.perf_counter()
+    renderizacoes = _normalizar_renderizacoes(entrada.get("renderizar", False))
+    if "relatorio" in renderizacoes and not entrada.get("ensaios"):
+        if entrada.get("renderizar") is not True:
+            raise ValueError("A renderização 'relatorio' requer os ensaios em 'ensaios'")
+        renderizacoes.discard("relatorio")
+    tempos, pendentes, arquivos = {}, {}, {}
+
+    # 1. Dimensionamento
+    transformador = TransformadorMonofasico1()
+    if not _cronometrar(tempos, "carregar_dados", transformador.carregar_dados, entrada["projeto"]):
+        raise ValueError("Parâmetros de projeto inválidos")
+    _cronometrar(tempos, "projeto", tabela_respostas.calcular_projeto, transformador)
+
+    # O modelo 3D só depende da geometria: renderiza enquanto as próximas etapas são calculadas
+    if "3d" in renderizacoes:
+        # Os caminhos são resolvidos aqui: o diretório de saída vale para a thread da requisição
+        pendentes["3d"] = _executor.submit(_cronometrar, tempos, "render_3d", transformador.gerar_imagem_3d,
+                                           0, caminho_artefato("transformador_3d_interativo.html"))
+
+    # 2. Parâmetros equivalentes (referidos ao secundário)
+    ensaio = None
+    if "R_eq" in entrada and "X_eq" in entrada:
+        equivalentes = {"R_eq": entrada["R_eq"], "X_eq": entrada["X_eq"], "origem": "informado"}
+    elif entrada.get("ensaios"):
+        ensaio = _cronometrar(tempos, "parametros", parametros_dos_ensaios, entrada["ensaios"])
+        equivalentes = {"R_eq": ensaio.Req, "X_eq": ensaio.Xeq, "origem": "ensaios"}
+    else:
+        equivalentes = _cronometrar(tempos, "parametros", estimar_parametros_equivalentes,
+                                    transformador, entrada.get("relacao_x_r", RELACAO_X_R_PADRAO))
+
+    # R_eq/X_eq informados têm prioridade, mas o relatório pedido ainda vem dos ensaios
+    if ensaio is None and "relatorio" in renderizacoes:
+        ensaio = _cronometrar(tempos, "parametros", parametros_dos_ensaios, entrada["ensaios"])
+    if "relatorio" in renderizacoes:
+        pendentes["relatorio"] = _executor.submit(_cronometrar, tempos, "render_relatorio", ensaio.gerar_relatorio_ensaios,
+                                                 caminho_artefato("relatorio_ensaios.html"))
+
+    # 3. Regulação no ponto de operação nominal (ou no informado em 'carga')
+    carga = entrada.get("carga", {})
+    parametros_regulacao = {
+        "V2": carga.get("V2", transformador.Vs[0]),
+        "I2": carga.get("I2", transformador.Is[0]),
+        "R_eq": equivalentes["R_eq"],
+        "X_eq": equivalentes["X_eq"],
+        "cos_phi": carga.get("cos_phi", 1.0),
+        "tipo_fp": carga.get("tipo_fp", "atrasado")
+    }
+    fasores = _cronometrar(tempos, "regulacao", calcular_regulacao, parametros_regulacao)
+
+    if "fasorial" in renderizacoes:
+        caminho_fasorial = caminho_artefato("diagrama_fasorial.html")
+
+        def renderizar_fasorial():
+            return salvar_artefato(caminho_fasorial, plotar_diagrama_interativo(parametros_regulacao, fasores).write_html)
+        pendentes["fasorial"] = _executor.submit(_cronometrar, tempos, "render_fasorial", renderizar_fasorial)
+
+    # Aguarda as renderizações em andamento
+    for nome, futuro in pendentes.items():
+        arquivos[nome] = futuro.result()
+    tempos["total"] = round((time.perf_counter() - inicio) * 1000, 3)
+
+    return ResultadoPipeline(
+        projeto=transformador.gerar_resultado(),
+        equivalentes=equivalentes,
+        regulacao=ResultadoDesafio4(fasores["regulacao"], arquivos.get("fasorial"), fasores["V20"]),
+        carga=parametros_regulacao,
+        arquivos=arquivos,
+        tempos_ms=tempos
+    )
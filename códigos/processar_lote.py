@@ -0,0 +1,321 @@
+# Processamento em lote offline: diretórios de arquivos JSON de entrada distribuídos em um pool de processos
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from artefatos import capturar_artefatos
+from banco_resultados import CLASSES_REGISTRADAS, BancoResultados
+from coalescencia import chave_canonica
+from desafio1 import TransformadorMonofasico1
+from desafio2 import calcular_desafio2
+from desafio3 import executar_desafio3
+from desafio4 import executar_desafio4
+from esquemas import CLASSES, ErroValidacao, validar
+from incerteza import executar_incerteza
+from inrush import executar_inrush
+import limites
+from pipeline import executar_pipeline
+from simulacao_carga import executar_simulacao_carga
+from resultados import codificar_json
+import tabela_respostas
+
+try:
+    import pyarrow as pa  # Saída Parquet opcional; JSONL funciona sem dependências extras
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+# Estado de cada processo trabalhador, definido em _iniciar_trabalhador
+_renderizar = False
+_diretorio_artefatos = None
+_raiz_entradas = None
+_classe_padrao = None
+_banco = None
+
+
+def listar_entradas(padroes):
+    """Expande diretórios (recursivamente) e padrões glob em uma lista ordenada de caminhos absolutos"""
+    arquivos = set()
+    for padrao in padroes:
+        if os.path.isdir(padrao):
+            encontrados = glob.glob(os.path.join(padrao, "**", "*.json"), recursive=True)
+        elif glob.has_magic(padrao):
+            encontrados = glob.glob(padrao, recursive=True)
+        else:
+            encontrados = [padrao]
+        arquivos.update(os.path.abspath(caminho) for caminho in encontrados if os.path.isfile(caminho))
+    return sorted(arquivos)
+
+
+def identificar(caminho, dados, classe_padrao=None):
+    """
+    Determina a classe e os parâmetros de um arquivo de entrada, nesta ordem:
+    1. conteúdo no formato da API: {"classe": ..., "parametros": {...}}
+    2. nome do arquivo ou de um diretório que comece com a classe (ex.: desafio3/ensaio_07.json)
+    3. classe_padrao (--classe)
+    """
+    if isinstance(dados, dict) and "classe" in dados and "parametros" in dados:
+        return dados["classe"], dados["parametros"]
+
+    # Nomes mais longos primeiro, para que um prefixo não esconda outro
+    candidatos = sorted(CLASSES, key=len, reverse=True)
+    partes = os.path.normpath(caminho).split(os.sep)
+    for parte in reversed(partes):
+        for classe in candidatos:
+            if parte.lower().startswith(classe):
+                return classe, dados
+
+    if classe_padrao:
+        return classe_padrao, dados
+    raise ValueError("Classe não identificada: use {\"classe\", \"parametros\"}, "
+                     "um nome de arquivo/diretório iniciado pela classe ou --classe")
+
+
+def calcular(classe, parametros, renderizar=False):
+    """Executa uma classe em memória; sem renderização, nenhum arquivo é gerado"""
+    if classe == "desafio1":
+        transformador = TransformadorMonofasico1()
+        if not transformador.carregar_dados(parametros):
+            raise ValueError("Parâmetros de projeto inválidos")
+        tabela_respostas.calcular_projeto(transformador)
+        if renderizar:
+            transformador.gerar_imagem_3d()
+        return transformador.gerar_resultado()
+
+    if classe == "desafio2":
+        transformador = calcular_desafio2(parametros)
+        # O gráfico em base64 não cabe em um arquivo de resultados: grava o PNG e guarda as formas de onda
+        resposta = {"colunas": transformador.colunas()}
+        if renderizar:
+            transformador.gerar_grafico_base64(salvar_png_em="grafico_magnetizacao.png")
+            resposta["grafico"] = "grafico_magnetizacao.png"
+        return resposta
+
+    if classe == "desafio3":
+        return executar_desafio3(parametros or None, renderizar=renderizar)
+
+    if classe == "desafio4":
+        return executar_desafio4(parametros, renderizar=renderizar)
+
+    if classe == "inrush":
+        return executar_inrush(parametros)
+
+    if classe == "simulacao_carga":
+        return executar_simulacao_carga(parametros)
+
+    if classe == "incerteza":
+        # Os trabalhadores do Pool são daemônicos e não podem criar processos: o lote já paraleliza
+        return executar_incerteza({**parametros, "processos": 1})
+
+    if classe == "pipeline":
+        if not renderizar:
+            parametros = {**parametros, "renderizar": False}
+        return executar_pipeline(parametros)
+
+    raise ValueError(f"Classe '{classe}' não suportada")
+
+
+def _iniciar_trabalhador(renderizar, diretorio_artefatos, raiz_entradas, classe_padrao, caminho_banco):
+    global _renderizar, _diretorio_artefatos, _raiz_entradas, _classe_padrao, _banco
+    _renderizar = renderizar
+    _diretorio_artefatos = diretorio_artefatos
+    _raiz_entradas = raiz_entradas
+    _classe_padrao = classe_padrao
+    _banco = BancoResultados(caminho_banco) if caminho_banco else None
+    # As mensagens dos desafios iriam para o terminal de milhares de tarefas: descarta
+    sys.stdout = open(os.devnull, "w")
+
+
+def _processar(caminho):
+    """Tarefa do trabalhador: lê, valida e calcula um arquivo; retorna a linha JSONL já codificada"""
+    linha = {"arquivo": caminho}
+    inicio = time.perf_counter()
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        classe, parametros = identificar(caminho, dados, _classe_padrao)
+        linha["classe"] = classe
+        parametros = validar(classe, parametros)
+        limites.verificar(classe, parametros)
+
+        if _renderizar:
+            # Os desafios gravam arquivos com nomes fixos no diretório atual: um diretório por entrada,
+            # espelhando a estrutura dos diretórios de entrada
+            relativo = os.path.relpath(os.path.splitext(caminho)[0], _raiz_entradas)
+            destino = os.path.join(_diretorio_artefatos, relativo)
+            os.makedirs(destino, exist_ok=True)
+            os.chdir(destino)
+            linha["artefatos"] = destino
+
+        registrar = _banco is not None and classe in CLASSES_REGISTRADAS
+        chave = chave_canonica(classe, parametros)
+        resultado = _banco.buscar(chave, _renderizar) if registrar else None
+        if resultado is not None:
+            linha["cache"] = True
+        else:
+            with capturar_artefatos() as gerados, limites.protegido(classe):
+                resultado = calcular(classe, parametros, _renderizar)
+            if resultado is None:
+                raise ValueError("Cálculo não retornou resultado")
+            if registrar and hasattr(resultado, "para_json"):
+                _banco.registrar(classe, chave, parametros, resultado, gerados, _renderizar)
+        linha["resposta"] = resultado
+    except (ErroValidacao, limites.LimiteExcedido) as e:
+        linha.update(e.para_json())
+    except Exception as e:
+        linha["erro"] = f"{type(e).__name__}: {e}"
+    linha["tempo_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+    return codificar_json(linha) + b"\n"
+
+
+def ler_progresso(caminho):
+    """
+    Lê as linhas já gravadas e retorna os arquivos concluídos. Uma última linha
+    incompleta (execução interrompida durante a escrita) é removida do arquivo.
+    """
+    concluidos = set()
+    if not os.path.exists(caminho):
+        return concluidos
+    with open(caminho, "rb+") as f:
+        conteudo = f.read()
+        fim = conteudo.rfind(b"\n") + 1
+        if fim < len(conteudo):
+            f.truncate(fim)
+    for linha in conteudo[:fim].splitlines():
+        try:
+            concluidos.add(json.loads(linha)["arquivo"])
+        except (ValueError, KeyError):
+            continue
+    return concluidos
+
+
+def _achatar(valor, prefixo, destino):
+    """Campos aninhados viram colunas 'a.b.c'; listas de números são mantidas como uma coluna de listas"""
+    if isinstance(valor, dict):
+        for chave, item in valor.items():
+            _achatar(item, f"{prefixo}.{chave}" if prefixo else str(chave), destino)
+    elif isinstance(valor, list) and any(isinstance(item, (dict, list)) for item in valor):
+        for indice, item in enumerate(valor):
+            _achatar(item, f"{prefixo}.{indice}", destino)
+    else:
+        destino[prefixo] = valor
+    return destino
+
+
+def gravar_parquet(progresso, destino):
+    """Converte o arquivo JSONL de progresso em uma tabela Parquet (uma linha por arquivo de entrada)"""
+    linhas = []
+    with open(progresso, "rb") as f:
+        for linha in f:
+            linhas.append(_achatar(json.loads(linha), "", {}))
+
+    nomes = list(dict.fromkeys(nome for linha in linhas for nome in linha))
+    colunas = {}
+    for nome in nomes:
+        valores = [linha.get(nome) for linha in linhas]
+        try:
+            colunas[nome] = pa.array(valores)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Tipos mistos entre classes diferentes: a coluna guarda o JSON de cada valor
+            colunas[nome] = pa.array([None if v is None else json.dumps(v, ensure_ascii=False) for v in valores])
+    pa.parquet.write_table(pa.table(colunas), destino)
+    return len(linhas)
+
+
+def processar(entradas, saida, processos=None, tamanho_lote=None, renderizar=False,
+              diretorio_artefatos=None, classe_padrao=None, recomecar=False, caminho_banco=None):
+    """
+    Processa todos os arquivos de entrada em um pool de processos, gravando uma linha
+    por arquivo assim que cada um termina. A própria saída JSONL (ou um arquivo
+    '.parcial.jsonl' ao lado da saída Parquet) registra o progresso: ao rodar de novo,
+    arquivos já presentes nele são ignorados. Com caminho_banco, os desafios 1, 3 e 4 são
+    registrados no banco de resultados e entradas já calculadas não são recalculadas.
+    """
+    parquet = saida.endswith(".parquet")
+    if parquet and pa is None:
+        raise RuntimeError("Saída Parquet indisponível: instale o pacote 'pyarrow' (ou use .jsonl)")
+    if classe_padrao is not None and classe_padrao not in CLASSES:
+        raise ValueError(f"--classe deve ser um dos: {', '.join(CLASSES)}")
+
+    progresso = saida + ".parcial.jsonl" if parquet else saida
+    if caminho_banco:
+        BancoResultados(caminho_banco)  # Cria as tabelas antes de os trabalhadores abrirem o banco
+    if recomecar and os.path.exists(progresso):
+        os.remove(progresso)
+
+    arquivos = listar_entradas(entradas)
+    concluidos = ler_progresso(progresso)
+    pendentes = [caminho for caminho in arquivos if caminho not in concluidos]
+    print(f"{len(arquivos)} arquivos de entrada, {len(arquivos) - len(pendentes)} já processados, "
+          f"{len(pendentes)} pendentes", file=sys.stderr)
+
+    processos = processos or os.cpu_count() or 2
+    # Lotes grandes reduzem a troca de mensagens; pequenos equilibram melhor a carga no final
+    tamanho_lote = tamanho_lote or max(1, min(64, len(pendentes) // (processos * 4)))
+    diretorio_artefatos = os.path.abspath(diretorio_artefatos or os.path.splitext(saida)[0] + "_artefatos")
+
+    inicio = time.perf_counter()
+    erros = feitos = 0
+    if pendentes:
+        raiz = os.path.dirname(os.path.commonprefix([os.path.dirname(c) + os.sep for c in arquivos]))
+        with open(progresso, "ab") as f, multiprocessing.Pool(
+                processos, _iniciar_trabalhador, (renderizar, diretorio_artefatos, raiz, classe_padrao, caminho_banco)) as pool:
+            try:
+                for linha in pool.imap_unordered(_processar, pendentes, chunksize=tamanho_lote):
+                    f.write(linha)
+                    f.flush()  # Cada linha gravada é um ponto de retomada
+                    feitos += 1
+                    erros += b'"erro":' in linha
+                    if feitos % 500 == 0:
+                        decorrido = time.perf_counter() - inicio
+                        print(f"{feitos}/{len(pendentes)} ({feitos / decorrido:.0f} arquivos/s)", file=sys.stderr)
+            except KeyboardInterrupt:
+                pool.terminate()
+                print(f"\nInterrompido após {feitos} arquivos; execute o mesmo comando para continuar",
+                      file=sys.stderr)
+                raise
+
+    decorrido = time.perf_counter() - inicio
+    print(f"{feitos} arquivos processados em {decorrido:.1f} s ({erros} com erro)", file=sys.stderr)
+
+    if parquet:
+        total = gravar_parquet(progresso, saida)
+        os.remove(progresso)
+        print(f"{total} linhas gravadas em {saida}", file=sys.stderr)
+    return {"processados": feitos, "erros": erros, "ignorados": len(arquivos) - len(pendentes)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processa em lote arquivos JSON de entrada dos desafios")
+    parser.add_argument("entradas", nargs="+", help="diretórios (busca recursiva por *.json) ou padrões glob")
+    parser.add_argument("-o", "--saida", default="resultados.jsonl",
+                        help="arquivo de saída .jsonl ou .parquet (padrão: resultados.jsonl)")
+    parser.add_argument("--classe", choices=CLASSES,
+                        help="classe dos arquivos que não a indicam no conteúdo nem no nome")
+    parser.add_argument("-p", "--processos", type=int, default=0, help="processos (padrão: número de CPUs)")
+    parser.add_argument("--tamanho-lote", type=int, default=0,
+                        help="arquivos enviados por vez a cada processo (padrão: automático)")
+    parser.add_argument("--sem-renderizacao", action="store_true",
+                        help="não gera gráficos, modelos 3D nem relatórios")
+    parser.add_argument("--artefatos", help="diretório dos arquivos renderizados (padrão: <saida>_artefatos)")
+    parser.add_argument("--recomecar", action="store_true", help="descarta o progresso de uma execução anterior")
+    parser.add_argument("--banco", help="banco de resultados SQLite para registrar e reaproveitar cálculos")
+    args = parser.parse_args(argv)
+
+    try:
+        resumo = processar(args.entradas, args.saida, args.processos, args.tamanho_lote,
+                           not args.sem_renderizacao, args.artefatos, args.classe, args.recomecar, args.banco)
+    except KeyboardInterrupt:
+        return 130
+    except (RuntimeError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    return 1 if resumo["erros"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+# Registro (logging) estruturado: fila assíncrona, amostragem por evento e modo de produção silencioso
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+# LOG_MODO=producao: JSON compacto, apenas avisos/erros e um registro por requisição.
+# Qualquer outro valor: texto legível, com os eventos informativos dos cálculos.
+MODO = os.environ.get("LOG_MODO", "desenvolvimento").strip().lower()
+PRODUCAO = MODO in ("producao", "produção", "production")
+
+# Nível dos registros dos cálculos (o registro por requisição é sempre INFO)
+NIVEL = os.environ.get("LOG_NIVEL", "WARNING" if PRODUCAO else "INFO").upper()
+
+# Amostragem por evento: "evento=taxa,..." (ex.: "arquivo_salvo=0.01,requisicao=0.1").
+# Avisos e erros nunca são descartados pela amostragem.
+AMOSTRAGEM = os.environ.get("LOG_AMOSTRAGEM", "")
+
+# Registros aguardando o envio; com a fila cheia os novos são descartados (e contados)
+TAMANHO_FILA = int(os.environ.get("LOG_TAMANHO_FILA", 10000))
+
+# Destino dos registros: arquivo ou, se vazio, stderr
+ARQUIVO = os.environ.get("LOG_ARQUIVO", "")
+
+# Logger do registro compacto por requisição
+LOGGER_REQUISICOES = "requisicao"
+
+# Atributos padrão de um LogRecord: o que não estiver aqui veio de extra={...}
+_ATRIBUTOS_PADRAO = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _ler_amostragem(texto):
+    taxas = {}
+    for item in texto.split(","):
+        if "=" in item:
+            evento, taxa = item.split("=", 1)
+            taxas[evento.strip()] = min(max(float(taxa), 0.0), 1.0)
+    return taxas
+
+
+class FiltroAmostragem(logging.Filter):
+    """
+    Mantém uma fração fixa de cada evento (atributo 'evento' do registro, ou o nome do
+    logger). Determinística: com taxa 0,1 passa exatamente 1 registro a cada 10.
+    """
+
+    def __init__(self, taxas):
+        super().__init__()
+        self.taxas = taxas
+        self._contagens = {}
+        self._trava = threading.Lock()
+
+    def filter(self, registro):
+        if registro.levelno >= logging.WARNING:
+            return True
+        evento = getattr(registro, "evento", registro.name)
+        taxa = self.taxas.get(evento)
+        if taxa is None or taxa >= 1:
+            return True
+        with self._trava:
+            contagem = self._contagens.get(evento, 0)
+            self._contagens[evento] = contagem + 1
+        # Passa quando a parte inteira de contagem·taxa avança
+        return int((contagem + 1) * taxa) > int(contagem * taxa)
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro, com os campos de extra={...} no nível superior"""
+
+    def format(self, registro):
+        dados = {
+            "ts": round(registro.created, 3),
+            "nivel": registro.levelname,
+            "logger": registro.name,
+            "msg": registro.getMessage(),
+        }
+        for nome, valor in vars(registro).items():
+            if nome not in _ATRIBUTOS_PADRAO:
+                dados[nome] = valor
+        if registro.exc_text:
+            dados["excecao"] = registro.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+class FormatadorTexto(logging.Formatter):
+    """Texto legível para desenvolvimento, com os campos extras ao final"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s", "%H:%M:%S")
+
+    def format(self, registro):
+        texto = super().format(registro)
+        extras = {nome: valor for nome, valor in vars(registro).items() if nome not in _ATRIBUTOS_PADRAO}
+        extras.pop("evento", None)
+        if extras:
+            texto += " " + " ".join(f"{nome}={valor}" for nome, valor in extras.items())
+        return texto
+
+
+class ManipuladorFila(logging.handlers.QueueHandler):
+    """
+    Enfileira sem bloquear: quem registra só formata a mensagem e a coloca na fila;
+    a escrita no destino acontece na thread do QueueListener. Fila cheia descarta.
+    """
+
+    def __init__(self, fila):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def prepare(self, registro):
+        # Mensagem já interpolada e exceção como texto: argumentos e tracebacks não atravessam a fila
+        registro = copy.copy(registro)
+        registro.msg = registro.getMessage()
+        registro.args = None
+        if registro.exc_info:
+            registro.exc_text = logging.Formatter().formatException(registro.exc_info)
+            registro.exc_info = None
+        return registro
+
+    def enqueue(self, registro):
+        try:
+            self.queue.put_nowait(registro)
+        except queue.Full:
+            self.descartados += 1
+
+
+_estado = {"ouvinte": None, "manipulador": None}
+_trava = threading.Lock()
+
+
+def _destino():
+    if ARQUIVO:
+        return logging.FileHandler(ARQUIVO, encoding="utf-8")
+    return logging.StreamHandler(sys.stderr)
+
+
+def configurar():
+    """
+    Instala o manipulador assíncrono no logger raiz (uma vez por processo).
+    Chamado na importação de app.py; scripts de linha de comando podem chamá-lo também.
+    """
+    with _trava:
+        if _estado["ouvinte"] is not None:
+            return _estado["manipulador"]
+        destino = _destino()
+        destino.setFormatter(FormatadorJSON() if PRODUCAO else FormatadorTexto())
+
+        fila = queue.Queue(maxsize=TAMANHO_FILA)
+        manipulador = ManipuladorFila(fila)
+        taxas = _ler_amostragem(AMOSTRAGEM)
+        if taxas:
+            manipulador.addFilter(FiltroAmostragem(taxas))
+
+        raiz = logging.getLogger()
+        raiz.setLevel(NIVEL)
+        raiz.addHandler(manipulador)
+        # Registro por requisição e ciclo de vida do servidor aparecem também em produção
+        for nome in (LOGGER_REQUISICOES, "servidor"):
+            logging.getLogger(nome).setLevel(logging.INFO)
+        # Em produção o registro por requisição substitui o log de acesso do Werkzeug
+        logging.getLogger("werkzeug").setLevel(logging.WARNING if PRODUCAO else logging.INFO)
+
+        ouvinte = logging.handlers.QueueListener(fila, destino, respect_handler_level=True)
+        ouvinte.start()
+        _estado.update(ouvinte=ouvinte, manipulador=manipulador)
+        return manipulador
+
+
+def encerrar():
+    """Esvazia a fila e para a thread de escrita"""
+    with _trava:
+        ouvinte = _estado["ouvinte"]
+        if ouvinte is not None:
+            ouvinte.stop()
+            _estado["ouvinte"] = None
+            logging.getLogger().removeHandler(_estado["manipulador"])
+            _estado["manipulador"] = None
+
+
+def _apos_fork():
+    # A thread do QueueListener não existe no processo filho: sem isto a fila só cresceria
+    global _trava
+    _trava = threading.Lock()
+    manipulador = _estado["manipulador"]
+    if manipulador is None:
+        return
+    logging.getLogger().removeHandler(manipulador)
+    _estado.update(ouvinte=None, manipulador=None)
+    configurar()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_apos_fork)
+atexit.register(encerrar)
+
+
+def descartados():
+    manipulador = _estado["manipulador"]
+    return manipulador.descartados if manipulador is not None else 0
+
@@ -0,0 +1,374 @@
+# Tipos compactos de resultado de cada desafio e codificação única para a resposta da API
+import json
+import math
+from types import MappingProxyType
+
+try:
+    import orjson  # Codificador JSON mais rápido, usado se estiver instalado
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack  # Codificação binária opcional (MessagePack)
+except ImportError:
+    msgpack = None
+
+
+def _finito(valor):
+    """Converte inf/nan em None, pois JSON não representa esses valores"""
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+class ResultadoDesafio1:
+    """Resultado do dimensionamento (desafio 1), com os campos no nível de um único objeto"""
+    __slots__ = (
+        "tipo_transformador", "Vp", "Vs", "potencia", "frequencia", "tipo_lamina",
+        "Np", "Ns", "bitola_primario", "bitola_secundario",
+        "lamina", "quant_laminas", "Sm", "Sg", "a", "b",
+        "peso_ferro", "peso_cobre", "viabilidade", "mensagem_viabilidade",
+    )
+
+    def __init__(self, tipo_transformador, Vp, Vs, potencia, frequencia, tipo_lamina,
+                 Np, Ns, bitola_primario, bitola_secundario,
+                 lamina, quant_laminas, Sm, Sg, a, b,
+                 peso_ferro, peso_cobre, viabilidade, mensagem_viabilidade):
+        self.tipo_transformador = tipo_transformador
+        self.Vp = Vp
+        self.Vs = Vs
+        self.potencia = potencia
+        self.frequencia = frequencia
+        self.tipo_lamina = tipo_lamina
+        self.Np = Np
+        self.Ns = Ns
+        self.bitola_primario = bitola_primario
+        self.bitola_secundario = bitola_secundario
+        self.lamina = lamina
+        self.quant_laminas = quant_laminas
+        self.Sm = Sm
+        self.Sg = Sg
+        self.a = a
+        self.b = b
+        self.peso_ferro = peso_ferro
+        self.peso_cobre = peso_cobre
+        self.viabilidade = viabilidade
+        self.mensagem_viabilidade = mensagem_viabilidade
+
+    def para_json(self):
+        """Estrutura aninhada da resposta (mesmo formato de gerar_resultados_json)"""
+        return {
+            "dados_entrada": {
+                "tipo_transformador": self.tipo_transformador,
+                "tensao_primaria": self.Vp,
+                "tensao_secundaria": self.Vs,
+                "potencia": self.potencia,
+                "frequencia": self.frequencia,
+                "tipo_lamina": self.tipo_lamina
+            },
+            "resultados": {
+                "espiras": {
+                    "primario": self.Np,
+                    "secundario": self.Ns
+                },
+                "bitolas": {
+                    "primario": [dict(b) for b in self.bitola_primario],
+                    "secundario": [dict(b) for b in self.bitola_secundario]
+                },
+                "nucleo": {
+                    "lamina": self.lamina,
+                    "quantidade": self.quant_laminas,
+                    "secao_magnetica": self.Sm,
+                    "secao_geometrica": self.Sg,
+                    "dimensoes": {
+                        "a": self.a,
+                        "b": self.b
+                    }
+                },
+                "pesos": {
+                    "ferro": round(self.peso_ferro, 2),
+                    "cobre": round(self.peso_cobre, 2)
+                },
+                "viabilidade": {
+                    "executavel": self.viabilidade,
+                    "mensagem": self.mensagem_viabilidade
+                },
+                "dimensoes_finais": {
+                    "largura": self.a + 4,
+                    "profundidade": self.b + 4,
+                    "altura": self.b * 1.5
+                }
+            },
+        }
+
+
+class ResultadoDesafio2:
+    """Resultado da corrente de magnetização (desafio 2): gráfico Im(t) em base64"""
+    __slots__ = ("imagem_base64", "caminho_png")
+
+    def __init__(self, imagem_base64, caminho_png=None):
+        self.imagem_base64 = imagem_base64
+        self.caminho_png = caminho_png
+
+    def para_json(self):
+        return self.imagem_base64
+
+
+class ResultadoDesafio3:
+    """Parâmetros obtidos nos ensaios (desafio 3) e arquivos gerados"""
+    __slots__ = ("Rc", "Xm", "Zphi", "Ic", "Im", "Req", "Xeq", "Zcc", "relatorio_html", "diagrama_html")
+
+    def __init__(self, Rc, Xm, Zphi, Ic, Im, Req, Xeq, Zcc, relatorio_html=None, diagrama_html=None):
+        self.Rc = Rc
+        self.Xm = Xm
+        self.Zphi = Zphi
+        self.Ic = Ic
+        self.Im = Im
+        self.Req = Req
+        self.Xeq = Xeq
+        self.Zcc = Zcc
+        self.relatorio_html = relatorio_html
+        self.diagrama_html = diagrama_html
+
+    def para_json(self):
+        return {
+            "relatorio_html": self.relatorio_html,
+            "diagrama_html": self.diagrama_html,
+            "parametros": {
+                "Rc": _finito(self.Rc), "Xm": _finito(self.Xm), "Zphi": _finito(self.Zphi),
+                "Ic": self.Ic, "Im": self.Im,
+                "Req": _finito(self.Req), "Xeq": _finito(self.Xeq), "Zcc": _finito(self.Zcc)
+            }
+        }
+
+
+class ResultadoDesafio4:
+    """
+    Regulação de tensão (desafio 4).
+
+    Mantém o formato (regulacao, caminho_html) da versão anterior: pode ser
+    desempacotado como tupla e é serializado como lista.
+    """
+    __slots__ = ("regulacao", "caminho_html", "V20")
+
+    def __init__(self, regulacao, caminho_html=None, V20=None):
+        self.regulacao = regulacao
+        self.caminho_html = caminho_html
+        self.V20 = V20
+
+    def __iter__(self):
+        return iter((self.regulacao, self.caminho_html))
+
+    def para_json(self):
+        return [self.regulacao, self.caminho_html]
+
+
+class ResultadoInrush:
+    """Picos da corrente de energização para a grade ângulo de fechamento × fluxo residual"""
+    __slots__ = ("angulos", "fluxos_residuais", "pico", "instante_pico", "passos",
+                 "fluxo_pico", "t_saida", "formas_de_onda")
+
+    def __init__(self, angulos, fluxos_residuais, pico, instante_pico, passos,
+                 fluxo_pico, t_saida=None, formas_de_onda=None):
+        self.angulos = angulos
+        self.fluxos_residuais = fluxos_residuais
+        self.pico = pico
+        self.instante_pico = instante_pico
+        self.passos = passos
+        self.fluxo_pico = fluxo_pico
+        self.t_saida = t_saida
+        self.formas_de_onda = formas_de_onda
+
+    def para_json(self):
+        dados = {
+            "angulos": self.angulos,
+            "fluxos_residuais": self.fluxos_residuais,
+            "fluxo_pico": self.fluxo_pico,
+            "pico": self.pico,
+            "instante_pico": self.instante_pico,
+            "passos": self.passos
+        }
+        if self.formas_de_onda is not None:
+            dados["t"] = self.t_saida
+            dados["formas_de_onda"] = self.formas_de_onda
+        return dados
+
+
+class ResultadoCarga:
+    """Corrente primária sob carga: resumo harmônico de cada carga e, opcionalmente, as formas de onda"""
+    __slots__ = ("potencia", "cos_phi", "tipo_fp", "eficaz", "pico", "fator_crista", "dht",
+                 "potencia_ativa", "fator_potencia", "harmonicas", "t", "corrente_vazio", "formas_de_onda")
+
+    def __init__(self, potencia, cos_phi, tipo_fp, eficaz, pico, fator_crista, dht,
+                 potencia_ativa, fator_potencia, harmonicas, t=None, corrente_vazio=None, formas_de_onda=None):
+        self.potencia = potencia
+        self.cos_phi = cos_phi
+        self.tipo_fp = tipo_fp
+        self.eficaz = eficaz
+        self.pico = pico
+        self.fator_crista = fator_crista
+        self.dht = dht
+        self.potencia_ativa = potencia_ativa
+        self.fator_potencia = fator_potencia
+        self.harmonicas = harmonicas
+        self.t = t
+        self.corrente_vazio = corrente_vazio
+        self.formas_de_onda = formas_de_onda
+
+    def para_json(self):
+        dados = {
+            "cargas": {"potencia": self.potencia, "cos_phi": self.cos_phi, "tipo_fp": self.tipo_fp.tolist()},
+            "eficaz": self.eficaz,
+            "pico": self.pico,
+            "fator_crista": [_finito(float(v)) for v in self.fator_crista],
+            "dht": [_finito(float(v)) for v in self.dht],
+            "potencia_ativa": self.potencia_ativa,
+            "fator_potencia": [_finito(float(v)) for v in self.fator_potencia],
+            "harmonicas": self.harmonicas
+        }
+        if self.formas_de_onda is not None:
+            dados["t"] = self.t
+            dados["corrente_vazio"] = self.corrente_vazio
+            dados["formas_de_onda"] = self.formas_de_onda
+        return dados
+
+
+class ResultadoIncerteza:
+    """Estatísticas de Monte Carlo de Rc, Xm, Req e Xeq e a sensibilidade a cada medição"""
+    __slots__ = ("amostras", "distribuicao", "limites", "estatisticas", "sensibilidade")
+
+    def __init__(self, amostras, distribuicao, limites, estatisticas, sensibilidade):
+        self.amostras = amostras
+        self.distribuicao = distribuicao
+        self.limites = limites
+        self.estatisticas = estatisticas
+        self.sensibilidade = sensibilidade
+
+    def para_json(self):
+        estatisticas = {
+            saida: {
+                chave: ({p: _finito(v) for p, v in valor.items()} if chave == "percentis" else _finito(valor))
+                for chave, valor in dados.items()
+            }
+            for saida, dados in self.estatisticas.items()
+        }
+        return {
+            "amostras": self.amostras,
+            "distribuicao": self.distribuicao,
+            "limites_instrumentos": self.limites,
+            "estatisticas": estatisticas,
+            "sensibilidade": self.sensibilidade
+        }
+
+
+class MedicaoBancada:
+    """Valores por janela de uma captura de bancada (eficazes, potência ativa e fasores fundamentais)"""
+    __slots__ = ("janelas", "amostras_janela", "tensao_eficaz", "corrente_eficaz", "potencia",
+                 "tensao_fundamental", "corrente_fundamental")
+
+    def __init__(self, janelas, amostras_janela, tensao_eficaz, corrente_eficaz, potencia,
+                 tensao_fundamental, corrente_fundamental):
+        self.janelas = janelas
+        self.amostras_janela = amostras_janela
+        self.tensao_eficaz = tensao_eficaz
+        self.corrente_eficaz = corrente_eficaz
+        self.potencia = potencia
+        self.tensao_fundamental = tensao_fundamental
+        self.corrente_fundamental = corrente_fundamental
+
+    def para_json(self):
+        return {
+            "janelas": self.janelas,
+            "amostras_janela": self.amostras_janela,
+            "tensao_eficaz": self.tensao_eficaz,
+            "corrente_eficaz": self.corrente_eficaz,
+            "potencia": self.potencia,
+            # JSON não tem números complexos: fasores em parte real e imaginária (cópias contíguas)
+            "tensao_fundamental": {"real": self.tensao_fundamental.real.copy(),
+                                   "imag": self.tensao_fundamental.imag.copy()},
+            "corrente_fundamental": {"real": self.corrente_fundamental.real.copy(),
+                                     "imag": self.corrente_fundamental.imag.copy()},
+        }
+
+
+class ResultadoBancada:
+    """Medições extraídas das capturas dos ensaios e os parâmetros do desafio 3 calculados com elas"""
+    __slots__ = ("medicoes", "ensaios", "parametros")
+
+    def __init__(self, medicoes, ensaios, parametros):
+        self.medicoes = medicoes
+        self.ensaios = ensaios
+        self.parametros = parametros
+
+    def para_json(self):
+        return {
+            "medicoes": self.medicoes,
+            "ensaios": self.ensaios,
+            "parametros": self.parametros
+        }
+
+
+class ResultadoPipeline:
+    """Resultado combinado do fluxo projeto → parâmetros → regulação, com tempos por etapa"""
+    __slots__ = ("projeto", "equivalentes", "regulacao", "carga", "arquivos", "tempos_ms")
+
+    def __init__(self, projeto, equivalentes, regulacao, carga, arquivos, tempos_ms):
+        self.projeto = projeto
+        self.equivalentes = equivalentes
+        self.regulacao = regulacao
+        self.carga = carga
+        self.arquivos = arquivos
+        self.tempos_ms = tempos_ms
+
+    def para_json(self):
+        return {
+            "projeto": self.projeto,
+            "parametros_equivalentes": self.equivalentes,
+            "regulacao": {
+                "carga": self.carga,
+                "V20": self.regulacao.V20,
+                "percentual": self.regulacao.regulacao
+            },
+            "arquivos": self.arquivos,
+            "tempos_ms": self.tempos_ms
+        }
+
+
+def _converter(obj):
+    """Hook de serialização para tipos que o JSON/MessagePack não conhecem"""
+    if hasattr(obj, "para_json"):
+        return obj.para_json()
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    if hasattr(obj, "item"):  # Escalares NumPy
+        return obj.item()
+    if hasattr(obj, "tolist"):  # Arrays NumPy
+        return obj.tolist()
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+
+def codificar_json(obj) -> bytes:
+    """Serializa uma única vez para JSON compacto (UTF-8)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_converter, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_converter, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def codificar_msgpack(obj) -> bytes:
+    """Serializa para MessagePack (requer o pacote 'msgpack')"""
+    if msgpack is None:
+        raise RuntimeError("Codificação MessagePack indisponível: instale o pacote 'msgpack'")
+    return msgpack.packb(obj, default=_converter, use_bin_type=True)
+
+
+TIPOS_MSGPACK = ("application/msgpack", "application/x-msgpack")
+
+
+def codificar_resposta(obj, aceitar: str = None):
+    """
+    Escolhe a codificação pelo cabeçalho Accept e retorna (bytes, mimetype).
+    MessagePack só é usado quando pedido explicitamente e disponível.
+    """
+    if aceitar and msgpack is not None and any(t in aceitar for t in TIPOS_MSGPACK):
+        return codificar_msgpack(obj), TIPOS_MSGPACK[0]
+    return codificar_json(obj), "application/json"
@@ -0,0 +1,216 @@
+# Servidor pré-fork: o processo mestre importa e aquece o estado compartilhado e só então cria os trabalhadores
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+# Limites padrão de reciclagem dos trabalhadores (0 = sem limite)
+MAX_REQUISICOES_PADRAO = int(os.environ.get("SERVIDOR_MAX_REQUISICOES", 1000))
+MAX_RSS_MB_PADRAO = float(os.environ.get("SERVIDOR_MAX_RSS_MB", 0))
+
+# Intervalo máximo de espera por conexão antes de checar se o mestre ainda existe (s)
+INTERVALO_VERIFICACAO = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+def rss_mb():
+    """Memória residente do processo atual (MB)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        # Sem /proc: usa o pico de memória (KB no Linux, bytes no macOS)
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 2 ** 20 if sys.platform == "darwin" else pico / 2 ** 10
+
+
+def aquecer():
+    """
+    Importa os módulos pesados e carrega no processo mestre tudo que é somente leitura,
+    para que os trabalhadores criados por fork herdem o estado pronto (copy-on-write).
+    Retorna o tempo de cada etapa (ms).
+    """
+    tempos = {}
+
+    def etapa(nome, funcao):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos[nome] = round((time.perf_counter() - inicio) * 1000, 1)
+        return resultado
+
+    # NumPy, SciPy, Pandas, Matplotlib, Plotly e os módulos dos desafios (catálogos carregados na importação)
+    app = etapa("importacoes", lambda: __import__("app").app)
+
+    # Curvas de magnetização em memória compartilhada (também visível a processos não criados por fork)
+    import materiais
+    etapa("curvas", materiais.publicar_biblioteca)
+
+    # Tabelas de núcleo do desafio 1 (catálogo de lâminas padrão), consultadas por busca binária
+    import tabela_respostas
+    etapa("tabelas_desafio1", tabela_respostas.tabelas.construir)
+
+    # Plotly: validadores, template e os modelos de figura (estrutura validada) dos diagramas
+    def aquecer_plotly():
+        import plotly.io as pio
+        from desafio1 import MODELO_3D
+        from desafio3 import MODELO_FASORIAL
+        from desafio4 import calcular_e_plotar_interativo
+        for variante in (True, False):
+            MODELO_3D.modelo(variante)
+            MODELO_FASORIAL.modelo(variante)
+        _, figura = calcular_e_plotar_interativo({
+            "V2": 240, "I2": 10, "R_eq": 1.0, "X_eq": 1.0, "cos_phi": 0.8, "tipo_fp": "atrasado"
+        })
+        pio.templates["plotly_white"]
+        figura.to_html(include_plotlyjs="cdn")
+    etapa("plotly", aquecer_plotly)
+
+    # Matplotlib: cache de fontes e o backend Agg, usados no gráfico do desafio 2
+    def aquecer_matplotlib():
+        import io
+        from matplotlib.figure import Figure
+        figura = Figure(figsize=(2, 2))
+        eixo = figura.subplots()
+        eixo.plot([0, 1], [0, 1])
+        eixo.set_title("Im(t)")
+        figura.savefig(io.BytesIO(), format="png")
+    etapa("matplotlib", aquecer_matplotlib)
+
+    # Objetos criados até aqui vão para a geração permanente: a coleta de lixo dos
+    # trabalhadores não os percorre, evitando copiar as páginas herdadas
+    gc.collect()
+    gc.freeze()
+    return app, tempos
+
+
+def _trabalhador(app, descritor, max_requisicoes, max_rss_mb):
+    """Atende requisições uma a uma até atingir o limite de requisições ou de memória"""
+    from werkzeug.serving import make_server
+
+    # O trabalhador não herda os tratadores de sinal do mestre
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    atendidas = 0
+
+    def contar(environ, start_response):
+        nonlocal atendidas
+        atendidas += 1
+        return app(environ, start_response)
+
+    mestre = os.getppid()
+    servidor = make_server("0.0.0.0", 0, contar, fd=descritor)
+    servidor.timeout = INTERVALO_VERIFICACAO
+    logger.info("[trabalhador %d] pronto (%.1f MB)", os.getpid(), rss_mb())
+
+    # Sai também se o mestre terminar (o trabalhador passa a ter outro processo pai)
+    while os.getppid() == mestre:
+        servidor.handle_request()  # Retorna após uma conexão ou após o timeout
+        if max_requisicoes and atendidas >= max_requisicoes:
+            logger.info("[trabalhador %d] reciclado após %d requisições", os.getpid(), atendidas)
+            break
+        if max_rss_mb and rss_mb() > max_rss_mb:
+            logger.info("[trabalhador %d] reciclado com %.1f MB após %d requisições",
+                        os.getpid(), rss_mb(), atendidas)
+            break
+    # os._exit: não executa finalizadores herdados do mestre (ex.: memória compartilhada),
+    # então a fila de registros é esvaziada antes
+    import registro
+    registro.encerrar()
+    os._exit(0)
+
+
+def _criar_socket(host, porta, fila=128):
+    familia = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(familia, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, porta))
+    sock.listen(fila)
+    sock.set_inheritable(True)
+    return sock
+
+
+def servir(host="0.0.0.0", porta=5000, trabalhadores=None, max_requisicoes=MAX_REQUISICOES_PADRAO,
+           max_rss_mb=MAX_RSS_MB_PADRAO):
+    """
+    Aquece o estado no mestre, abre o socket e mantém 'trabalhadores' processos filhos
+    aceitando conexões nele; cada filho que sai (reciclagem ou falha) é substituído.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("O modo pré-fork exige os.fork (Linux/macOS); use 'python app.py'")
+    trabalhadores = trabalhadores or os.cpu_count() or 2
+
+    inicio = time.perf_counter()
+    app, tempos = aquecer()
+    logger.info("[mestre %d] aquecido em %.0f ms (%.1f MB)", os.getpid(),
+                   (time.perf_counter() - inicio) * 1000, rss_mb(), extra={"evento": "aquecimento", "tempos_ms": tempos})
+
+    sock = _criar_socket(host, porta)
+    filhos = set()
+    encerrando = False
+
+    def iniciar_trabalhador():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _trabalhador(app, sock.fileno(), max_requisicoes, max_rss_mb)
+            finally:
+                os._exit(1)
+        filhos.add(pid)
+
+    def encerrar(sinal, quadro):
+        nonlocal encerrando
+        encerrando = True
+        for pid in list(filhos):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, encerrar)
+    signal.signal(signal.SIGINT, encerrar)
+
+    logger.info("[mestre %d] ouvindo em http://%s:%d com %d trabalhadores", os.getpid(), host, porta, trabalhadores)
+    for _ in range(trabalhadores):
+        iniciar_trabalhador()
+
+    try:
+        while filhos:
+            try:
+                pid, _ = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            filhos.discard(pid)
+            if not encerrando:
+                iniciar_trabalhador()
+    finally:
+        sock.close()
+        import materiais
+        materiais.biblioteca().liberar()
+        logger.info("[mestre %d] encerrado", os.getpid())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API do transformador em modo pré-fork")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=int(os.environ.get("PORTA", 5000)))
+    parser.add_argument("--trabalhadores", type=int, default=int(os.environ.get("SERVIDOR_TRABALHADORES", 0)),
+                        help="processos trabalhadores (padrão: número de CPUs)")
+    parser.add_argument("--max-requisicoes", type=int, default=MAX_REQUISICOES_PADRAO,
+                        help="recicla o trabalhador após N requisições (0 = nunca)")
+    parser.add_argument("--max-rss-mb", type=float, default=MAX_RSS_MB_PADRAO,
+                        help="recicla o trabalhador acima desta memória residente (0 = sem limite)")
+    args = parser.parse_args(argv)
+    servir(args.host, args.porta, args.trabalhadores, args.max_requisicoes, args.max_rss_mb)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+# Sessões de projeto do desafio 1 com recálculo incremental das etapas afetadas por cada alteração
+import copy
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict
+
+try:
+    import fcntl  # Trava entre processos (servidor pré-fork); ausente no Windows
+except ImportError:
+    fcntl = None
+
+from desafio1 import TransformadorMonofasico1
+
+# Atributos de entrada, preenchidos por carregar_dados
+ENTRADAS = ("tipo_transformador", "Vp", "Vs", "Potencia", "frequencia", "tipo_lamina",
+            "catalogo_fios", "catalogo_laminas")
+
+# Grafo de dependências, em ordem topológica: etapa → (método, atributos lidos, atributos escritos).
+# Uma etapa roda de novo apenas se algum atributo lido mudou desde a última execução, e
+# as seguintes só são invalidadas se algum atributo escrito de fato mudou de valor.
+ETAPAS = (
+    ("correntes", "calcular_correntes_e_secao",
+     ("Vp", "Vs", "Potencia", "catalogo_fios"),
+     ("Ip", "Is", "bitola_primario", "bitola_secundario")),
+    ("espiras", "calcular_espiras",
+     ("tipo_transformador", "tipo_lamina", "Potencia", "frequencia", "Vp", "Vs", "catalogo_laminas"),
+     ("Sm", "Sg", "lamina_selecionada", "quant_laminas", "dimensoes_nucleo", "Np", "Ns")),
+    ("viabilidade", "verificar_viabilidade",
+     ("Np", "Ns", "bitola_primario", "bitola_secundario", "lamina_selecionada"),
+     ("viabilidade", "mensagem_viabilidade")),
+    ("pesos", "calcular_pesos",
+     ("dimensoes_nucleo", "lamina_selecionada", "Np", "Ns", "bitola_primario", "bitola_secundario"),
+     ("peso_ferro", "peso_cobre")),
+)
+
+# O modelo 3D depende apenas da geometria
+GEOMETRIA = ("dimensoes_nucleo", "Np", "Ns")
+
+# Sessões sem uso por mais que isso são descartadas (s)
+TEMPO_MAXIMO_INATIVA = 30 * 60
+MAX_SESSOES = 256
+
+# Registro das sessões compartilhado pelos processos do servidor (um JSON por sessão com as
+# entradas e a versão): qualquer trabalhador atende qualquer sessão, e a reciclagem de um
+# trabalhador não as perde. Cada processo guarda em memória o transformador já calculado e
+# só o refaz quando a versão em disco mudou.
+DIRETORIO_SESSOES = os.environ.get("SESSOES_DIRETORIO") or os.path.join(tempfile.gettempdir(), "transformador_sessoes")
+
+_ID_VALIDO = re.compile(r"[0-9a-f]{32}")
+
+
+def _remover_modelo_3d(caminho_3d):
+    """Remove o modelo 3D de uma sessão e suas variantes comprimidas"""
+    if caminho_3d:
+        for caminho in (caminho_3d, caminho_3d + ".gz", caminho_3d + ".br"):
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+
+
+class SessaoProjeto:
+    """Um transformador do desafio 1 mantido no servidor entre alterações de entrada"""
+
+    def __init__(self, dados: Dict, renderizar: bool = True, id_sessao: str = None,
+                 caminho_3d: str = None, versao: int = 0):
+        self.id = id_sessao or uuid.uuid4().hex
+        self.renderizar = renderizar
+        self.dados = {}
+        self.transformador = None
+        # Sessão restaurada do registro: o modelo 3D gravado por outro processo é reaproveitado
+        self.caminho_3d = caminho_3d if caminho_3d and os.path.isfile(caminho_3d) else None
+        self.versao = versao
+        self.ultimo_uso = time.monotonic()
+        self._trava = threading.Lock()
+        self.resumo_criacao = self.alterar(dados)
+
+    def alterar(self, campos: Dict) -> Dict:
+        """
+        Aplica os campos alterados e recalcula apenas as etapas invalidadas.
+        Retorna um resumo com as etapas executadas; em caso de dados inválidos
+        a sessão permanece no estado anterior.
+        """
+        with self._trava:
+            self.ultimo_uso = time.monotonic()
+            dados = {**self.dados, **campos}
+
+            # Valida em uma instância descartável para não corromper o estado da sessão
+            candidato = TransformadorMonofasico1()
+            if not candidato.carregar_dados(dados):
+                raise ValueError("Parâmetros de projeto inválidos")
+
+            if self.transformador is None:
+                trabalho = candidato
+                alterados = set(ENTRADAS)
+            else:
+                # As etapas rodam numa cópia rasa (elas só reatribuem atributos, sem alterar os
+                # objetos no lugar): se alguma falhar, a sessão continua com o transformador anterior
+                trabalho = copy.copy(self.transformador)
+                alterados = {nome for nome in ENTRADAS
+                             if getattr(candidato, nome) != getattr(trabalho, nome)}
+                for nome in alterados:
+                    setattr(trabalho, nome, getattr(candidato, nome))
+
+            executadas = []
+            for nome, metodo, lidos, escritos in ETAPAS:
+                if alterados.isdisjoint(lidos):
+                    continue
+                anteriores = [getattr(trabalho, atributo) for atributo in escritos]
+                getattr(trabalho, metodo)()
+                executadas.append(nome)
+                alterados.update(atributo for atributo, antes in zip(escritos, anteriores)
+                                 if getattr(trabalho, atributo) != antes)
+
+            caminho_3d = self.caminho_3d
+            renderizado = False
+            restaurada = self.transformador is None and caminho_3d is not None
+            if self.renderizar and not restaurada and not alterados.isdisjoint(GEOMETRIA):
+                caminho_3d = trabalho.gerar_imagem_3d(html_path=f"transformador_3d_{self.id}.html")
+                renderizado = True
+
+            # Tudo calculado: só agora a sessão passa a refletir as novas entradas
+            self.transformador = trabalho
+            self.dados = dados
+            self.caminho_3d = caminho_3d
+            return {"etapas": executadas, "renderizado": renderizado}
+
+    def descartar(self):
+        _remover_modelo_3d(self.caminho_3d)
+
+    def resultado(self):
+        return self.transformador.gerar_resultado()
+
+    def para_json(self, resumo: Dict = None):
+        dados = {"id": self.id, "resultado": self.resultado(), "modelo_3d": self.caminho_3d}
+        if resumo is not None:
+            dados.update(resumo)
+        return dados
+
+
+_sessoes: Dict[str, SessaoProjeto] = {}
+_trava = threading.Lock()
+
+
+def _arquivo(id_sessao: str, extensao: str = ".json") -> str:
+    if not _ID_VALIDO.fullmatch(id_sessao):
+        raise KeyError(id_sessao)
+    return os.path.join(DIRETORIO_SESSOES, id_sessao + extensao)
+
+
+def _gravar(sessao: SessaoProjeto):
+    """Grava as entradas e a versão da sessão (troca atômica: nenhum processo lê pela metade)"""
+    os.makedirs(DIRETORIO_SESSOES, exist_ok=True)
+    arquivo = _arquivo(sessao.id)
+    temporario = f"{arquivo}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({"dados": sessao.dados, "renderizar": sessao.renderizar,
+                   "caminho_3d": sessao.caminho_3d, "versao": sessao.versao}, f)
+    os.replace(temporario, arquivo)
+
+
+def _ler(id_sessao: str):
+    try:
+        with open(_arquivo(id_sessao), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class _TravaSessao:
+    """Trava exclusiva da sessão entre processos (arquivo .lock com flock)"""
+
+    def __init__(self, id_sessao: str):
+        self.caminho = _arquivo(id_sessao, ".lock")
+        self.arquivo = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            os.makedirs(DIRETORIO_SESSOES, exist_ok=True)
+            self.arquivo = open(self.caminho, "a")
+            fcntl.flock(self.arquivo, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *_):
+        if self.arquivo is not None:
+            fcntl.flock(self.arquivo, fcntl.LOCK_UN)
+            self.arquivo.close()
+
+
+def _apagar(id_sessao: str, caminho_3d: str = None):
+    """Remove a sessão do registro compartilhado e o seu modelo 3D"""
+    for extensao in (".json", ".lock"):
+        try:
+            os.remove(_arquivo(id_sessao, extensao))
+        except FileNotFoundError:
+            pass
+    _remover_modelo_3d(caminho_3d)
+
+
+def _descartar_inativas():
+    """Sessões sem uso há mais de TEMPO_MAXIMO_INATIVA, em memória e no registro (chamada com _trava)"""
+    limite = time.monotonic() - TEMPO_MAXIMO_INATIVA
+    for id_sessao in [i for i, s in _sessoes.items() if s.ultimo_uso < limite]:
+        _sessoes.pop(id_sessao)
+    limite_disco = time.time() - TEMPO_MAXIMO_INATIVA
+    for id_sessao, modificado in _registradas():
+        if modificado < limite_disco:
+            _sessoes.pop(id_sessao, None)
+            _apagar(id_sessao, (_ler(id_sessao) or {}).get("caminho_3d"))
+
+
+def _registradas():
+    """(id, instante do último uso) de cada sessão no registro compartilhado"""
+    try:
+        entradas = list(os.scandir(DIRETORIO_SESSOES))
+    except FileNotFoundError:
+        return []
+    return [(e.name[:-5], e.stat().st_mtime) for e in entradas
+            if e.name.endswith(".json") and _ID_VALIDO.fullmatch(e.name[:-5])]
+
+
+def criar_sessao(dados: Dict, renderizar: bool = True) -> SessaoProjeto:
+    sessao = SessaoProjeto(dados, renderizar)
+    with _trava:
+        _descartar_inativas()
+        registradas = _registradas()
+        if len(registradas) >= MAX_SESSOES:
+            # Descarta a sessão usada há mais tempo
+            id_antiga = min(registradas, key=lambda item: item[1])[0]
+            _sessoes.pop(id_antiga, None)
+            _apagar(id_antiga, (_ler(id_antiga) or {}).get("caminho_3d"))
+        _gravar(sessao)
+        _sessoes[sessao.id] = sessao
+    return sessao
+
+
+def obter_sessao(id_sessao: str) -> SessaoProjeto:
+    """
+    Sessão atualizada: a do cache do processo se a versão do registro for a mesma,
+    senão refeita a partir das entradas gravadas (alterada ou criada por outro processo).
+    """
+    registro = _ler(id_sessao)
+    with _trava:
+        _descartar_inativas()
+        if registro is None:
+            # Removida (ou expirada) por outro processo
+            _sessoes.pop(id_sessao, None)
+            raise KeyError(id_sessao)
+        sessao = _sessoes.get(id_sessao)
+        if sessao is None or sessao.versao != registro["versao"]:
+            sessao = SessaoProjeto(registro["dados"], registro["renderizar"], id_sessao,
+                                   registro.get("caminho_3d"), registro["versao"])
+            _sessoes[id_sessao] = sessao
+    sessao.ultimo_uso = time.monotonic()
+    try:
+        os.utime(_arquivo(id_sessao))  # Último uso visível aos demais processos
+    except FileNotFoundError:
+        pass
+    return sessao
+
+
+def alterar_sessao(id_sessao: str, campos: Dict):
+    """
+    Altera a sessão sob a trava entre processos: parte da versão mais recente do
+    registro e grava a nova versão, para que alterações simultâneas em trabalhadores
+    diferentes não se percam. Retorna (sessão, resumo).
+    """
+    with _TravaSessao(id_sessao):
+        sessao = obter_sessao(id_sessao)
+        resumo = sessao.alterar(campos)
+        with sessao._trava:
+            sessao.versao += 1
+            _gravar(sessao)
+    return sessao, resumo
+
+
+def remover_sessao(id_sessao: str) -> bool:
+    try:
+        registro = _ler(id_sessao)
+    except KeyError:
+        return False
+    with _trava:
+        sessao = _sessoes.pop(id_sessao, None)
+    if registro is None and sessao is None:
+        return False
+    _apagar(id_sessao, (registro or {}).get("caminho_3d") or (sessao and sessao.caminho_3d))
+    return True
@@ -0,0 +1,198 @@
+# Formas de onda da corrente primária sob carga: ramo magnetizante não linear (curva do desafio 2) + circuito equivalente (desafio 3)
+import numpy as np
+
+from desafio2 import TransformadorMagnetico2, atualizar_parametros
+from desafio3 import TransformadorMonofasico
+import limites
+from resultados import ResultadoCarga
+
+# Campos de carga que aceitam listas (combinadas por broadcast, como no desafio 4)
+CAMPOS_CARGA = ("potencia", "cos_phi", "tipo_fp")
+
+# Pontos (cargas × pontos por período) processados por bloco
+AMOSTRAS_POR_BLOCO = 1 << 20
+
+
+class SimuladorCarga:
+    """
+    Regime permanente do circuito equivalente aproximado (ramo paralelo nos terminais
+    do primário), com todas as grandezas referidas ao primário:
+
+        v(t)  = Vm · sin(ωt)
+        Φ(t)  = -Vm / (ωN) · cos(ωt)               (como no desafio 2)
+        im(t) = MMF(Φ(t)) / N                      (curva não linear, no lugar de Xm)
+        ic(t) = v(t) / Rc                          (perdas no ferro)
+        iL(t) = |I| · sin(ωt + ∠I),  I = V / (Req + jXeq + Zcarga)
+        i1(t) = iL(t) + ic(t) + im(t)
+
+    O ramo paralelo vê a tensão da fonte, então im(t) e ic(t) são os mesmos para todas
+    as cargas: são calculados uma vez e somados por broadcast à corrente de cada carga.
+    """
+
+    def __init__(self, curva, vm, n, freq, rc, req, xeq):
+        self.curva = curva   # CurvaFMM (desafio2)
+        self.vm = vm         # Tensão de pico no primário (V)
+        self.n = n           # Número de espiras do primário
+        self.freq = freq
+        self.w = 2 * np.pi * freq
+        self.rc = rc         # Resistência de perdas no núcleo (Ω, referida ao primário)
+        self.zeq = complex(req, xeq)  # Impedância série (Ω, referida ao primário)
+
+    def corrente_vazio(self, t):
+        """im(t) + ic(t): parcela da corrente primária que não depende da carga"""
+        fluxo = -self.vm / (self.w * self.n) * np.cos(self.w * t)
+        corrente = self.curva(fluxo) / self.n
+        if np.isfinite(self.rc) and self.rc > 0:
+            corrente = corrente + self.vm * np.sin(self.w * t) / self.rc
+        return corrente
+
+    def fasores_carga(self, potencia, cos_phi, tipo_fp):
+        """
+        Fasor (pico) da corrente de carga para cada caso. A carga é dada pela potência
+        aparente na tensão nominal: Y = S / Vn² · (cos φ ∓ j sen φ), com Vn = Vm/√2.
+        Potência zero é o transformador em vazio.
+        """
+        sen_phi = np.sqrt(np.clip(1 - cos_phi ** 2, 0, None))
+        sinal = np.where(tipo_fp == "atrasado", -1.0, 1.0)  # Carga indutiva: admitância com parte imaginária negativa
+        admitancia = potencia / (self.vm ** 2 / 2) * (cos_phi + 1j * sinal * sen_phi)
+        return self.vm * admitancia / (1 + self.zeq * admitancia)
+
+    def simular(self, potencia, cos_phi, tipo_fp, pontos_por_periodo=512, harmonicas=15, formas_de_onda=False):
+        """
+        Simula um período para todas as combinações de carga (listas combinadas por broadcast).
+        Retorna as formas de onda (opcional) e, por caso: valor eficaz, pico, fator de crista,
+        DHT, potência ativa, fator de potência e as harmônicas (valor eficaz de 1 a 'harmonicas').
+        """
+        potencia, cos_phi, tipo_fp = (np.ravel(campo) for campo in np.broadcast_arrays(
+            np.asarray(potencia, dtype=float), np.asarray(cos_phi, dtype=float), np.asarray(tipo_fp)))
+        p = int(pontos_por_periodo)
+        harmonicas = min(int(harmonicas), p // 2 - 1)
+
+        t = np.arange(p) / (p * self.freq)
+        tensao = self.vm * np.sin(self.w * t)
+        seno, cosseno = np.sin(self.w * t), np.cos(self.w * t)
+        vazio = self.corrente_vazio(t)
+        fasor = self.fasores_carga(potencia, cos_phi, tipo_fp)
+
+        m = len(fasor)
+        eficaz, pico, potencia_ativa = np.empty(m), np.empty(m), np.empty(m)
+        eficaz_harmonicas = np.empty((m, harmonicas))
+        nivel_cc = np.empty(m)
+        formas = np.empty((m, p)) if formas_de_onda else None
+
+        # Cargas em blocos de até AMOSTRAS_POR_BLOCO pontos, verificando o prazo entre eles
+        por_bloco = max(1, AMOSTRAS_POR_BLOCO // p)
+        for inicio in range(0, m, por_bloco):
+            limites.verificar_cancelamento()
+            fim = min(inicio + por_bloco, m)
+            i = fasor[inicio:fim]
+            # i1 = |I|·sin(ωt + ∠I) + vazio = Re(I)·sin(ωt) + Im(I)·cos(ωt) + vazio: (cargas, p)
+            corrente = np.outer(i.real, seno)
+            corrente += np.outer(i.imag, cosseno)
+            corrente += vazio[None, :]
+
+            # Espectro de um período exato: a harmônica h cai no índice h da rFFT
+            espectro = np.fft.rfft(corrente, axis=1)
+            eficaz_harmonicas[inicio:fim] = np.abs(espectro[:, 1:harmonicas + 1]) * np.sqrt(2) / p
+            nivel_cc[inicio:fim] = espectro[:, 0].real / p
+            eficaz[inicio:fim] = np.sqrt(np.mean(corrente ** 2, axis=1))
+            pico[inicio:fim] = np.max(np.abs(corrente), axis=1)
+            potencia_ativa[inicio:fim] = corrente @ tensao / p
+            if formas is not None:
+                formas[inicio:fim] = corrente
+
+        fundamental = eficaz_harmonicas[:, 0]
+        # DHT com todas as harmônicas do espectro (não só as devolvidas): tira do total a fundamental e o nível CC
+        distorcao = np.sqrt(np.maximum(eficaz ** 2 - fundamental ** 2 - nivel_cc ** 2, 0))
+        aparente = eficaz * self.vm / np.sqrt(2)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return ResultadoCarga(
+                potencia=potencia,
+                cos_phi=cos_phi,
+                tipo_fp=tipo_fp,
+                eficaz=eficaz,
+                pico=pico,
+                fator_crista=pico / eficaz,
+                dht=distorcao / fundamental,
+                potencia_ativa=potencia_ativa,
+                fator_potencia=potencia_ativa / aparente,
+                harmonicas=eficaz_harmonicas,
+                t=t if formas_de_onda else None,
+                corrente_vazio=vazio if formas_de_onda else None,
+                formas_de_onda=formas
+            )
+
+
+def parametros_equivalentes(parametros):
+    """
+    Rc, Req e Xeq referidos ao primário: dos ensaios do desafio 3 (valores padrão se
+    ausentes), substituídos por R_c/R_eq/X_eq quando informados (já referidos ao primário).
+    """
+    tf = TransformadorMonofasico(**(parametros.get("ensaios") or {}))
+    fator = 1.0
+    if tf.referred_to == "secundario":
+        # Impedâncias referidas ao secundário voltam ao primário multiplicadas por a²
+        fator = tf.calcular_relacao_transformacao() ** 2
+    rc = parametros.get("R_c")
+    req = parametros.get("R_eq")
+    xeq = parametros.get("X_eq")
+    return (
+        tf.Rc * fator if rc is None else rc,
+        tf.Req * fator if req is None else req,
+        tf.Xeq * fator if xeq is None else xeq,
+    )
+
+
+def executar_simulacao_carga(json_input=None):
+    """
+    Corrente primária sob carga para várias cargas de uma vez.
+
+    Parâmetros:
+    - VM, N, freq e material (area_nucleo/comprimento_medio para curvas B-H), como no desafio 2
+    - ensaios: parâmetros do desafio 3 para Rc, Req e Xeq (ou R_c, R_eq e X_eq diretamente)
+    - potencia (VA), cos_phi, tipo_fp: números ou listas da mesma forma
+    - pontos_por_periodo, harmonicas e formas_de_onda (devolve i1(t) de cada carga)
+    """
+    parametros = atualizar_parametros({
+        "VM": 325,
+        "N": 850,
+        "freq": 50,
+        "material": None,
+        "area_nucleo": None,
+        "comprimento_medio": None,
+        "ensaios": None,
+        "R_c": None,
+        "R_eq": None,
+        "X_eq": None,
+        "potencia": [0, 250, 500, 1000],
+        "cos_phi": 0.8,
+        "tipo_fp": "atrasado",
+        "pontos_por_periodo": 512,
+        "harmonicas": 15,
+        "formas_de_onda": False
+    }, json_input)
+
+    transformador = TransformadorMagnetico2()
+    transformador._carregar_curva_magnetizacao(
+        material=parametros["material"],
+        area_nucleo=parametros["area_nucleo"],
+        comprimento_medio=parametros["comprimento_medio"]
+    )
+
+    rc, req, xeq = parametros_equivalentes(parametros)
+    simulador = SimuladorCarga(transformador.curva(), parametros["VM"], parametros["N"],
+                               parametros["freq"], rc, req, xeq)
+    return simulador.simular(
+        *(parametros[campo] for campo in CAMPOS_CARGA),
+        pontos_por_periodo=parametros["pontos_por_periodo"],
+        harmonicas=parametros["harmonicas"],
+        formas_de_onda=bool(parametros["formas_de_onda"])
+    )
+
+
+if __name__ == "__main__":
+    resultado = executar_simulacao_carga()
+    print("Potência (VA) | I1 eficaz (A) | DHT (%)")
+    for s, i, d in zip(resultado.potencia, resultado.eficaz, resultado.dht):
+        print(f"{s:13.0f} | {i:13.3f} | {100 * d:7.2f}")
@@ -0,0 +1,221 @@
+# Tabelas pré-calculadas do núcleo do desafio 1: faixas de potência com resposta constante, consultadas por busca binária
+import argparse
+import math
+import random
+import sys
+import threading
+import time
+from bisect import bisect_right
+
+import catalogos
+from desafio1 import TransformadorMonofasico1
+from resultados import codificar_json
+
+# Faixa de potência tabelada (VA); fora dela o cálculo escalar é usado
+POTENCIA_MINIMA = 1.0
+POTENCIA_MAXIMA = 20000.0
+
+# Frequências tabeladas; as demais usam o cálculo escalar
+FREQUENCIAS = (50, 60)
+
+# Atributos do núcleo copiados da tabela para o transformador
+ATRIBUTOS_NUCLEO = ("Sm", "Sg", "lamina_selecionada", "quant_laminas", "dimensoes_nucleo", "espiras_por_volt")
+
+
+class TabelaNucleo:
+    """
+    Para um (catálogo de lâminas, tipo de transformador, tipo de lâmina, frequência):
+    potencias[i] é a menor potência (float exato) em que a seção magnética estimada
+    assume o valor da faixa i, e nucleos[i] os atributos do núcleo nessa faixa.
+
+    Todo o dimensionamento do núcleo depende da potência apenas pela seção magnética
+    estimada (arredondada a 0,1 cm²), então a resposta é constante em cada faixa.
+    """
+    __slots__ = ("potencias", "nucleos", "potencia_maxima")
+
+    def __init__(self, potencias, nucleos, potencia_maxima):
+        self.potencias = potencias
+        self.nucleos = nucleos
+        self.potencia_maxima = potencia_maxima
+
+    def consultar(self, potencia):
+        """Atributos do núcleo para a potência, ou None fora da faixa tabelada"""
+        if not POTENCIA_MINIMA <= potencia <= self.potencia_maxima:
+            return None
+        return self.nucleos[bisect_right(self.potencias, potencia) - 1]
+
+
+def _proxima_quebra(secao, inicio, fim):
+    """
+    Menor float em (inicio, fim] em que secao(p) difere de secao(inicio), ou None.
+    A seção estimada é monótona na potência (operações IEEE com arredondamento correto
+    preservam a ordem), então a bissecção nos floats converge para a quebra exata.
+    """
+    valor = secao(inicio)
+    if secao(fim) == valor:
+        return None
+    baixo, alto = inicio, fim
+    while True:
+        meio = (baixo + alto) / 2
+        if meio <= baixo or meio >= alto:  # Floats adjacentes
+            return alto
+        if secao(meio) == valor:
+            baixo = meio
+        else:
+            alto = meio
+
+
+def construir_tabela(tipo_transformador, tipo_lamina, frequencia, catalogo_laminas=None,
+                     potencia_maxima=POTENCIA_MAXIMA):
+    """Percorre a faixa de potência quebra a quebra, dimensionando o núcleo uma vez por faixa"""
+    tf = TransformadorMonofasico1(catalogo_laminas=catalogo_laminas)
+    tf.tipo_transformador = tipo_transformador
+    tf.tipo_lamina = tipo_lamina
+    tf.frequencia = frequencia
+
+    def secao(potencia):
+        tf.Potencia = potencia
+        return tf.secao_magnetica_estimada()
+
+    potencias, nucleos = [], []
+    potencia = POTENCIA_MINIMA
+    while potencia is not None:
+        tf.Potencia = potencia
+        try:
+            tf.calcular_nucleo()
+            nucleo = tuple(getattr(tf, nome) for nome in ATRIBUTOS_NUCLEO)
+        except (ValueError, ZeroDivisionError):
+            nucleo = None  # Faixa sem solução: a consulta recorre ao cálculo escalar (e ao mesmo erro)
+        potencias.append(potencia)
+        nucleos.append(nucleo)
+        potencia = _proxima_quebra(secao, potencia, potencia_maxima)
+    return TabelaNucleo(tuple(potencias), tuple(nucleos), potencia_maxima)
+
+
+class TabelasDesafio1:
+    """Tabelas construídas sob demanda (ou todas de uma vez em construir) e compartilhadas entre threads"""
+
+    def __init__(self, potencia_maxima=POTENCIA_MAXIMA):
+        self.potencia_maxima = potencia_maxima
+        self._tabelas = {}
+        self._trava = threading.Lock()
+        self.consultas = 0
+        self.recalculos = 0
+
+    def _tabela(self, catalogo_laminas, tipo_transformador, tipo_lamina, frequencia):
+        chave = (catalogo_laminas, tipo_transformador, tipo_lamina, frequencia)
+        tabela = self._tabelas.get(chave)
+        if tabela is None:
+            with self._trava:
+                tabela = self._tabelas.get(chave)
+                if tabela is None:
+                    tabela = self._tabelas[chave] = construir_tabela(
+                        tipo_transformador, tipo_lamina, frequencia, catalogo_laminas, self.potencia_maxima)
+        return tabela
+
+    def construir(self, catalogo_laminas=None):
+        """Constrói todas as tabelas de um catálogo de lâminas; retorna o total de faixas"""
+        laminas = catalogos.catalogo_laminas(catalogo_laminas)
+        faixas = 0
+        for tipo_transformador in TransformadorMonofasico1.tipos_validos:
+            for tipo_lamina in laminas.tipos:
+                for frequencia in FREQUENCIAS:
+                    faixas += len(self._tabela(laminas.nome, tipo_transformador, tipo_lamina, frequencia).potencias)
+        return faixas
+
+    def calcular_projeto(self, tf):
+        """
+        Equivalente a tf.calcular_projeto(): o núcleo vem da tabela e as demais etapas
+        (correntes, enrolamentos, viabilidade e pesos) rodam sobre ele como no cálculo escalar.
+        """
+        nucleo = None
+        if tf.frequencia in FREQUENCIAS:
+            tabela = self._tabela(tf.catalogo_laminas.nome, tf.tipo_transformador, tf.tipo_lamina, tf.frequencia)
+            nucleo = tabela.consultar(tf.Potencia)
+        if nucleo is None:
+            self.recalculos += 1
+            tf.calcular_projeto()
+            return tf
+        self.consultas += 1
+        for nome, valor in zip(ATRIBUTOS_NUCLEO, nucleo):
+            setattr(tf, nome, valor)
+        tf.calcular_correntes_e_secao()
+        tf.calcular_enrolamentos()
+        tf.verificar_viabilidade()
+        tf.calcular_pesos()
+        return tf
+
+
+tabelas = TabelasDesafio1()
+
+
+def calcular_projeto(tf):
+    """Dimensiona pelo núcleo tabelado (catálogo de lâminas padrão ou escolhido na requisição)"""
+    return tabelas.calcular_projeto(tf)
+
+
+def _dados_aleatorios(gerador, quebras):
+    tipo = gerador.choice(TransformadorMonofasico1.tipos_validos)
+    n_primarios = 2 if "dois primários" in tipo else 1
+    n_secundarios = 2 if "dois secundários" in tipo else 1
+    tensoes = (6, 12, 24, 48, 110, 115, 120, 127, 220, 240, 380, 440)
+    dados = {
+        "tipo_transformador": tipo,
+        "Vp": [gerador.choice(tensoes) for _ in range(n_primarios)],
+        "Vs": [gerador.choice(tensoes) * gerador.choice((1, 1.5)) for _ in range(n_secundarios)],
+        "tipo_lamina": gerador.choice(("Padronizada", "Comprida")),
+        "frequencia": gerador.choice(FREQUENCIAS),
+    }
+    # Metade dos casos exatamente numa quebra ou no float vizinho (as bordas das faixas)
+    if quebras and gerador.random() < 0.5:
+        quebra = gerador.choice(quebras)
+        dados["Potencia"] = gerador.choice((quebra, math.nextafter(quebra, 0), math.nextafter(quebra, math.inf)))
+    else:
+        dados["Potencia"] = round(gerador.uniform(POTENCIA_MINIMA, POTENCIA_MAXIMA), gerador.choice((0, 1, 3)))
+    return dados
+
+
+def verificar(amostras=20000, semente=0):
+    """
+    Compara a resposta tabelada com o cálculo escalar em entradas aleatórias e nas
+    bordas das faixas: a serialização JSON precisa ser idêntica byte a byte.
+    """
+    gerador = random.Random(semente)
+    tabelas.construir()
+    quebras = [p for tabela in tabelas._tabelas.values() for p in tabela.potencias[1:]]
+    divergencias = []
+    for _ in range(amostras):
+        dados = _dados_aleatorios(gerador, quebras)
+        escalar, tabelado = TransformadorMonofasico1(), TransformadorMonofasico1()
+        escalar.carregar_dados(dados)
+        tabelado.carregar_dados(dados)
+        escalar.calcular_projeto()
+        tabelas.calcular_projeto(tabelado)
+        if codificar_json(escalar.gerar_resultado()) != codificar_json(tabelado.gerar_resultado()):
+            divergencias.append(dados)
+    return divergencias
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Constrói e verifica as tabelas de núcleo do desafio 1")
+    parser.add_argument("--verificar", type=int, default=0, metavar="N",
+                        help="compara N entradas aleatórias com o cálculo escalar")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    faixas = tabelas.construir()
+    print(f"{len(tabelas._tabelas)} tabelas, {faixas} faixas construídas em "
+          f"{time.perf_counter() - inicio:.2f} s")
+
+    if args.verificar:
+        divergencias = verificar(args.verificar, args.semente)
+        if divergencias:
+            print(f"{len(divergencias)} divergências, por exemplo: {divergencias[0]}")
+            return 1
+        print(f"{args.verificar} entradas idênticas ao cálculo escalar")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
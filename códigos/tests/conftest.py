@@ -0,0 +1,36 @@
+# Configuração comum dos testes: módulos de códigos/ importáveis e todas as saídas em diretórios temporários
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+CODIGOS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CODIGOS)
+
+# Definido antes de importar o app: sem banco de resultados, registros compactos,
+# sessões e artefatos do lote fora do repositório
+_TEMPORARIO = tempfile.mkdtemp(prefix="transformador_testes_")
+os.environ.pop("BANCO_RESULTADOS", None)
+os.environ.pop("LIMITES_RECURSOS", None)
+os.environ["LOG_MODO"] = "producao"
+os.environ["SESSOES_DIRETORIO"] = os.path.join(_TEMPORARIO, "sessoes")
+os.environ["ARTEFATOS_LOTE"] = os.path.join(_TEMPORARIO, "lote")
+os.environ["TRANSFORMADOR_MATERIAIS"] = os.path.join(_TEMPORARIO, "materiais")
+
+# Curva MMF(Φ) sintética (material "teste"): o MagCurve.xlsx não faz parte do repositório
+MATERIAL_TESTE = "teste"
+os.makedirs(os.environ["TRANSFORMADOR_MATERIAIS"])
+_fluxo = np.linspace(-0.0022, 0.0022, 81)
+np.savetxt(os.path.join(os.environ["TRANSFORMADOR_MATERIAIS"], f"{MATERIAL_TESTE}.csv"),
+           np.column_stack([_fluxo, 0.33 * np.sinh(4000 * _fluxo)]),
+           delimiter=",", header="Fluxo,MMF", comments="")
+
+
+@pytest.fixture(autouse=True)
+def diretorio_trabalho(tmp_path, monkeypatch):
+    """Os desafios gravam os arquivos renderizados no diretório atual"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
@@ -0,0 +1,95 @@
+# Rotas /mensagem e /mensagem/batch: mapeamento de erros para códigos HTTP e artefatos do lote
+import json
+
+import pytest
+
+import app
+import escalonador
+import limites
+from conftest import MATERIAL_TESTE
+
+PROJETO = {"tipo_transformador": "Transformador de um primário e um secundário", "Vp": [120], "Vs": [12],
+           "Potencia": 300, "tipo_lamina": "Padronizada", "frequencia": 60}
+
+ENSAIOS = {"N1": 2400, "N2": 240, "Va": 48, "Ia": 20.8, "Pa": 617, "Vb": 240, "Ib": 5.41, "Pb": 186,
+           "referred_to": "secundario"}
+
+CARGA = {"V2": 220, "I2": 10, "R_eq": 0.5, "X_eq": 1.2, "cos_phi": 0.8, "tipo_fp": "atrasado"}
+
+
+@pytest.fixture
+def cliente():
+    return app.app.test_client()
+
+
+def _mensagem(cliente, classe, parametros):
+    return cliente.post("/mensagem", json={"classe": classe, "parametros": parametros})
+
+
+def test_parametros_invalidos_400(cliente):
+    resposta = _mensagem(cliente, "desafio4", {**CARGA, "cos_phi": 2})
+    assert resposta.status_code == 400
+    assert resposta.get_json()["detalhes"][0]["campo"] == "cos_phi"
+
+
+def test_material_desconhecido_400(cliente):
+    resposta = _mensagem(cliente, "desafio2", {"material": "inexistente"})
+    assert resposta.status_code == 400
+
+
+def test_limite_excedido_422(cliente):
+    resposta = _mensagem(cliente, "desafio1", {**PROJETO, "Potencia": 200_000})
+    assert resposta.status_code == 422
+    assert resposta.get_json()["limite"] == "potencia_max"
+
+
+def test_fila_cheia_503(cliente, monkeypatch):
+    fila = escalonador.Escalonador({"pesada": {"classes": ["desafio4"], "concorrencia": 1,
+                                               "fila_max": 0, "espera_max_s": 1}}, total=1)
+    monkeypatch.setattr(app, "fila_calculos", fila)
+    with fila.admitir("desafio4"):
+        resposta = _mensagem(cliente, "desafio4", CARGA)
+    assert resposta.status_code == 503
+    assert resposta.headers["Retry-After"] == "1"
+
+
+def test_prazo_esgotado_504(cliente, monkeypatch):
+    monkeypatch.setitem(limites.LIMITES["incerteza"], "tempo_s", 1e-6)
+    resposta = _mensagem(cliente, "incerteza", {**ENSAIOS, "amostras": 200_000, "tamanho_bloco": 10_000})
+    assert resposta.status_code == 504
+
+
+def test_desafio4_a_vazio(cliente):
+    resposta = _mensagem(cliente, "desafio4", {**CARGA, "I2": 0})
+    assert resposta.status_code == 200
+    regulacao, diagrama = resposta.get_json()["resposta"]
+    assert regulacao == pytest.approx(0)
+    assert diagrama.endswith(".html")
+
+
+def test_lote(cliente):
+    requisicoes = [
+        {"id": "a", "classe": "desafio4", "parametros": CARGA},
+        {"id": "b", "classe": "desafio4", "parametros": CARGA},
+        {"id": "c", "classe": "desafio4", "parametros": {**CARGA, "V2": -1}},
+        {"id": "d", "classe": "desafio4", "parametros": {**CARGA, "I2": 0}},
+        {"id": "e", "classe": "desafio2", "parametros": {"material": MATERIAL_TESTE, "tempo_max": 0.04}},
+    ]
+    resposta = cliente.post("/mensagem/batch", json=requisicoes)
+    assert resposta.status_code == 200
+    linhas = {linha["id"]: linha for linha in map(json.loads, resposta.get_data(as_text=True).splitlines())}
+    assert set(linhas) == {"a", "b", "c", "d", "e"}
+
+    assert linhas["c"]["detalhes"][0]["campo"] == "V2"
+    # Entradas idênticas são calculadas uma vez e compartilham o resultado
+    assert linhas["a"]["resposta"] == linhas["b"]["resposta"]
+    assert "erro" not in linhas["e"]
+
+    # Cada item grava em seu diretório, e nenhum caminho do servidor vaza:
+    # os artefatos são servidos por /lote/<diretorio>/<nome>
+    assert linhas["a"]["artefatos"] != linhas["d"]["artefatos"]
+    assert app.DIRETORIO_ARTEFATOS_LOTE not in resposta.get_data(as_text=True)
+    for id_item in ("a", "d"):
+        _, diagrama = linhas[id_item]["resposta"]
+        assert diagrama.startswith(linhas[id_item]["artefatos"])
+        assert cliente.get(diagrama).status_code == 200
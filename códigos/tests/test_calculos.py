@@ -0,0 +1,35 @@
+# Verificações numéricas: tabelas do desafio 1 e amostragem adaptativa do desafio 2
+import pytest
+
+import limites
+import tabela_respostas
+from conftest import MATERIAL_TESTE
+from desafio2 import calcular_desafio2
+
+
+def _desafio2(**parametros):
+    return calcular_desafio2({"material": MATERIAL_TESTE, "tempo_max": 0.04, **parametros})
+
+
+def test_tabelas_identicas_ao_calculo_escalar():
+    assert tabela_respostas.verificar(1000, semente=0) == []
+
+
+def test_amostragem_adaptativa_dentro_da_tolerancia():
+    adaptativa = _desafio2(amostragem="adaptativa")
+    assert adaptativa.erro_contra_referencia() <= adaptativa.tolerancia_amostragem * 1.01
+
+    densa = _desafio2(passo=1 / 100_000)
+    assert len(adaptativa.t) < len(densa.t) / 10
+
+
+def test_tolerancia_abaixo_da_resolucao_usa_piso():
+    transformador = _desafio2(amostragem="adaptativa", tolerancia=1e-300)
+    assert transformador.tolerancia_amostragem > 1e-300
+    assert transformador.erro_contra_referencia() <= transformador.tolerancia_amostragem * 1.01
+
+
+def test_amostragem_adaptativa_respeita_limite_de_amostras(monkeypatch):
+    monkeypatch.setitem(limites.LIMITES["desafio2"], "amostras_max", 1000)
+    with limites.protegido("desafio2"), pytest.raises(limites.LimiteExcedido):
+        _desafio2(amostragem="adaptativa", tolerancia=1e-12)